@@ -6,6 +6,7 @@ import os
 import sys
 from dotenv import load_dotenv
 import io
+from contextlib import asynccontextmanager
 import PyPDF2
 
 # Add src directory to path
@@ -18,10 +19,16 @@ from user_service import UserService
 # Load environment variables
 load_dotenv()
 
-app = FastAPI(title="CoffeeChat API", version="1.0.0")
 org_service = OrganizationService()
 user_service = UserService()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await org_service.scraper.aclose()  # scraper HTTP pools
+
+app = FastAPI(title="CoffeeChat API", version="1.0.0", lifespan=lifespan)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -0,0 +1,214 @@
+# browser_pool.py
+import os
+import asyncio
+import logging
+import threading
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from playwright.async_api import async_playwright
+
+log = logging.getLogger("browser_pool")
+
+try:
+    import psutil  # optional: enables the memory-based recycling below
+except ImportError:
+    psutil = None
+
+POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+MAX_USES = int(os.getenv("BROWSER_MAX_USES", "50"))
+MAX_RSS_MB = int(os.getenv("BROWSER_MAX_RSS_MB", "1536"))
+
+
+class _Slot:
+    def __init__(self, index: int):
+        self.index = index
+        self.browser = None
+        self.spare = None  # pre-opened context for the next task
+        self.uses = 0
+
+
+class BrowserPool:
+    """
+    Long-lived Chromium instances shared by every scrape.
+
+    page() hands out a page in a fresh browser context (own cookies, storage and
+    cache, so tasks don't see each other) on one of `size` warm browsers. At most
+    `size` tasks hold a browser at once; the rest wait. A browser is relaunched
+    after `max_uses` tasks, when it has crashed, or (with psutil installed) when
+    Chromium's total RSS goes over `max_rss_mb`.
+    """
+
+    def __init__(self, size: int = POOL_SIZE, max_uses: int = MAX_USES,
+                 max_rss_mb: int = MAX_RSS_MB, headless: bool = True,
+                 launch_options: Optional[dict] = None,
+                 context_options: Optional[dict] = None):
+        self.size = size
+        self.max_uses = max_uses
+        self.max_rss_mb = max_rss_mb
+        self.launch_options = {"headless": headless, **(launch_options or {})}
+        self.context_options = context_options or {}
+        self._playwright = None
+        self._slots: list[_Slot] = []
+        self._idle: Optional[asyncio.Queue] = None
+
+    async def start(self) -> "BrowserPool":
+        self._playwright = await async_playwright().start()
+        self._idle = asyncio.Queue()
+        for i in range(self.size):
+            slot = _Slot(i)
+            await self._launch(slot)
+            self._slots.append(slot)
+            self._idle.put_nowait(slot)
+        log.info("[browsers] pool started: %d browser(s)", self.size)
+        return self
+
+    async def close(self) -> None:
+        for slot in self._slots:
+            await self._shutdown(slot)
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    @asynccontextmanager
+    async def page(self, **context_options):
+        """
+        A page in its own context on a pooled browser; the context is closed on exit.
+        Per-call context options (user agent, viewport, ...) skip the pre-opened one.
+        """
+        slot = await self._idle.get()
+        try:
+            if slot.browser is None or not slot.browser.is_connected():
+                await self._recycle(slot, "disconnected")
+            if context_options or slot.spare is None:
+                context = await slot.browser.new_context(**{**self.context_options, **context_options})
+            else:
+                context, slot.spare = slot.spare, None
+            try:
+                yield await context.new_page()
+            finally:
+                slot.uses += 1
+                try:
+                    await context.close()
+                except Exception as e:
+                    log.warning("[browsers] closing context failed: %s", e)
+        finally:
+            await self._release(slot)
+
+    # ---- internals ----
+    async def _launch(self, slot: _Slot) -> None:
+        slot.browser = await self._playwright.chromium.launch(**self.launch_options)
+        slot.spare = await slot.browser.new_context(**self.context_options)
+        slot.uses = 0
+
+    async def _shutdown(self, slot: _Slot) -> None:
+        try:
+            if slot.browser is not None:
+                await slot.browser.close()
+        except Exception as e:
+            log.warning("[browsers] closing browser %d failed: %s", slot.index, e)
+        slot.browser, slot.spare = None, None
+
+    async def _recycle(self, slot: _Slot, reason: str) -> None:
+        log.info("[browsers] recycling browser %d after %d use(s): %s", slot.index, slot.uses, reason)
+        await self._shutdown(slot)
+        await self._launch(slot)
+
+    async def _release(self, slot: _Slot) -> None:
+        try:
+            if slot.uses >= self.max_uses:
+                await self._recycle(slot, "max uses")
+            elif slot.browser is None or not slot.browser.is_connected():
+                await self._recycle(slot, "disconnected")
+            elif self._rss_mb() > self.max_rss_mb:
+                await self._recycle(slot, f"chromium rss {self._rss_mb():.0f}MB")
+            elif slot.spare is None:
+                slot.spare = await slot.browser.new_context(**self.context_options)
+        except Exception as e:
+            log.error("[browsers] browser %d could not be prepared: %s", slot.index, e)
+        finally:
+            self._idle.put_nowait(slot)
+
+    @staticmethod
+    def _rss_mb() -> float:
+        if psutil is None:
+            return 0.0
+        total = 0
+        for proc in psutil.Process().children(recursive=True):
+            try:
+                if "chrom" in proc.name().lower() or "headless_shell" in proc.name().lower():
+                    total += proc.memory_info().rss
+            except psutil.Error:
+                continue
+        return total / (1024 * 1024)
+
+
+# =========================
+# Shared pool
+# =========================
+# One event loop thread per process for scrapes, so blocking callers
+# (testing.push_file, server jobs, the CLI) and async callers can share it.
+# Chromium is only launched the first time something asks for a page on it,
+# so scrapes that never leave the plain-HTTP tier never start a browser.
+_shared: Optional[BrowserPool] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_lock = threading.Lock()
+_starting: Optional[asyncio.Lock] = None  # created on _loop
+
+
+def shared_loop() -> asyncio.AbstractEventLoop:
+    """The scrape loop, started on first use (no browsers yet)."""
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="browser-pool", daemon=True).start()
+        return _loop
+
+
+async def _pool() -> BrowserPool:
+    global _shared, _starting
+    if _shared is None:
+        if _starting is None:
+            _starting = asyncio.Lock()
+        async with _starting:
+            if _shared is None:
+                _shared = await BrowserPool().start()
+    return _shared
+
+
+@asynccontextmanager
+async def page(**context_options):
+    """
+    BrowserPool.page() on the shared pool, launching the browsers on first use.
+    Call it from coroutines running on the scrape loop (see run / run_async).
+    """
+    pool = await _pool()
+    async with pool.page(**context_options) as p:
+        yield p
+
+
+def shared_pool() -> BrowserPool:
+    """Blocking: the shared pool, launched if needed. Not for use on the scrape loop."""
+    return run(_pool())
+
+
+def run(coro):
+    """Run a coroutine on the scrape loop and wait for it."""
+    return asyncio.run_coroutine_threadsafe(coro, shared_loop()).result()
+
+
+async def run_async(coro):
+    """Same as run() for callers on another event loop."""
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, shared_loop()))
+
+
+def shutdown() -> None:
+    global _shared, _loop, _starting
+    with _lock:
+        if _loop is None:
+            return
+        if _shared is not None:
+            asyncio.run_coroutine_threadsafe(_shared.close(), _loop).result()
+        _loop.call_soon_threadsafe(_loop.stop)
+        _shared, _loop, _starting = None, None, None
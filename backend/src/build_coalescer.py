@@ -0,0 +1,154 @@
+# build_coalescer.py
+import os
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from typing import Any, Callable, Hashable, Optional
+
+log = logging.getLogger("build_coalescer")
+
+DEFAULT_WINDOW_S = float(os.getenv("BUILD_COALESCE_WINDOW_S", "5"))
+DEFAULT_MAX_BATCH = int(os.getenv("BUILD_COALESCE_MAX_BATCH", "25"))
+DEFAULT_MAX_CONCURRENT = int(os.getenv("BUILD_COALESCE_MAX_CONCURRENT", "4"))
+
+_STOP = object()  # queued by close()
+
+
+class BuildCoalescer:
+    """
+    Turns many "I uploaded X, build it and give me X's rows" calls into one build.
+
+    Callers submit() a key (foundry file path, media item RID, ...) and get a Future.
+    A worker thread collects keys for `window_s` seconds after the first one arrives
+    (or until `max_batch` keys), then calls `run_batch(keys)` once. run_batch starts
+    a single build and returns {key: result}; each caller's Future gets its own entry.
+    A result may itself be a Future (e.g. that key's own output poll), in which case
+    the caller is resolved when it finishes, independently of the rest of the batch.
+    Batches run on up to `max_concurrent` threads, so the next window's build is
+    triggered while an earlier batch is still waiting. No thread starts until the
+    first submit(); close() stops them.
+    """
+
+    def __init__(self, run_batch: Callable[[list], dict[Hashable, Any]],
+                 window_s: float = DEFAULT_WINDOW_S,
+                 max_batch: int = DEFAULT_MAX_BATCH,
+                 max_concurrent: int = DEFAULT_MAX_CONCURRENT,
+                 name: str = "build"):
+        self.run_batch = run_batch
+        self.window_s = window_s
+        self.max_batch = max_batch
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self._queue: "queue.Queue[tuple[Hashable, Optional[Future]]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._batches: Optional[ThreadPoolExecutor] = None
+        self._worker: Optional[threading.Thread] = None
+        self._closed = False
+
+    def submit(self, key: Hashable) -> Future:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"{self.name} coalescer is closed")
+            if self._worker is None:
+                self._batches = ThreadPoolExecutor(max_workers=self.max_concurrent,
+                                                   thread_name_prefix=f"coalescer-{self.name}-batch")
+                self._worker = threading.Thread(target=self._loop, name=f"coalescer-{self.name}", daemon=True)
+                self._worker.start()
+            fut: Future = Future()
+            self._queue.put((key, fut))
+        return fut
+
+    def close(self, timeout_s: float = 5) -> None:
+        """
+        Stop taking keys and stop the threads. Batches already running finish in the
+        background; keys still waiting for a window fail with RuntimeError.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            worker, batches = self._worker, self._batches
+        if worker is None:
+            return
+        self._queue.put((_STOP, None))
+        worker.join(timeout_s)
+        batches.shutdown(wait=False)
+
+    def _collect(self) -> Optional[list[tuple[Hashable, Future]]]:
+        first = self._queue.get()  # block for the first one
+        if first[0] is _STOP:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.window_s
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item[0] is _STOP:
+                self._queue.put(item)  # run this batch, stop on the next _collect
+                break
+            batch.append(item)
+        return batch
+
+    def _loop(self) -> None:
+        while True:
+            batch = self._collect()
+            if batch is None:
+                break
+            # The same key twice in a window shares one slot in the build
+            waiters: dict[Hashable, list[Future]] = {}
+            for key, fut in batch:
+                if fut.set_running_or_notify_cancel():
+                    waiters.setdefault(key, []).append(fut)
+            if not waiters:
+                continue
+
+            self._batches.submit(self._run, waiters)
+
+        closed = RuntimeError(f"{self.name} coalescer is closed")
+        while True:
+            try:
+                _, fut = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if fut is not None and fut.set_running_or_notify_cancel():
+                fut.set_exception(closed)
+
+    def _run(self, waiters: dict[Hashable, list[Future]]) -> None:
+        keys = list(waiters)
+        log.info("[%s] one build for %d upload(s): %s", self.name, len(keys), keys)
+        try:
+            results = self.run_batch(keys)
+        except Exception as e:
+            log.error("[%s] batch failed: %s", self.name, e)
+            for futs in waiters.values():
+                for fut in futs:
+                    fut.set_exception(e)
+            return
+
+        for key, futs in waiters.items():
+            _resolve(futs, results.get(key))
+
+
+def _resolve(futs: list[Future], result: Any) -> None:
+    """Hand `result` to every waiter, or chain them to it when it is still pending."""
+    if not isinstance(result, Future):
+        for fut in futs:
+            fut.set_result(result)
+        return
+
+    def _done(source: Future) -> None:
+        error = CancelledError() if source.cancelled() else source.exception()
+        for fut in futs:
+            if error is not None:
+                fut.set_exception(error)
+            else:
+                fut.set_result(source.result())
+
+    result.add_done_callback(_done)
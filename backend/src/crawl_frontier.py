@@ -0,0 +1,282 @@
+# crawl_frontier.py
+import os
+import re
+import time
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Optional
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+from urllib.robotparser import RobotFileParser
+
+from html_scan import PageOutline, scan_html
+
+log = logging.getLogger("crawl_frontier")
+
+MAX_DEPTH = int(os.getenv("CRAWL_MAX_DEPTH", "1"))
+MAX_PAGES = int(os.getenv("CRAWL_MAX_PAGES", "5"))  # landing page included
+HOST_CONCURRENCY = int(os.getenv("CRAWL_HOST_CONCURRENCY", "2"))
+HOST_DELAY_S = float(os.getenv("CRAWL_HOST_DELAY_S", "0.25"))
+ROBOTS_AGENT = os.getenv("CRAWL_ROBOTS_AGENT", "CoffeeChatBot")
+ROBOTS_TTL_S = float(os.getenv("CRAWL_ROBOTS_TTL_S", "3600"))
+
+_TRACKING_PARAMS = re.compile(r"^(utm_\w+|gclid|fbclid|mc_cid|mc_eid|_ga|_hs\w+)$", re.IGNORECASE)
+_SKIP_EXTENSIONS = re.compile(
+    r"\.(pdf|jpe?g|png|gif|svg|webp|ico|mp4|mov|mp3|zip|gz|docx?|xlsx?|pptx?|css|js|json|xml)$",
+    re.IGNORECASE,
+)
+
+
+# =========================
+# URLs
+# =========================
+def canonicalize(url: str, base: Optional[str] = None) -> Optional[str]:
+    """
+    One spelling per page, for dedup: resolved against `base`, http(s) only,
+    lowercase scheme/host, default port, fragment and tracking parameters dropped,
+    remaining query parameters sorted. None for links we'd never crawl.
+    """
+    url = (url or "").strip()
+    if not url or url.startswith(("#", "mailto:", "tel:", "javascript:", "data:")):
+        return None
+    try:
+        parts = urlsplit(urljoin(base, url) if base else url)
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    if scheme not in ("http", "https") or not parts.hostname:
+        return None
+    host = parts.hostname.lower()
+    if port and port != {"http": 80, "https": 443}[scheme]:
+        host = f"{host}:{port}"
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                             if not _TRACKING_PARAMS.match(k)))
+    return urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+
+def host_of(url: str) -> str:
+    return (urlsplit(url).hostname or "").lower()
+
+
+def site_of(url: str) -> str:
+    """Host without "www.", so example.org and www.example.org are one site."""
+    return host_of(url).removeprefix("www.")
+
+
+def extract_links(html: str, base_url: str, outline: Optional[PageOutline] = None) -> list[str]:
+    """
+    Canonical absolute links of a document, in document order, without repeats.
+    Pass the page's outline if it was already scanned (see html_scan).
+    """
+    outline = outline or scan_html(html, base_url, collect_text=False)
+    links, seen = [], set()
+    for href in outline.links:
+        link = canonicalize(href)
+        if link and link not in seen:
+            seen.add(link)
+            links.append(link)
+    return links
+
+
+# =========================
+# robots.txt
+# =========================
+class RobotsCache:
+    """
+    Parsed robots.txt per host, refreshed after `ttl_s`. A missing robots.txt (4xx)
+    allows everything; so does one we can't fetch, so a flaky host isn't skipped entirely.
+    """
+
+    def __init__(self, agent: str = ROBOTS_AGENT, ttl_s: float = ROBOTS_TTL_S):
+        self.agent = agent
+        self.ttl_s = ttl_s
+        self._rules: dict[str, tuple[float, Optional[RobotFileParser]]] = {}
+
+    async def _rules_for(self, url: str, http) -> Optional[RobotFileParser]:
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        cached = self._rules.get(origin)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        rules = None
+        try:
+            resp = await http.get(origin + "/robots.txt")
+            if resp.status_code < 400:
+                rules = RobotFileParser()
+                rules.parse(resp.text.splitlines())
+            elif resp.status_code in (401, 403):
+                rules = RobotFileParser()
+                rules.disallow_all = True
+        except Exception as e:
+            log.info("[robots] %s/robots.txt unavailable, allowing: %s", origin, e)
+        self._rules[origin] = (time.monotonic() + self.ttl_s, rules)
+        return rules
+
+    async def allowed(self, url: str, http) -> bool:
+        rules = await self._rules_for(url, http)
+        return rules is None or rules.can_fetch(self.agent, url)
+
+    async def crawl_delay(self, url: str, http) -> Optional[float]:
+        rules = await self._rules_for(url, http)
+        delay = rules.crawl_delay(self.agent) if rules is not None else None
+        return float(delay) if delay is not None else None
+
+
+# =========================
+# Per-host politeness
+# =========================
+class _HostGate:
+    def __init__(self, concurrency: int):
+        self.sem = asyncio.Semaphore(concurrency)
+        self.next_at = 0.0
+
+
+class HostPoliteness:
+    """
+    At most `concurrency` requests in flight per host, started at least `delay_s`
+    apart (or the robots.txt Crawl-delay, if longer). Share one instance between
+    crawls on the same event loop so bulk crawls don't stack up on one host.
+    """
+
+    def __init__(self, concurrency: int = HOST_CONCURRENCY, delay_s: float = HOST_DELAY_S):
+        self.concurrency = concurrency
+        self.delay_s = delay_s
+        self._gates: dict[str, _HostGate] = {}
+
+    @asynccontextmanager
+    async def slot(self, url: str, delay_s: Optional[float] = None):
+        gate = self._gates.setdefault(host_of(url), _HostGate(self.concurrency))
+        async with gate.sem:
+            now = time.monotonic()
+            start = max(now, gate.next_at)
+            gate.next_at = start + max(self.delay_s, delay_s or 0.0)
+            if start > now:
+                await asyncio.sleep(start - now)
+            yield
+
+
+# =========================
+# Frontier
+# =========================
+# fetch(url, timeout_s) -> (text, html, final_url)
+PageFetch = Callable[[str, float], Awaitable[tuple[str, str, str]]]
+
+
+class CrawlFrontier:
+    """
+    Breadth-first crawl of one org site: canonical URLs, each fetched once,
+    only on the seed's site, at most `max_depth` links away from it and
+    `max_pages` pages in total (seed included). robots.txt is honored for
+    discovered links when an HTTP client is given.
+    """
+
+    def __init__(self, seed: str, max_depth: int = MAX_DEPTH, max_pages: int = MAX_PAGES,
+                 same_site: bool = True, http=None,
+                 robots: Optional[RobotsCache] = None,
+                 politeness: Optional[HostPoliteness] = None):
+        self.seed = canonicalize(seed) or seed
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.same_site = same_site
+        self.http = http
+        self.robots = robots or (RobotsCache() if http is not None else None)
+        self.politeness = politeness or HostPoliteness()
+        self._site = site_of(self.seed)
+        self._seen: set[str] = set()
+        self._queue: deque = deque()  # (seq, url, depth)
+        self._seq = 0
+        self.issued = 0
+
+    def add(self, url: str, depth: int, base: Optional[str] = None) -> bool:
+        url = canonicalize(url, base)
+        if url is None or url in self._seen or depth > self.max_depth:
+            return False
+        if self.same_site and site_of(url) != self._site:
+            return False
+        if _SKIP_EXTENSIONS.search(urlsplit(url).path):
+            return False
+        self._seen.add(url)
+        self._queue.append((self._seq, url, depth))
+        self._seq += 1
+        return True
+
+    def add_links(self, html: str, base_url: str, depth: int, outline: Optional[PageOutline] = None) -> int:
+        return sum(self.add(link, depth) for link in extract_links(html, base_url, outline))
+
+    def mark_visited(self, *urls: str) -> None:
+        """Record a page fetched outside crawl() (e.g. the landing page) under all its URLs."""
+        self._seen.update(filter(None, (canonicalize(u) for u in urls)))
+        self.issued += 1
+
+    def next(self) -> Optional[tuple[int, str, int]]:
+        if not self._queue or self.issued >= self.max_pages:
+            return None
+        self.issued += 1
+        return self._queue.popleft()
+
+    def pending(self) -> list[str]:
+        return [url for _, url, _ in self._queue]
+
+    async def crawl(self, fetch: PageFetch, concurrency: int = 4,
+                    page_timeout_s: float = 20, budget_s: float = 45) -> list[tuple[str, str]]:
+        """
+        Fetch queued pages with `concurrency` workers (politeness limits still apply
+        per host), following links until depth or page budget runs out. Each page gets
+        `page_timeout_s`; the whole crawl gets `budget_s`. Returns (url, text) in
+        discovery order, so the output doesn't depend on which page loaded first.
+        """
+        deadline = time.monotonic() + budget_s
+        results: dict[int, tuple[str, str]] = {}
+        changed = asyncio.Event()
+        in_flight = 0
+
+        async def _visit(url: str, depth: int) -> Optional[tuple[str, str, str]]:
+            delay = None
+            if self.robots is not None:
+                if not await self.robots.allowed(url, self.http):
+                    log.info("[crawl] %s disallowed by robots.txt", url)
+                    self.issued -= 1  # doesn't count against the page budget
+                    return None
+                delay = await self.robots.crawl_delay(url, self.http)
+            async with self.politeness.slot(url, delay):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError("crawl budget spent")
+                return await asyncio.wait_for(fetch(url, min(page_timeout_s, remaining)), page_timeout_s)
+
+        async def _worker():
+            nonlocal in_flight
+            while True:
+                item = self.next()
+                if item is None:
+                    if in_flight == 0:
+                        return
+                    changed.clear()
+                    await changed.wait()
+                    continue
+                seq, url, depth = item
+                in_flight += 1
+                try:
+                    page = await _visit(url, depth)
+                    if page is not None:
+                        text, html, final_url = page
+                        results[seq] = (url, text)
+                        if depth < self.max_depth:
+                            self.add_links(html, final_url or url, depth + 1)
+                except Exception as e:
+                    log.info("[crawl] failed %s: %r", url, e)
+                finally:
+                    in_flight -= 1
+                    changed.set()
+
+        workers = [asyncio.create_task(_worker()) for _ in range(max(1, concurrency))]
+        _, pending = await asyncio.wait(workers, timeout=budget_s)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        if pending:
+            log.info("[crawl] budget of %ss spent for %s; %d page(s) fetched", budget_s, self.seed, len(results))
+        return [results[seq] for seq in sorted(results)]
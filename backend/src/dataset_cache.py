@@ -0,0 +1,222 @@
+# dataset_cache.py
+import os
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+import pyarrow as pa
+
+import foundry_tables
+from foundry_tables import RESOLVE_TXN, latest_transaction_rid
+
+log = logging.getLogger("dataset_cache")
+
+DEFAULT_CACHE_DIR = os.getenv("FOUNDRY_CACHE_DIR", str(Path.home() / ".cache" / "coffeechat" / "datasets"))
+DEFAULT_MEMORY_BYTES = int(os.getenv("FOUNDRY_CACHE_MEMORY_MB", "256")) * 1024 * 1024
+DEFAULT_DISK_BYTES = int(os.getenv("FOUNDRY_CACHE_DISK_MB", "2048")) * 1024 * 1024
+
+
+class DatasetCache:
+    """
+    Local cache of Foundry output tables keyed by (dataset RID, branch, transaction RID, columns, filters).
+
+    Every read does one Branch lookup; the table is only downloaded again when the
+    branch points at a new transaction. Tables are kept as Arrow in a bounded
+    in-memory LRU, backed by a bounded on-disk LRU of Arrow IPC files so restarts
+    don't start cold.
+    """
+
+    def __init__(self, client, branch_name: str,
+                 cache_dir: str = DEFAULT_CACHE_DIR,
+                 max_memory_bytes: int = DEFAULT_MEMORY_BYTES,
+                 max_disk_bytes: int = DEFAULT_DISK_BYTES):
+        self.client = client
+        self.branch_name = branch_name
+        self.cache_dir = Path(cache_dir)
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._mem: "OrderedDict[tuple, pa.Table]" = OrderedDict()
+        self._mem_bytes = 0
+        self._lock = threading.Lock()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    # ---- public API ----
+    def get_table(self, dataset_rid: str, columns: Optional[list[str]] = None,
+                  filters: Optional[list[tuple]] = None, txn=RESOLVE_TXN) -> pa.Table:
+        """
+        The table at the branch's current transaction. Pass `txn` when the caller
+        already resolved the branch (None reads uncached).
+        """
+        if txn is RESOLVE_TXN:
+            try:
+                txn = latest_transaction_rid(self.client, dataset_rid, self.branch_name)
+            except Exception as e:
+                log.warning("[cache] branch lookup failed for %s, reading uncached: %s", dataset_rid, e)
+                txn = None
+        if not txn:
+            return self._download(dataset_rid, columns, filters)
+
+        key = self._key(dataset_rid, txn, columns, filters)
+        table = self._lookup(key)
+        if table is None:
+            log.info("[cache] miss %s @ %s; downloading", dataset_rid, txn)
+            table = self._download(dataset_rid, columns, filters)
+            self._store(key, table)
+        return table
+
+    async def get_table_async(self, dataset_rid: str, columns: Optional[list[str]] = None,
+                              filters: Optional[list[tuple]] = None, txn=RESOLVE_TXN) -> pa.Table:
+        """
+        get_table on the client's event loop: Foundry calls are awaited on
+        `client.aio` (no worker thread per read); only disk writes go to a thread.
+        """
+        aio = self.client.aio
+        if txn is RESOLVE_TXN:
+            txn = await foundry_tables.latest_transaction_rid_async(aio, dataset_rid, self.branch_name)
+        if not txn:
+            return await self._download_async(dataset_rid, columns, filters)
+
+        key = self._key(dataset_rid, txn, columns, filters)
+        table = self._lookup(key)
+        if table is None:
+            log.info("[cache] miss %s @ %s; downloading", dataset_rid, txn)
+            table = await self._download_async(dataset_rid, columns, filters)
+            await asyncio.to_thread(self._store, key, table)
+        return table
+
+    def get_dataframe(self, dataset_rid: str, columns: Optional[list[str]] = None,
+                      filters: Optional[list[tuple]] = None, txn=RESOLVE_TXN) -> pd.DataFrame:
+        # Fresh DataFrame per call: callers mutate it (see testing.get_output_table)
+        return self.get_table(dataset_rid, columns, filters, txn).to_pandas()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            self._mem_bytes = 0
+        for p in self.cache_dir.glob("*.arrow"):
+            p.unlink(missing_ok=True)
+
+    # ---- internals ----
+    def _key(self, dataset_rid: str, txn: str, columns: Optional[list[str]],
+             filters: Optional[list[tuple]]) -> tuple:
+        return (dataset_rid, self.branch_name, txn,
+                tuple(columns) if columns else None,
+                tuple(tuple(f) for f in filters) if filters else None)
+
+    def _lookup(self, key: tuple) -> Optional[pa.Table]:
+        table = self._get_memory(key)
+        if table is not None:
+            log.info("[cache] memory hit %s @ %s", key[0], key[2])
+            return table
+        table = self._get_disk(key)
+        if table is not None:
+            log.info("[cache] disk hit %s @ %s", key[0], key[2])
+            self._put_memory(key, table)
+        return table
+
+    def _store(self, key: tuple, table: pa.Table) -> None:
+        self._drop_stale(key)
+        self._put_memory(key, table)
+        self._put_disk(key, table)
+
+    def _download(self, dataset_rid: str, columns: Optional[list[str]],
+                  filters: Optional[list[tuple]] = None) -> pa.Table:
+        if filters:
+            return foundry_tables.read_filtered_arrow(self.client, dataset_rid, self.branch_name,
+                                                      columns=columns, filters=filters)
+        return foundry_tables.read_arrow(self.client, dataset_rid, self.branch_name, columns=columns)
+
+    async def _download_async(self, dataset_rid: str, columns: Optional[list[str]],
+                              filters: Optional[list[tuple]] = None) -> pa.Table:
+        if filters:
+            return await foundry_tables.read_filtered_arrow_async(self.client.aio, dataset_rid, self.branch_name,
+                                                                  columns=columns, filters=filters)
+        return await foundry_tables.read_arrow_async(self.client.aio, dataset_rid, self.branch_name, columns=columns)
+
+    def _get_memory(self, key: tuple) -> Optional[pa.Table]:
+        with self._lock:
+            table = self._mem.get(key)
+            if table is not None:
+                self._mem.move_to_end(key)
+            return table
+
+    def _put_memory(self, key: tuple, table: pa.Table) -> None:
+        size = table.nbytes
+        if size > self.max_memory_bytes:
+            return
+        with self._lock:
+            old = self._mem.pop(key, None)
+            if old is not None:
+                self._mem_bytes -= old.nbytes
+            self._mem[key] = table
+            self._mem_bytes += size
+            while self._mem_bytes > self.max_memory_bytes and self._mem:
+                _, evicted = self._mem.popitem(last=False)
+                self._mem_bytes -= evicted.nbytes
+
+    def _drop_stale(self, key: tuple) -> None:
+        """A new transaction supersedes every entry for the same dataset/branch at an older one."""
+        rid, branch, txn = key[:3]
+        with self._lock:
+            for k in [k for k in self._mem if k[0] == rid and k[1] == branch and k[2] != txn]:
+                self._mem_bytes -= self._mem.pop(k).nbytes
+        current = f"{self._hash(txn)}-"
+        for p in self.cache_dir.glob(f"{self._hash((rid, branch))}-*.arrow"):
+            if not p.name.split("-", 1)[1].startswith(current):
+                p.unlink(missing_ok=True)
+
+    @staticmethod
+    def _hash(value) -> str:
+        return hashlib.sha1(repr(value).encode()).hexdigest()[:16]
+
+    def _disk_path(self, key: tuple) -> Path:
+        # <dataset+branch>-<transaction>-<columns+filters>.arrow
+        rid, branch, txn, cols, filters = key
+        return self.cache_dir / f"{self._hash((rid, branch))}-{self._hash(txn)}-{self._hash((cols, filters))}.arrow"
+
+    def _get_disk(self, key: tuple) -> Optional[pa.Table]:
+        path = self._disk_path(key)
+        if not path.exists():
+            return None
+        try:
+            # Memory-mapped, so loading doesn't copy the file into the heap
+            table = pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+            os.utime(path)  # LRU bookkeeping
+            return table
+        except Exception as e:
+            log.warning("[cache] dropping unreadable cache file %s: %s", path, e)
+            path.unlink(missing_ok=True)
+            return None
+
+    def _put_disk(self, key: tuple, table: pa.Table) -> None:
+        path = self._disk_path(key)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            os.replace(tmp, path)
+        except Exception as e:
+            log.warning("[cache] could not write %s: %s", path, e)
+            tmp.unlink(missing_ok=True)
+            return
+        self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        files = []
+        for p in self.cache_dir.glob("*.arrow"):
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            files.append((st.st_mtime, st.st_size, p))
+        total = sum(size for _, size, _ in files)
+        for _, size, p in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            p.unlink(missing_ok=True)
+            total -= size
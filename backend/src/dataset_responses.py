@@ -0,0 +1,95 @@
+# dataset_responses.py
+import io
+import json
+from typing import Iterator, Optional
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+MEDIA_JSON = "application/json"
+MEDIA_NDJSON = "application/x-ndjson"
+MEDIA_ARROW = "application/vnd.apache.arrow.stream"
+
+# Accept values we answer with each format
+_ACCEPT_ALIASES = {
+    MEDIA_NDJSON: MEDIA_NDJSON,
+    "application/jsonl": MEDIA_NDJSON,
+    "application/jsonlines": MEDIA_NDJSON,
+    MEDIA_ARROW: MEDIA_ARROW,
+    "application/vnd.apache.arrow.file": MEDIA_ARROW,
+}
+
+BATCH_ROWS = 1000
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """
+    Pick the response format from an Accept header: NDJSON or Arrow IPC when asked
+    for (highest q first), else plain JSON.
+    """
+    choices = []
+    for i, part in enumerate((accept or "").split(",")):
+        media, *opts = [p.strip() for p in part.split(";")]
+        q = 1.0
+        for opt in opts:
+            if opt.startswith("q="):
+                try:
+                    q = float(opt[2:])
+                except ValueError:
+                    q = 0.0
+        if media.lower() in _ACCEPT_ALIASES and q > 0:
+            choices.append((-q, i, _ACCEPT_ALIASES[media.lower()]))
+    return min(choices)[2] if choices else MEDIA_JSON
+
+
+def _finite_or_null(batch: pa.RecordBatch) -> pa.RecordBatch:
+    # JSON has no inf/NaN: send null, same as server.df_records_json_bytes
+    columns = []
+    for col in batch.columns:
+        if pa.types.is_floating(col.type):
+            col = pc.if_else(pc.is_finite(col), col, pa.scalar(None, col.type))
+        columns.append(col)
+    return pa.RecordBatch.from_arrays(columns, schema=batch.schema)
+
+
+def iter_ndjson(table: pa.Table, batch_rows: int = BATCH_ROWS) -> Iterator[bytes]:
+    """
+    One JSON object per line, produced a batch at a time so memory stays flat
+    no matter how many rows the table has.
+    """
+    for batch in table.to_batches(max_chunksize=batch_rows):
+        rows = _finite_or_null(batch).to_pylist()
+        yield "".join(json.dumps(row, default=str) + "\n" for row in rows).encode()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands back whatever was written since the last take()."""
+
+    def __init__(self):
+        self._parts: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._parts.append(bytes(b))
+        return len(b)
+
+    def take(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def iter_arrow_ipc(table: pa.Table, batch_rows: int = BATCH_ROWS) -> Iterator[bytes]:
+    """
+    Arrow IPC stream format: schema message, then one message per record batch,
+    each sent as soon as it is encoded.
+    """
+    sink = _ChunkSink()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        yield sink.take()
+        for batch in table.to_batches(max_chunksize=batch_rows):
+            writer.write_batch(batch)
+            yield sink.take()
+    yield sink.take()  # end-of-stream marker
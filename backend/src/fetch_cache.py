@@ -0,0 +1,142 @@
+# fetch_cache.py
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Optional
+
+from crawl_frontier import canonicalize
+
+log = logging.getLogger("fetch_cache")
+
+DEFAULT_CACHE_DIR = os.getenv("FETCH_CACHE_DIR", str(Path.home() / ".cache" / "coffeechat" / "fetches"))
+DEFAULT_MAX_BYTES = int(os.getenv("FETCH_CACHE_MB", "512")) * 1024 * 1024
+DEFAULT_TTL_S = float(os.getenv("FETCH_CACHE_TTL_S", str(6 * 3600)))
+
+
+def schema_hash(schema) -> str:
+    """Stable short hash of an extraction schema (or any JSON-able value)."""
+    return hashlib.sha256(json.dumps(schema, sort_keys=True, separators=(",", ":")).encode()).hexdigest()[:16]
+
+
+def validators(headers) -> dict:
+    """The origin's ETag / Last-Modified, for conditional revalidation later."""
+    out = {}
+    for name in ("etag", "last-modified"):
+        value = headers.get(name) if headers is not None else None
+        if value:
+            out[name] = value
+    return out
+
+
+def conditional_headers(entry_validators: dict) -> dict:
+    headers = {}
+    if entry_validators.get("etag"):
+        headers["If-None-Match"] = entry_validators["etag"]
+    if entry_validators.get("last-modified"):
+        headers["If-Modified-Since"] = entry_validators["last-modified"]
+    return headers
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    namespace: str
+    tier: str
+    html: str
+    text: str
+    status: int = 200
+    final_url: str = ""
+    extra: dict = field(default_factory=dict)
+    validators: dict = field(default_factory=dict)
+    fetched_at: float = 0.0  # wall clock, survives restarts
+
+    def age_s(self) -> float:
+        return time.time() - self.fetched_at
+
+
+class FetchCache:
+    """
+    On-disk cache of fetched / scraped pages, one JSON file per entry, named by the
+    hash of (canonical URL, namespace). The namespace separates results that differ
+    for the same page, e.g. Firecrawl runs with different extraction schemas (see
+    schema_hash).
+
+    Entries younger than `ttl_s` are served as-is; older ones are kept so the caller
+    can revalidate them with the stored ETag / Last-Modified instead of refetching.
+    The directory is an LRU bounded by `max_bytes` (file mtime = last use).
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR,
+                 max_bytes: int = DEFAULT_MAX_BYTES,
+                 ttl_s: float = DEFAULT_TTL_S):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def key(self, url: str, namespace: str = "") -> str:
+        return hashlib.sha256(f"{canonicalize(url) or url}\0{namespace}".encode()).hexdigest()
+
+    def fresh(self, entry: CacheEntry) -> bool:
+        return entry.age_s() < self.ttl_s
+
+    def get(self, url: str, namespace: str = "") -> Optional[CacheEntry]:
+        """The stored entry, fresh or stale (check fresh()), or None."""
+        path = self._path(self.key(url, namespace))
+        try:
+            entry = CacheEntry(**json.loads(path.read_text(encoding="utf-8")))
+            os.utime(path)  # LRU bookkeeping
+            return entry
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            log.warning("[fetch-cache] dropping unreadable entry %s: %s", path, e)
+            path.unlink(missing_ok=True)
+            return None
+
+    def put(self, entry: CacheEntry) -> CacheEntry:
+        entry.fetched_at = entry.fetched_at or time.time()
+        path = self._path(self.key(entry.url, entry.namespace))
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            tmp.write_text(json.dumps(asdict(entry)), encoding="utf-8")
+            os.replace(tmp, path)
+        except Exception as e:
+            log.warning("[fetch-cache] could not write %s: %s", path, e)
+            tmp.unlink(missing_ok=True)
+            return entry
+        self._evict()
+        return entry
+
+    def refresh(self, entry: CacheEntry) -> CacheEntry:
+        """Origin says unchanged (304): restart the entry's TTL."""
+        entry.fetched_at = time.time()
+        return self.put(entry)
+
+    def clear(self) -> None:
+        for p in self.cache_dir.glob("*.json"):
+            p.unlink(missing_ok=True)
+
+    # ---- internals ----
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def _evict(self) -> None:
+        files = []
+        for p in self.cache_dir.glob("*.json"):
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            files.append((st.st_mtime, st.st_size, p))
+        total = sum(size for _, size, _ in files)
+        for _, size, p in sorted(files):
+            if total <= self.max_bytes:
+                break
+            p.unlink(missing_ok=True)
+            total -= size
@@ -0,0 +1,180 @@
+# field_extraction.py
+import re
+import heapq
+from dataclasses import dataclass
+from typing import Optional
+
+# Longest stretch we look through after a trigger word for the end of its sentence.
+# Caps the work per match (the old per-field regexes could walk the whole page).
+MAX_SENTENCE_CHARS = 2000
+MAX_TAG_CHARS = 2000
+MAX_EMAIL_PART = 64
+
+# Trigger word -> rule. Matched case-insensitively; overlapping triggers
+# ("our mission" / "mission") are all reported.
+_TRIGGERS = {
+    **dict.fromkeys(("about", "description", "mission", "purpose"), "about"),
+    **dict.fromkeys(("we are", "we're", "our mission", "our purpose"), "we_are"),
+    **dict.fromkeys(("requirements", "qualifications", "eligibility"), "requirements"),
+    **dict.fromkeys(("to apply", "application"), "to_apply"),
+    **dict.fromkeys(("deadline", "due", "apply by"), "deadline"),
+    "<meta": "meta",
+    "@": "at",
+}
+# ASCII-only lowercasing keeps offsets identical to the original text
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+_META_DESCRIPTION = re.compile(
+    r'<meta[^>]*name=["\']description["\'][^>]*content=["\']([^"\']+)["\']', re.IGNORECASE
+)
+_MUST = re.compile(r"must|need|require", re.IGNORECASE)
+_DATE = re.compile(r"\d{1,2}[/-]\d{1,2}[/-]\d{2,4}|\w+ \d{1,2},? \d{4}")
+_EMAIL_LOCAL = re.compile(r"[A-Za-z0-9._%+-]{1," + str(MAX_EMAIL_PART) + r"}\Z")
+_EMAIL_DOMAIN = re.compile(r"[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b")
+_WORD = re.compile(r"\w")
+_TAG = re.compile(r"<[^>]+>")
+_SPACE = re.compile(r"\s+")
+
+_SKIP_EMAILS = ("noreply", "no-reply", "privacy", "legal")
+# (trigger group, sentence capture min, max) -> see _sentence_tail
+_SENTENCE_RULES = {
+    "about": (50, 200),
+    "we_are": (30, 150),
+    "requirements": (20, 200),
+}
+
+
+@dataclass
+class ExtractedFields:
+    description: Optional[str] = None
+    email: Optional[str] = None
+    requirements: Optional[str] = None
+    deadline: Optional[str] = None
+
+
+def _clean(text: str) -> str:
+    return _SPACE.sub(" ", _TAG.sub("", text.strip()))
+
+
+def _sentence_end(content: str, start: int) -> int:
+    return content.find(".", start, start + MAX_SENTENCE_CHARS)
+
+
+def _sentence_tail(content: str, start: int, lo: int, hi: int) -> Optional[str]:
+    """
+    Last `lo`..`hi` chars of the sentence running from `start`, with its period
+    (what `[^.]*?([^.]{lo,hi}\\.)` captured), or None if the sentence is too short.
+    """
+    dot = _sentence_end(content, start)
+    if dot < 0 or dot - start < lo:
+        return None
+    return content[max(start, dot - hi):dot + 1]
+
+
+def _is_word(content: str, i: int) -> bool:
+    return 0 <= i < len(content) and _WORD.match(content, i) is not None
+
+
+def _email_at(content: str, at: int, floor: int = 0) -> Optional[tuple[str, int]]:
+    """
+    The address around the "@" at `at`, as the old re.findall scan would have matched
+    it, and where it ends. `floor` is the end of the previous match: findall resumes
+    there, so the local part can't reach back into it. Parts longer than
+    MAX_EMAIL_PART / 255 chars aren't taken as addresses (the old pattern had no cap).
+    """
+    lo = max(floor, at - MAX_EMAIL_PART)
+    local = _EMAIL_LOCAL.search(content, lo, at)
+    domain = _EMAIL_DOMAIN.match(content, at + 1, at + 1 + 255)
+    if local is None or domain is None:
+        return None
+    start = local.start()
+    if start == lo > floor and _EMAIL_LOCAL.match(content, lo - 1, lo):
+        return None  # local part runs on past the cap
+    # leading \b of the old pattern: the first position in the run at a word boundary
+    while start < at and _is_word(content, start - 1) == _is_word(content, start):
+        start += 1
+    if start == at:
+        return None
+    return content[start:domain.end()], domain.end()
+
+
+def _iter_triggers(content: str):
+    """
+    (position, trigger, rule) for every trigger in `content`, in document order.
+    One lazy str.find cursor per trigger word, merged through a heap: a single
+    left-to-right pass at C speed, and nothing past the point where the caller stops.
+    """
+    low = content.translate(_ASCII_LOWER)
+    heap = []
+    for order, word in enumerate(_TRIGGERS):
+        pos = low.find(word)
+        if pos >= 0:
+            heap.append((pos, order, word))
+    heapq.heapify(heap)
+    while heap:
+        pos, order, word = heap[0]
+        yield pos, word, _TRIGGERS[word]
+        nxt = low.find(word, pos + 1)
+        if nxt >= 0:
+            heapq.heapreplace(heap, (nxt, order, word))
+        else:
+            heapq.heappop(heap)
+
+
+def extract_fields(content: str) -> ExtractedFields:
+    """
+    Description, contact email, requirements and deadline from one scan of `content`.
+
+    Same rules and priorities as the scraper's original per-field regexes, but every
+    trigger word is found in a single pass and each candidate only looks at its own
+    sentence (at most MAX_SENTENCE_CHARS), so the cost is linear in the page size.
+    """
+    first: dict[str, str] = {}  # first match of each rule
+    email = None
+    email_floor = 0  # end of the last address seen, skipped or not
+
+    for start, word, kind in _iter_triggers(content):
+        if kind in first or (kind == "at" and email is not None):
+            continue
+        end = start + len(word)
+
+        if kind in _SENTENCE_RULES:
+            found = _sentence_tail(content, end, *_SENTENCE_RULES[kind])
+        elif kind == "to_apply":
+            dot = _sentence_end(content, end)
+            must = _MUST.search(content, end, dot) if dot >= 0 else None
+            found = _sentence_tail(content, must.end(), 20, 150) if must else None
+        elif kind == "deadline":
+            dot = _sentence_end(content, end)
+            date = _DATE.search(content, end, dot if dot >= 0 else end + MAX_SENTENCE_CHARS)
+            found = date.group(0) if date else None
+        elif kind == "meta":
+            tag = _META_DESCRIPTION.match(content, start, start + MAX_TAG_CHARS)
+            found = tag.group(1) if tag else None
+        else:  # "at"
+            match = _email_at(content, start, email_floor)
+            if match is not None:
+                found, email_floor = match
+                if not any(skip in found.lower() for skip in _SKIP_EMAILS):
+                    email = found
+            continue
+
+        if found is not None:
+            first[kind] = found
+            if (email is not None and {"about", "requirements", "deadline"} <= first.keys()
+                    and len(_clean(first["about"])) > 20):
+                break  # every field has its top-priority candidate
+
+    fields = ExtractedFields(email=email)
+    for kind in ("about", "meta", "we_are"):
+        if kind in first:
+            description = _clean(first[kind])
+            if len(description) > 20:  # Only return if substantial
+                fields.description = description
+                break
+    for kind in ("requirements", "to_apply"):
+        if kind in first:
+            fields.requirements = _clean(first[kind])
+            break
+    if "deadline" in first:
+        fields.deadline = first["deadline"].strip()
+    return fields
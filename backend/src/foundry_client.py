@@ -0,0 +1,405 @@
+# foundry_client.py
+import os
+import asyncio
+import logging
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Iterator, Optional
+from urllib.parse import urlparse
+
+import httpx
+from dotenv import load_dotenv
+
+import uploads
+
+log = logging.getLogger("foundry_client")
+
+try:
+    import h2  # noqa: F401  -- httpx only speaks HTTP/2 when this is installed (httpx[http2])
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# =========================
+# Pool / retry tuning
+# =========================
+MAX_CONNECTIONS = int(os.getenv("FOUNDRY_MAX_CONNECTIONS", "20"))
+MAX_KEEPALIVE = int(os.getenv("FOUNDRY_MAX_KEEPALIVE", "10"))
+KEEPALIVE_EXPIRY_S = float(os.getenv("FOUNDRY_KEEPALIVE_EXPIRY_S", "30"))
+CONNECT_TIMEOUT_S = float(os.getenv("FOUNDRY_CONNECT_TIMEOUT_S", "10"))
+READ_TIMEOUT_S = float(os.getenv("FOUNDRY_READ_TIMEOUT_S", "120"))
+
+# One retry policy for every call: connection failures and 429 are always retried
+# (the request never took effect); 5xx only for idempotent methods, so a flaky
+# builds/create can't start two builds.
+MAX_RETRIES = int(os.getenv("FOUNDRY_MAX_RETRIES", "3"))
+RETRY_BACKOFF_S = 0.5
+RETRY_MAX_SLEEP_S = float(os.getenv("FOUNDRY_RETRY_MAX_SLEEP_S", "30"))  # cap on any server-requested wait
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+
+def normalize_base_url(host: str) -> str:
+    """
+    Accepts values like:
+      - 'arjanssuri.usw-23.palantirfoundry.com'
+      - 'https://arjanssuri.usw-23.palantirfoundry.com/'
+      - 'waypoint-envoy.rubix-system.svc.cluster.local:8443'  (if you're on-network)
+    Returns a clean 'scheme://host[:port]' with no trailing slash.
+    """
+    host = (host or "").strip()
+    if not host:
+        raise RuntimeError("FOUNDRY_HOSTNAME is empty.")
+    if "://" in host:
+        p = urlparse(host)
+        base = f"{p.scheme or 'https'}://{p.netloc or p.path}"
+    else:
+        base = f"https://{host}"
+    return base.rstrip("/")
+
+
+def load_config() -> dict:
+    """
+    FOUNDRY_HOSTNAME, FOUNDRY_TOKEN and optional HTTPS_PROXY from the environment / .env.
+    """
+    load_dotenv()
+    hostname = os.getenv("FOUNDRY_HOSTNAME")
+    token = os.getenv("FOUNDRY_TOKEN")
+    if not hostname or not token:
+        raise RuntimeError("Please set FOUNDRY_HOSTNAME and FOUNDRY_TOKEN in your environment or .env file.")
+    return {
+        "hostname": hostname,
+        "token": token,
+        "proxy": os.getenv("HTTPS_PROXY") or None,
+        "base_url": normalize_base_url(hostname),
+    }
+
+
+class FoundryHTTPError(RuntimeError):
+    def __init__(self, message: str, status_code: int, body: Any = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.body = body
+
+
+def error_details(resp: httpx.Response) -> dict:
+    try:
+        j = resp.json()
+    except Exception:
+        j = {"raw": resp.text}
+    return j if isinstance(j, dict) else {"raw": j}
+
+
+def raise_for_status(resp: httpx.Response, what: str) -> None:
+    if 200 <= resp.status_code < 300:
+        return
+    j = error_details(resp)
+    raise FoundryHTTPError(
+        f"{what} failed [{resp.status_code}] code={j.get('errorCode')} name={j.get('errorName')} "
+        f"id={j.get('errorInstanceId')} body={j}",
+        resp.status_code,
+        j,
+    )
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """
+    Seconds to wait from a Retry-After header, in either form (delta-seconds or an
+    HTTP-date). None when absent or unparseable, so the caller uses its own backoff.
+    """
+    value = (value or "").strip()
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def _list_items(data) -> list:
+    return data if isinstance(data, list) else data.get("data") or data.get("results") or []
+
+
+# =========================
+# Async client
+# =========================
+class AsyncFoundryClient:
+    """
+    Every REST call we make to Foundry, on one pooled httpx.AsyncClient
+    (keep-alive pool, HTTP/2 when h2 is installed, one retry policy).
+    """
+
+    def __init__(self, hostname: str, token: str, proxy: Optional[str] = None,
+                 max_connections: int = MAX_CONNECTIONS,
+                 max_keepalive: int = MAX_KEEPALIVE,
+                 keepalive_expiry_s: float = KEEPALIVE_EXPIRY_S,
+                 max_retries: int = MAX_RETRIES):
+        self.base_url = normalize_base_url(hostname)
+        self.max_retries = max_retries
+        self.http = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers={"Authorization": f"Bearer {token}"},
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive,
+                keepalive_expiry=keepalive_expiry_s,
+            ),
+            timeout=httpx.Timeout(READ_TIMEOUT_S, connect=CONNECT_TIMEOUT_S),
+            http2=HTTP2_AVAILABLE,
+            proxy=proxy,
+        )
+
+    async def aclose(self) -> None:
+        await self.http.aclose()
+
+    # ---- transport ----
+    async def request(self, method: str, path: str, *, body=None, replayable: bool = True,
+                      **kwargs) -> httpx.Response:
+        """
+        Send with the shared retry policy. `body` is a uploads.body_factory result
+        (called once per attempt) for streamed uploads; JSON/params go in kwargs.
+        """
+        method = method.upper()
+        attempts = self.max_retries + 1 if replayable else 1
+        for attempt in range(1, attempts + 1):
+            try:
+                if body is not None:
+                    kwargs["content"] = body()
+                resp = await self.http.request(method, path, **kwargs)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+                # Never reached the server: safe to retry any method
+                if attempt == attempts:
+                    raise
+                log.warning("[foundry] %s %s connect failed (%s); retry %d/%d", method, path, e, attempt, attempts - 1)
+            except httpx.TransportError as e:
+                if attempt == attempts or method not in IDEMPOTENT_METHODS:
+                    raise
+                log.warning("[foundry] %s %s failed (%s); retry %d/%d", method, path, e, attempt, attempts - 1)
+            else:
+                retryable = resp.status_code == 429 or (
+                    resp.status_code in RETRY_STATUSES and method in IDEMPOTENT_METHODS
+                )
+                if not retryable or attempt == attempts:
+                    return resp
+                log.warning("[foundry] %s %s -> %s; retry %d/%d", method, path, resp.status_code, attempt, attempts - 1)
+                retry_after = retry_after_seconds(resp.headers.get("Retry-After"))
+                if retry_after is not None:
+                    await asyncio.sleep(min(retry_after, RETRY_MAX_SLEEP_S))
+                    continue
+            await asyncio.sleep(min(RETRY_BACKOFF_S * (2 ** (attempt - 1)), RETRY_MAX_SLEEP_S))
+        raise AssertionError("unreachable")
+
+    async def get_json(self, path: str, what: str, **kwargs):
+        resp = await self.request("GET", path, **kwargs)
+        raise_for_status(resp, what)
+        return resp.json()
+
+    # ---- uploads ----
+    async def upload_file(self, dataset_rid: str, foundry_file_path: str, source) -> httpx.Response:
+        """
+        POST /api/v1/datasets/{rid}/files:upload, body streamed from `source`
+        (path, open binary file, bytes or generator).
+        """
+        return await self.request(
+            "POST", f"/api/v1/datasets/{dataset_rid}/files:upload",
+            params={"filePath": foundry_file_path},
+            headers=uploads.upload_headers(source),
+            body=uploads.body_factory(source),
+            replayable=uploads.is_replayable(source),
+        )
+
+    async def upload_media_item(self, media_set_rid: str, media_item_path: str, source,
+                                branch_name: Optional[str] = None) -> httpx.Response:
+        """
+        POST /api/v2/mediasets/{rid}/items?mediaItemPath=...&preview=true[&branchName=...]
+        """
+        params = {"mediaItemPath": media_item_path, "preview": "true"}
+        if branch_name:
+            params["branchName"] = branch_name
+        return await self.request(
+            "POST", f"/api/v2/mediasets/{media_set_rid}/items",
+            params=params,
+            headers=uploads.upload_headers(source),
+            body=uploads.body_factory(source),
+            replayable=uploads.is_replayable(source),
+        )
+
+    async def upload_media_items(self, media_set_rid: str, items: list[tuple[str, Any]],
+                                 branch_name: Optional[str] = None,
+                                 limit: int = uploads.UPLOAD_CONCURRENCY) -> list[httpx.Response]:
+        """Many (media_item_path, source) uploads at once, at most `limit` in flight."""
+        return await uploads.gather_limited(
+            (self.upload_media_item(media_set_rid, path, src, branch_name) for path, src in items),
+            limit,
+        )
+
+    # ---- orchestration ----
+    async def create_build(self, body: dict) -> httpx.Response:
+        """Raw builds/create response; callers inspect errors (see main.create_build_manual)."""
+        return await self.request("POST", "/api/v2/orchestration/builds/create", json=body)
+
+    async def get_build(self, build_rid: str) -> dict:
+        return await self.get_json(f"/api/v2/orchestration/builds/{build_rid}", "get build")
+
+    async def run_schedule(self, schedule_rid: str) -> dict:
+        resp = await self.request("POST", f"/api/v2/orchestration/schedules/{schedule_rid}/run")
+        raise_for_status(resp, "run schedule")
+        return resp.json()
+
+    async def list_schedule_runs(self, schedule_rid: str) -> list[dict]:
+        data = await self.get_json(f"/api/v2/orchestration/schedules/{schedule_rid}/runs", "list schedule runs")
+        return data.get("data", [])
+
+    async def list_dataset_jobs(self, dataset_rid: str, branch_name: str, limit: int = 50) -> list[dict]:
+        data = await self.get_json(
+            f"/api/v2/datasets/{dataset_rid}/jobs", "list jobs",
+            params={"branchName": branch_name, "orderBy": "CREATED_DESC", "limit": limit},
+        )
+        return _list_items(data)
+
+    # ---- datasets ----
+    async def get_branch(self, dataset_rid: str, branch_name: str) -> dict:
+        return await self.get_json(f"/api/v2/datasets/{dataset_rid}/branches/{branch_name}", "get branch")
+
+    @asynccontextmanager
+    async def stream_table(self, dataset_rid: str, branch_name: str, format: str = "ARROW",
+                           columns: Optional[list[str]] = None, row_limit: Optional[int] = None):
+        """
+        GET /api/v2/datasets/{rid}/readTable as a stream; yields an async iterator of body chunks.
+        """
+        params = {"format": format, "branchName": branch_name}
+        if columns:
+            params["columns"] = columns
+        if row_limit is not None:
+            params["rowLimit"] = row_limit
+        async with self.http.stream("GET", f"/api/v2/datasets/{dataset_rid}/readTable", params=params) as resp:
+            if resp.status_code >= 300:
+                await resp.aread()
+                raise_for_status(resp, f"readTable {dataset_rid}")
+            yield resp.aiter_bytes()
+
+    # ---- SQL ----
+    async def sql_execute(self, query: str, fallback_branch_ids: Optional[list[str]] = None) -> dict:
+        resp = await self.request("POST", "/api/v2/sqlQueries/execute", json={
+            "query": query,
+            "fallbackBranchIds": fallback_branch_ids or [],
+            "serializationFormat": "ARROW",
+        })
+        raise_for_status(resp, "sql execute")
+        return resp.json()
+
+    async def sql_status(self, query_id: str) -> dict:
+        return await self.get_json(f"/api/v2/sqlQueries/{query_id}/getStatus", "sql status")
+
+    async def sql_results(self, query_id: str) -> bytes:
+        resp = await self.request("GET", f"/api/v2/sqlQueries/{query_id}/getResults")
+        raise_for_status(resp, "sql results")
+        return resp.content
+
+    async def sql_cancel(self, query_id: str) -> None:
+        await self.request("POST", f"/api/v2/sqlQueries/{query_id}/cancel")
+
+
+# =========================
+# Blocking facade
+# =========================
+class FoundryClient:
+    """
+    The shared AsyncFoundryClient plus the event loop it lives on.
+
+    Async code awaits `foundry.aio.<method>(...)` from that loop (the FastAPI server
+    passes its own loop in). Blocking code (main.py, testing.py, worker threads)
+    calls `foundry.<method>(...)`, which runs the coroutine on that loop and waits, so
+    every caller shares one connection pool. With no loop given, a private loop
+    thread is started.
+    """
+
+    def __init__(self, aio: AsyncFoundryClient, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.aio = aio
+        self.base_url = aio.base_url
+        self._thread = None
+        if loop is None:
+            loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=loop.run_forever, name="foundry-client", daemon=True)
+            self._thread.start()
+        self.loop = loop
+
+    def run(self, coro):
+        """Run a coroutine on the client's loop from a blocking caller."""
+        if _running_loop() is self.loop:
+            coro.close()
+            raise RuntimeError("Blocking FoundryClient call made on its own event loop; await foundry.aio instead.")
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def __getattr__(self, name):
+        attr = getattr(self.aio, name)
+        if not asyncio.iscoroutinefunction(attr):
+            return attr
+        return lambda *args, **kwargs: self.run(attr(*args, **kwargs))
+
+    @contextmanager
+    def stream_table(self, dataset_rid: str, branch_name: str, **kwargs) -> Iterator[Iterator[bytes]]:
+        """
+        Blocking view of AsyncFoundryClient.stream_table: yields an iterator of chunks
+        fed from the loop through a small bounded queue (backpressure, bounded memory).
+        """
+        done = object()
+
+        async def _make_queue():
+            return asyncio.Queue(maxsize=8)
+
+        chunks: asyncio.Queue = self.run(_make_queue())
+
+        async def _pump():
+            try:
+                async with self.aio.stream_table(dataset_rid, branch_name, **kwargs) as body:
+                    async for chunk in body:
+                        await chunks.put(chunk)
+            except BaseException as e:
+                await chunks.put(e)
+                return
+            await chunks.put(done)
+
+        pump = asyncio.run_coroutine_threadsafe(_pump(), self.loop)
+
+        def _iter():
+            while True:
+                item = self.run(chunks.get())
+                if item is done:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+
+        try:
+            yield _iter()
+        finally:
+            pump.cancel()
+
+    def close(self) -> None:
+        self.run(self.aio.aclose())
+        if self._thread is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def connect(config: Optional[dict] = None, loop: Optional[asyncio.AbstractEventLoop] = None, **kwargs) -> FoundryClient:
+    """
+    Build the shared client from load_config() (or a given config dict).
+    """
+    config = config or load_config()
+    aio = AsyncFoundryClient(config["hostname"], config["token"], proxy=config.get("proxy"), **kwargs)
+    return FoundryClient(aio, loop=loop)
@@ -0,0 +1,410 @@
+# foundry_tables.py
+import io
+import os
+import time
+import asyncio
+import logging
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Optional, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+log = logging.getLogger("foundry_tables")
+
+
+# =========================
+# Arrow stream decoding
+# =========================
+class _ChunkReader(io.RawIOBase):
+    """
+    Read-only file object over an iterator of byte chunks.
+    pyarrow pulls from it as it decodes, so record batches are built while the
+    response is still arriving and the full body is never buffered.
+    """
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._pending = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        # Fill the whole buffer unless the stream ends: pyarrow treats a short read as EOF
+        view = memoryview(b).cast("B")
+        filled = 0
+        while filled < len(view):
+            if not self._pending:
+                try:
+                    self._pending = memoryview(next(self._chunks)).cast("B")
+                except StopIteration:
+                    break
+                continue
+            n = min(len(view) - filled, len(self._pending))
+            view[filled:filled + n] = self._pending[:n]
+            self._pending = self._pending[n:]
+            filled += n
+        return filled
+
+
+def open_arrow_stream(stream: Union[bytes, bytearray, memoryview, Iterable[bytes]]) -> pa.RecordBatchStreamReader:
+    """
+    Open an Arrow IPC stream from either a complete body (wrapped zero-copy)
+    or an iterable of chunks (decoded incrementally).
+    """
+    if isinstance(stream, (bytes, bytearray, memoryview)):
+        return pa.ipc.open_stream(pa.py_buffer(stream))
+    return pa.ipc.open_stream(_ChunkReader(stream))
+
+
+# =========================
+# Dataset reads
+# =========================
+@contextmanager
+def open_table_stream(client, dataset_rid: str, branch_name: str,
+                      columns: Optional[list[str]] = None,
+                      row_limit: Optional[int] = None) -> Iterator[pa.RecordBatchStreamReader]:
+    """
+    Ask Foundry for a table as Arrow and hand back a batch reader over the response.
+    Streams through the shared foundry_client.FoundryClient when given one; with a
+    bare SDK client, uses its streaming response when present, else the buffered bytes.
+    """
+    if hasattr(client, "stream_table"):
+        with client.stream_table(dataset_rid, branch_name, columns=columns, row_limit=row_limit) as chunks:
+            yield open_arrow_stream(chunks)
+        return
+
+    datasets = client.datasets.Dataset
+    kwargs = dict(format="ARROW", branch_name=branch_name, columns=columns, row_limit=row_limit)
+
+    streaming = getattr(datasets, "with_streaming_response", None)
+    if streaming is not None:
+        with streaming.read_table(dataset_rid, **kwargs) as resp:
+            yield open_arrow_stream(resp.iter_bytes())
+        return
+
+    yield open_arrow_stream(datasets.read_table(dataset_rid, **kwargs))
+
+
+def iter_record_batches(client, dataset_rid: str, branch_name: str,
+                        columns: Optional[list[str]] = None,
+                        row_limit: Optional[int] = None) -> Iterator[pa.RecordBatch]:
+    """
+    Yield record batches of a Foundry table as they are decoded off the wire.
+    """
+    with open_table_stream(client, dataset_rid, branch_name, columns=columns, row_limit=row_limit) as reader:
+        yield from reader
+
+
+def read_arrow(client, dataset_rid: str, branch_name: str,
+               columns: Optional[list[str]] = None,
+               row_limit: Optional[int] = None) -> pa.Table:
+    """
+    Read a Foundry table into a pyarrow Table.
+    """
+    with open_table_stream(client, dataset_rid, branch_name, columns=columns, row_limit=row_limit) as reader:
+        return reader.read_all()
+
+
+def read_dataframe(client, dataset_rid: str, branch_name: str,
+                   columns: Optional[list[str]] = None,
+                   row_limit: Optional[int] = None) -> pd.DataFrame:
+    """
+    Read a Foundry table into pandas by way of Arrow (no CSV round trip).
+    """
+    return read_arrow(client, dataset_rid, branch_name, columns=columns, row_limit=row_limit).to_pandas()
+
+
+# =========================
+# Query pushdown
+# =========================
+# A filter is (column, op, value) with op one of: "eq", "prefix", "suffix", "contains".
+# Filters only narrow what crosses the wire; callers keep their exact (normalizing)
+# match on top, so pushed predicates may be looser than the final filter but never stricter.
+FILTER_OPS = ("eq", "prefix", "suffix", "contains")
+
+SQL_POLL_SECONDS = 0.5
+SQL_TIMEOUT_SECONDS = 120
+
+# Datasets where SQL is unsupported (dataset RID -> retry pushdown after this time.time()).
+# Only capability errors land here; a transient failure just falls back for that one read.
+NO_PUSHDOWN_RETRY_SECONDS = int(os.getenv("FOUNDRY_NO_PUSHDOWN_RETRY_S", "3600"))
+_CAPABILITY_STATUS = (400, 403, 404)
+
+_columns_cache: dict[tuple[str, str, Optional[str]], list[str]] = {}
+_no_pushdown: dict[str, float] = {}
+
+
+def latest_transaction_rid(client, dataset_rid: str, branch_name: str) -> Optional[str]:
+    """
+    Cheap metadata call: the RID of the latest committed transaction on the branch.
+    Returns None if the branch has no transaction yet.
+    """
+    if hasattr(client, "get_branch"):
+        return client.get_branch(dataset_rid, branch_name).get("transactionRid")
+    branch = client.datasets.Dataset.Branch.get(dataset_rid, branch_name)
+    return branch["transactionRid"] if isinstance(branch, dict) else getattr(branch, "transaction_rid", None)
+
+
+# Default for `txn` arguments: look the branch's transaction up (None means uncached)
+RESOLVE_TXN = object()
+
+
+def table_columns(client, dataset_rid: str, branch_name: str, txn=RESOLVE_TXN) -> list[str]:
+    """
+    Column names of a table, fetched once per (dataset, branch, transaction) with a
+    one-row read, so a schema change in a new transaction is picked up. Pass `txn`
+    if the caller already resolved the branch (None: uncached).
+    """
+    if txn is RESOLVE_TXN:
+        txn = _transaction_or_none(lambda: latest_transaction_rid(client, dataset_rid, branch_name), dataset_rid)
+    key = (dataset_rid, branch_name, txn)
+    if txn is None or key not in _columns_cache:
+        with open_table_stream(client, dataset_rid, branch_name, row_limit=1) as reader:
+            return _remember_columns(key, reader.schema.names)
+    return _columns_cache[key]
+
+
+async def table_columns_async(aio, dataset_rid: str, branch_name: str, txn=RESOLVE_TXN) -> list[str]:
+    """table_columns on an AsyncFoundryClient (see foundry_client)."""
+    if txn is RESOLVE_TXN:
+        txn = await latest_transaction_rid_async(aio, dataset_rid, branch_name)
+    key = (dataset_rid, branch_name, txn)
+    if txn is None or key not in _columns_cache:
+        table = await read_arrow_async(aio, dataset_rid, branch_name, row_limit=1)
+        return _remember_columns(key, table.schema.names)
+    return _columns_cache[key]
+
+
+def _remember_columns(key: tuple, names) -> list[str]:
+    columns = list(names)
+    if key[2] is not None:  # a newer transaction replaces the older one's entry
+        for stale in [k for k in _columns_cache if k[:2] == key[:2]]:
+            del _columns_cache[stale]
+        _columns_cache[key] = columns
+    return columns
+
+
+def _transaction_or_none(lookup, dataset_rid: str) -> Optional[str]:
+    try:
+        return lookup()
+    except Exception as e:
+        log.warning("[read] branch lookup failed for %s, reading uncached: %s", dataset_rid, e)
+        return None
+
+
+async def latest_transaction_rid_async(aio, dataset_rid: str, branch_name: str) -> Optional[str]:
+    """latest_transaction_rid on an AsyncFoundryClient; None (uncached reads) if the lookup fails."""
+    try:
+        return (await aio.get_branch(dataset_rid, branch_name)).get("transactionRid")
+    except Exception as e:
+        log.warning("[read] branch lookup failed for %s, reading uncached: %s", dataset_rid, e)
+        return None
+
+
+async def read_arrow_async(aio, dataset_rid: str, branch_name: str,
+                           columns: Optional[list[str]] = None,
+                           row_limit: Optional[int] = None) -> pa.Table:
+    """read_arrow on an AsyncFoundryClient, awaited on its own loop."""
+    async with aio.stream_table(dataset_rid, branch_name, columns=columns, row_limit=row_limit) as body:
+        chunks = [chunk async for chunk in body]
+    return open_arrow_stream(chunks).read_all()
+
+
+def _sql_ident(name: str) -> str:
+    return "`" + name.replace("`", "``") + "`"
+
+
+def _sql_str(value: str) -> str:
+    return "'" + str(value).replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def build_sql(dataset_rid: str, columns: Optional[list[str]], filters: list[tuple],
+              branch_name: Optional[str] = None) -> str:
+    """
+    SELECT for a dataset, on `branch_name` when given (Foundry SQL's `branch`.`rid`
+    qualifier, so the query never falls back to some other branch).
+    """
+    select = ", ".join(_sql_ident(c) for c in columns) if columns else "*"
+    clauses = []
+    for column, op, value in filters:
+        col = f"CAST({_sql_ident(column)} AS STRING)"
+        if op == "eq":
+            clauses.append(f"{col} = {_sql_str(value)}")
+        elif op == "prefix":
+            clauses.append(f"startswith({col}, {_sql_str(value)})")
+        elif op == "suffix":
+            clauses.append(f"endswith({col}, {_sql_str(value)})")
+        elif op == "contains":
+            clauses.append(f"contains({col}, {_sql_str(value)})")
+        else:
+            raise ValueError(f"Unsupported filter op '{op}'; expected one of {FILTER_OPS}")
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    table = _sql_ident(dataset_rid)
+    if branch_name:
+        table = f"{_sql_ident(branch_name)}.{table}"
+    return f"SELECT {select} FROM {table}{where}"
+
+
+def query_arrow(client, dataset_rid: str, branch_name: str,
+                columns: Optional[list[str]] = None,
+                filters: Optional[list[tuple]] = None) -> pa.Table:
+    """
+    Run projection + predicate in Foundry SQL and return the Arrow result.
+    Raises if the tenant has no SQL surface or the query doesn't succeed.
+    """
+    if hasattr(client, "sql_execute"):
+        return _query_arrow_rest(client, dataset_rid, branch_name, columns, filters)
+
+    sql = getattr(client, "sql_queries", None)
+    if sql is None or not hasattr(sql, "SqlQuery"):
+        raise NotImplementedError("No SQL query surface on this client.")
+
+    query = build_sql(dataset_rid, columns, filters or [], branch_name)
+    status = sql.SqlQuery.execute(query=query, serialization_format="ARROW")
+    deadline = time.time() + SQL_TIMEOUT_SECONDS
+    while getattr(status, "type", None) == "running":
+        if time.time() > deadline:
+            sql.SqlQuery.cancel(status.query_id)
+            raise TimeoutError(f"SQL query timed out after {SQL_TIMEOUT_SECONDS}s: {query}")
+        time.sleep(SQL_POLL_SECONDS)
+        status = sql.SqlQuery.get_status(status.query_id)
+
+    if getattr(status, "type", None) != "succeeded":
+        raise RuntimeError(f"SQL query ended {getattr(status, 'type', status)}: "
+                           f"{getattr(status, 'error_message', '')} query={query}")
+    return open_arrow_stream(sql.SqlQuery.get_results(status.query_id)).read_all()
+
+
+def _query_arrow_rest(client, dataset_rid: str, branch_name: str,
+                      columns: Optional[list[str]], filters: Optional[list[tuple]]) -> pa.Table:
+    """query_arrow over the shared FoundryClient's sqlQueries endpoints."""
+    query = build_sql(dataset_rid, columns, filters or [], branch_name)
+    status = client.sql_execute(query)
+    query_id = status.get("queryId")
+    deadline = time.time() + SQL_TIMEOUT_SECONDS
+    while status.get("type") == "running":
+        if time.time() > deadline:
+            client.sql_cancel(query_id)
+            raise TimeoutError(f"SQL query timed out after {SQL_TIMEOUT_SECONDS}s: {query}")
+        time.sleep(SQL_POLL_SECONDS)
+        status = client.sql_status(query_id)
+
+    if status.get("type") != "succeeded":
+        raise RuntimeError(f"SQL query ended {status.get('type', status)}: "
+                           f"{status.get('errorMessage', '')} query={query}")
+    return open_arrow_stream(client.sql_results(query_id)).read_all()
+
+
+async def query_arrow_async(aio, dataset_rid: str, branch_name: str,
+                            columns: Optional[list[str]] = None,
+                            filters: Optional[list[tuple]] = None) -> pa.Table:
+    """query_arrow on an AsyncFoundryClient; polls without holding a thread."""
+    query = build_sql(dataset_rid, columns, filters or [], branch_name)
+    status = await aio.sql_execute(query)
+    query_id = status.get("queryId")
+    deadline = time.time() + SQL_TIMEOUT_SECONDS
+    while status.get("type") == "running":
+        if time.time() > deadline:
+            await aio.sql_cancel(query_id)
+            raise TimeoutError(f"SQL query timed out after {SQL_TIMEOUT_SECONDS}s: {query}")
+        await asyncio.sleep(SQL_POLL_SECONDS)
+        status = await aio.sql_status(query_id)
+
+    if status.get("type") != "succeeded":
+        raise RuntimeError(f"SQL query ended {status.get('type', status)}: "
+                           f"{status.get('errorMessage', '')} query={query}")
+    return open_arrow_stream(await aio.sql_results(query_id)).read_all()
+
+
+def _sql_unsupported(e: Exception) -> bool:
+    """
+    True for errors that mean "no SQL here" (no surface, 400/403/404, SQL disabled)
+    rather than a transient failure (5xx, timeout, dropped connection).
+    """
+    if isinstance(e, NotImplementedError):
+        return True
+    status = getattr(e, "status_code", None)
+    if status in _CAPABILITY_STATUS:
+        return True
+    return "sql not enabled" in str(e).lower()
+
+
+def filter_arrow(table: pa.Table, filters: Optional[list[tuple]]) -> pa.Table:
+    """
+    Local equivalent of the pushed-down predicate.
+    """
+    if not filters:
+        return table
+    mask = None
+    for column, op, value in filters:
+        values = pc.cast(table[column], pa.string())
+        if op == "eq":
+            m = pc.equal(values, value)
+        elif op == "prefix":
+            m = pc.starts_with(values, value)
+        elif op == "suffix":
+            m = pc.ends_with(values, value)
+        elif op == "contains":
+            m = pc.match_substring(values, value)
+        else:
+            raise ValueError(f"Unsupported filter op '{op}'; expected one of {FILTER_OPS}")
+        mask = m if mask is None else pc.and_(mask, m)
+    return table.filter(pc.fill_null(mask, False))
+
+
+def read_filtered_arrow(client, dataset_rid: str, branch_name: str,
+                        columns: Optional[list[str]] = None,
+                        filters: Optional[list[tuple]] = None) -> pa.Table:
+    """
+    Projection + predicate pushed to Foundry SQL when available; otherwise a
+    projected read_table (columns are always pushed) filtered locally.
+    """
+    if _try_pushdown(dataset_rid, filters):
+        try:
+            return query_arrow(client, dataset_rid, branch_name, columns=columns, filters=filters)
+        except Exception as e:
+            _pushdown_failed(dataset_rid, e)
+
+    table = read_arrow(client, dataset_rid, branch_name, columns=_read_columns(columns, filters))
+    return _finish_local(table, columns, filters)
+
+
+async def read_filtered_arrow_async(aio, dataset_rid: str, branch_name: str,
+                                    columns: Optional[list[str]] = None,
+                                    filters: Optional[list[tuple]] = None) -> pa.Table:
+    """read_filtered_arrow on an AsyncFoundryClient."""
+    if _try_pushdown(dataset_rid, filters):
+        try:
+            return await query_arrow_async(aio, dataset_rid, branch_name, columns=columns, filters=filters)
+        except Exception as e:
+            _pushdown_failed(dataset_rid, e)
+
+    table = await read_arrow_async(aio, dataset_rid, branch_name, columns=_read_columns(columns, filters))
+    return _finish_local(table, columns, filters)
+
+
+def _try_pushdown(dataset_rid: str, filters: Optional[list[tuple]]) -> bool:
+    return bool(filters) and _no_pushdown.get(dataset_rid, 0) <= time.time()
+
+
+def _pushdown_failed(dataset_rid: str, e: Exception) -> None:
+    if _sql_unsupported(e):
+        log.warning("[read] SQL pushdown unavailable for %s, filtering locally for %ss: %s",
+                    dataset_rid, NO_PUSHDOWN_RETRY_SECONDS, e)
+        _no_pushdown[dataset_rid] = time.time() + NO_PUSHDOWN_RETRY_SECONDS
+    else:
+        log.warning("[read] SQL pushdown failed for %s, filtering locally this time: %s", dataset_rid, e)
+
+
+def _read_columns(columns: Optional[list[str]], filters: Optional[list[tuple]]) -> Optional[list[str]]:
+    if not columns:
+        return None
+    return list(dict.fromkeys([*columns, *(f[0] for f in filters or [])]))
+
+
+def _finish_local(table: pa.Table, columns: Optional[list[str]], filters: Optional[list[tuple]]) -> pa.Table:
+    table = filter_arrow(table, filters)
+    return table.select(columns) if columns else table
@@ -0,0 +1,146 @@
+# html_scan.py
+import os
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import Iterable, Optional, Union
+from urllib.parse import urldefrag, urljoin
+
+# Caps keep memory bounded however large (or hostile) the page is
+MAX_LINKS = int(os.getenv("HTML_SCAN_MAX_LINKS", "1000"))
+MAX_HEADINGS = 200
+MAX_META = 200
+MAX_FIELD_CHARS = 1000  # one title / heading / meta value
+MAX_TEXT_CHARS = int(os.getenv("HTML_SCAN_MAX_TEXT_CHARS", str(2_000_000)))
+
+_SKIP_TEXT = frozenset(("script", "style", "noscript", "template", "svg"))
+_HEADINGS = frozenset(("h1", "h2", "h3", "h4", "h5", "h6"))
+_NOT_LINKS = ("#", "mailto:", "tel:", "javascript:", "data:")
+
+
+@dataclass
+class PageOutline:
+    title: Optional[str] = None
+    headings: list[tuple[int, str]] = field(default_factory=list)  # (level, text), document order
+    meta: dict[str, str] = field(default_factory=dict)  # name / property / http-equiv -> content
+    links: list[str] = field(default_factory=list)  # absolute, fragment-free, no repeats
+    canonical: Optional[str] = None
+    text: str = ""  # visible-ish text, whitespace collapsed
+
+    def heading(self, level: int) -> Optional[str]:
+        return next((t for lvl, t in self.headings if lvl == level), None)
+
+
+def _squash(parts: list[str], limit: int) -> str:
+    return " ".join("".join(parts).split())[:limit]
+
+
+class HtmlScanner(HTMLParser):
+    """
+    One streaming pass over a document that collects title, headings, meta tags,
+    absolute links and visible text together. feed() it the whole page or chunks
+    as they arrive; close() returns the PageOutline.
+    """
+
+    def __init__(self, base_url: str = "", collect_text: bool = True):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.collect_text = collect_text
+        self.outline = PageOutline()
+        self._seen_links: set[str] = set()
+        self._skip_depth = 0
+        self._in_title = False
+        self._title: list[str] = []
+        self._heading_level = 0
+        self._heading: list[str] = []
+        self._text: list[str] = []
+        self._text_len = 0
+
+    # ---- parser callbacks ----
+    def handle_starttag(self, tag, attrs):
+        self._space()
+        if tag in _SKIP_TEXT:
+            self._skip_depth += 1
+            return
+        if tag == "title" and self.outline.title is None:
+            self._in_title = True
+        elif tag in _HEADINGS:
+            self._heading_level, self._heading = int(tag[1]), []
+        elif tag == "a":
+            self._add_link(dict(attrs).get("href"))
+        elif tag == "meta":
+            self._add_meta(dict(attrs))
+        elif tag == "base":
+            href = dict(attrs).get("href")
+            if href:
+                self.base_url = urljoin(self.base_url, href.strip())
+        elif tag == "link":
+            a = dict(attrs)
+            if "canonical" in (a.get("rel") or "").lower().split() and a.get("href"):
+                self.outline.canonical = urljoin(self.base_url, a["href"].strip())
+
+    def handle_startendtag(self, tag, attrs):
+        # <svg/>, <br/>: nothing to skip until a closing tag
+        if tag in _SKIP_TEXT:
+            self._space()
+            return
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        self._space()
+        if tag in _SKIP_TEXT:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag == "title" and self._in_title:
+            self._in_title = False
+            self.outline.title = _squash(self._title, MAX_FIELD_CHARS)
+        elif tag in _HEADINGS and self._heading_level:
+            text = _squash(self._heading, MAX_FIELD_CHARS)
+            if text and len(self.outline.headings) < MAX_HEADINGS:
+                self.outline.headings.append((self._heading_level, text))
+            self._heading_level, self._heading = 0, []
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        if self._in_title and sum(map(len, self._title)) < MAX_FIELD_CHARS:
+            self._title.append(data)
+        if self._heading_level and sum(map(len, self._heading)) < MAX_FIELD_CHARS:
+            self._heading.append(data)
+        if self.collect_text and self._text_len < MAX_TEXT_CHARS:
+            self._text.append(data)
+            self._text_len += len(data)
+
+    # ---- helpers ----
+    def _space(self):
+        # tags separate words, as the old tag-stripping regex did
+        if self.collect_text and self._text and self._text[-1] != " ":
+            self._text.append(" ")
+
+    def _add_link(self, href: Optional[str]):
+        href = (href or "").strip()
+        if not href or href.lower().startswith(_NOT_LINKS) or len(self.outline.links) >= MAX_LINKS:
+            return
+        url = urldefrag(urljoin(self.base_url, href))[0]
+        if url not in self._seen_links:
+            self._seen_links.add(url)
+            self.outline.links.append(url)
+
+    def _add_meta(self, attrs: dict):
+        key = attrs.get("name") or attrs.get("property") or attrs.get("http-equiv")
+        content = attrs.get("content")
+        if key and content is not None and len(self.outline.meta) < MAX_META:
+            self.outline.meta.setdefault(key.strip().lower(), content.strip()[:MAX_FIELD_CHARS])
+
+    def close(self) -> PageOutline:
+        super().close()
+        if self._in_title:  # unterminated <title>
+            self.outline.title = _squash(self._title, MAX_FIELD_CHARS)
+        self.outline.text = _squash(self._text, MAX_TEXT_CHARS)
+        return self.outline
+
+
+def scan_html(html: Union[str, Iterable[str]], base_url: str = "", collect_text: bool = True) -> PageOutline:
+    """Outline of a document given as one string or as an iterable of chunks."""
+    scanner = HtmlScanner(base_url, collect_text)
+    for chunk in ([html] if isinstance(html, str) else html):
+        scanner.feed(chunk)
+    return scanner.close()
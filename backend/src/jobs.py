@@ -0,0 +1,112 @@
+# jobs.py
+import os
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+log = logging.getLogger("jobs")
+
+DEFAULT_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+DEFAULT_MAX_PENDING = int(os.getenv("JOB_MAX_PENDING", "100"))
+DEFAULT_HISTORY = int(os.getenv("JOB_HISTORY", "500"))
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+
+class QueueFull(RuntimeError):
+    pass
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    params: dict
+    status: str = QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Any = None
+    error: Optional[str] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+
+class JobQueue:
+    """
+    In-process background jobs for slow endpoint work (scrape + upload).
+
+    submit() returns a Job right away; at most `workers` jobs run at once on the
+    queue's own threads (not the server's request threadpool), and at most
+    `max_pending` may be queued or running before submit() raises QueueFull.
+    The last `history` finished jobs stay queryable.
+    """
+
+    def __init__(self, workers: int = DEFAULT_WORKERS,
+                 max_pending: int = DEFAULT_MAX_PENDING,
+                 history: int = DEFAULT_HISTORY,
+                 name: str = "jobs"):
+        self.max_pending = max_pending
+        self.history = history
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, fn: Callable[..., Any], **params) -> Job:
+        job = Job(id=uuid.uuid4().hex, kind=kind, params=params)
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise QueueFull(f"{self._pending} jobs already pending")
+            self._pending += 1
+            self._jobs[job.id] = job
+        self._pool.submit(self._run, job, fn)
+        log.info("[jobs] queued %s %s %s", job.kind, job.id, params)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def shutdown(self, wait: bool = False) -> None:
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+    def _run(self, job: Job, fn: Callable[..., Any]) -> None:
+        job.status, job.started_at = RUNNING, time.time()
+        try:
+            job.result = fn(**job.params)
+            job.status = SUCCEEDED
+        except Exception as e:
+            log.error("[jobs] %s %s failed: %s", job.kind, job.id, e)
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._pending -= 1
+                self._trim()
+        log.info("[jobs] %s %s %s in %.1fs", job.kind, job.id, job.status, job.finished_at - job.started_at)
+
+    def _trim(self) -> None:
+        finished = [j.id for j in self._jobs.values() if j.done]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self._jobs[job_id]
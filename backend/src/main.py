@@ -1,18 +1,25 @@
 # main.py
 import os
-import io
 import time
+import asyncio
 import pathlib
 import logging
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3 import Retry
+import re
 from typing import Optional, Dict, Any
 
-from dotenv import load_dotenv
 import pandas as pd
 import foundry_sdk
-import subprocess
+import scrape_workers
+
+import foundry_client
+from foundry_client import FoundryHTTPError
+import foundry_tables
+from dataset_cache import DatasetCache
+import polling
+from build_coalescer import BuildCoalescer
+from payload_variants import VariantCache
+from ttl_cache import StaleWhileRevalidateCache
+import uploads
 
 # =========================
 # Config / Environment
@@ -35,63 +42,15 @@ EVENT_JOB_RID = os.getenv("EVENT_JOB_RID")
 PIPELINE_RID = "ri.eddie.main.pipeline.022569bf-ebb4-4e92-bb92-9f5f9bc526cf"
 
 # .env (FOUNDRY_HOSTNAME, FOUNDRY_TOKEN, optional HTTPS_PROXY)
-load_dotenv()
-FOUNDRY_HOSTNAME = os.getenv("FOUNDRY_HOSTNAME")  # e.g. "waypoint-envoy.rubix-system.svc.cluster.local:8443"
-FOUNDRY_TOKEN    = os.getenv("FOUNDRY_TOKEN")
-HTTPS_PROXY      = os.getenv("HTTPS_PROXY", None)  # optional
-
-if not FOUNDRY_HOSTNAME or not FOUNDRY_TOKEN:
-    raise RuntimeError("Please set FOUNDRY_HOSTNAME and FOUNDRY_TOKEN in your environment or .env file.")
-
-
-
-
-from urllib.parse import urlparse
-
-def normalize_base_url(host: str) -> str:
-    """
-    Accepts values like:
-      - 'arjanssuri.usw-23.palantirfoundry.com'
-      - 'https://arjanssuri.usw-23.palantirfoundry.com'
-      - 'https://arjanssuri.usw-23.palantirfoundry.com/'
-      - 'waypoint-envoy.rubix-system.svc.cluster.local:8443'  (if you're on-network)
-    Returns a clean 'scheme://host[:port]' with no trailing slash.
-    """
-    host = (host or "").strip()
-    if not host:
-        raise RuntimeError("FOUNDRY_HOSTNAME is empty.")
-    if "://" in host:
-        p = urlparse(host)
-        base = f"{p.scheme or 'https'}://{p.netloc or p.path}"
-    else:
-        base = f"https://{host}"
-    return base.rstrip("/")
-
-BASE_URL = normalize_base_url(FOUNDRY_HOSTNAME)
-
-
-
-
-import re
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+config = foundry_client.load_config()
+FOUNDRY_HOSTNAME = config["hostname"]  # e.g. "waypoint-envoy.rubix-system.svc.cluster.local:8443"
+FOUNDRY_TOKEN    = config["token"]
+HTTPS_PROXY      = config["proxy"]  # optional
+BASE_URL         = config["base_url"]
 
 # Optional: schedule to trigger after upload (copy from Foundry UI -> Build schedules)
 SCHEDULE_RID = os.getenv("FOUNDRY_SCHEDULE_RID")  # e.g. "ri.scheduler.main.schedule.xxxxx"
 
-# Build a clean hostname for REST calls (no scheme)
-HOST = re.sub(r"^https?://", "", (FOUNDRY_HOSTNAME or "").strip("/"))
-
-# Requests session with retries
-retry = Retry(total=10, connect=3, read=3, backoff_factor=0.6, status_forcelist=(429, 500, 502, 503, 504))
-http = requests.Session()
-http.mount("https://", HTTPAdapter(max_retries=retry))
-HEADERS_JSON  = {"Authorization": f"Bearer {FOUNDRY_TOKEN}", "Content-Type": "application/json"}
-HEADERS_OCTET = {"Authorization": f"Bearer {FOUNDRY_TOKEN}", "Content-Type": "application/octet-stream"}
-PROXIES = {}  # set if your network requires it, else leave empty
-
-
 
 # =========================
 # Logging (like the docs)
@@ -104,35 +63,30 @@ logging.basicConfig(
 log = logging.getLogger("main")
 
 # =========================
-# HTTP session (docs pattern)
+# Foundry clients
 # =========================
-retry = Retry(connect=1, backoff_factor=0.5)
-adapter = HTTPAdapter(max_retries=retry)
-http = requests.Session()
-http.mount("https://", adapter)
-
-HEADERS_OCTET = {
-    "Authorization": f"Bearer {FOUNDRY_TOKEN}",
-    "Content-type": "application/octet-stream",  # IMPORTANT
-}
-PROXIES = {"https": HTTPS_PROXY} if HTTPS_PROXY else None
+# Every REST call (uploads, builds, schedules, jobs, table reads, SQL) shares one
+# keep-alive connection pool. Blocking callers use it directly; async callers
+# await foundry.aio. server.py binds it to its own event loop via connect(loop=...).
+foundry = foundry_client.connect(config)
 
-# =========================
-# Foundry SDK client (for pipeline + reads)
-# =========================
+# Foundry SDK client, kept only for the pipeline-run surfaces (trigger_pipeline_and_wait)
 client = foundry_sdk.FoundryClient(
     auth=foundry_sdk.UserTokenAuth(FOUNDRY_TOKEN),
     hostname=FOUNDRY_HOSTNAME,
 )
 
-# ===== One-off Build (no schedules) =====
-ORCH_HEADERS_JSON = {
-    "Authorization": f"Bearer {FOUNDRY_TOKEN}",
-    "Content-Type": "application/json",
-}
+# Output tables are re-read only when their branch moves to a new transaction
+dataset_cache = DatasetCache(foundry, BRANCH_NAME)
 
+# Learns how long builds / pipeline runs / output refreshes take and paces polling to match
+poll_scheduler = polling.shared_scheduler()
 
+# Which builds/create payload shape this tenant accepts (see create_build_manual)
+payload_variants = VariantCache()
 
+
+# ===== One-off Build (no schedules) =====
 def create_build_manual(target_rids: list[str],
                         branch_name: str = BRANCH_NAME,
                         force_build: bool = True,
@@ -140,9 +94,10 @@ def create_build_manual(target_rids: list[str],
                         retry_backoff_seconds: int = 30) -> str:
     """
     Try multiple 'builds/create' payload shapes to accommodate tenant differences.
-    Returns build RID on success, raises HTTPError on failure after all variants.
+    The shape the tenant accepted last time goes first (and usually alone); it is
+    only renegotiated when the tenant starts rejecting it.
+    Returns build RID on success, raises FoundryHTTPError on failure after all variants.
     """
-    url = f"{BASE_URL}/api/v2/orchestration/builds/create"
 
     common = {
         "branchName": branch_name,
@@ -152,29 +107,32 @@ def create_build_manual(target_rids: list[str],
         "abortOnFailure": False,
     }
 
-    payload_variants = [
+    variants = {
         # Variant A: manual + fallbackBranches (most common)
-        {
+        "manual": {
             **common,
             "fallbackBranches": [branch_name],
             "target": {"type": "manual", "targetRids": target_rids},
         },
         # Variant B: manual, no fallbackBranches (some tenants reject fallback)
-        {
+        "manual-no-fallback": {
             **{k: v for k, v in common.items() if k != "retryBackoffDuration"},  # a few tenants reject this field
             "target": {"type": "manual", "targetRids": target_rids},
         },
         # Variant C: datasets payload (some tenants prefer this shape)
-        {
+        "datasets": {
             **{k: v for k, v in common.items() if k != "retryBackoffDuration"},
             "target": {"type": "datasets", "datasetRids": target_rids},
         },
-    ]
+    }
 
+    endpoint = "builds/create"
+    remembered = payload_variants.winner(BASE_URL, endpoint)
     last_err = None
-    for i, body in enumerate(payload_variants, start=1):
-        log.info("[build] create attempt %d -> %s  body=%s", i, url, body)
-        resp = http.post(url, headers=ORCH_HEADERS_JSON, json=body, proxies=PROXIES)
+    for i, name in enumerate(payload_variants.order(BASE_URL, endpoint, list(variants)), start=1):
+        body = variants[name]
+        log.info("[build] create attempt %d (%s)  body=%s", i, name, body)
+        resp = foundry.create_build(body)
         if 200 <= resp.status_code < 300:
             data = resp.json()
             build_rid = data.get("rid")
@@ -182,21 +140,24 @@ def create_build_manual(target_rids: list[str],
                 log.error("[build] create returned no RID: %s", data)
                 last_err = RuntimeError("Create Build returned no RID")
                 continue
-            log.info("[build] started build_rid=%s for targets=%s (variant %d)", build_rid, target_rids, i)
+            log.info("[build] started build_rid=%s for targets=%s (variant %s)", build_rid, target_rids, name)
+            payload_variants.remember(BASE_URL, endpoint, name)
             return build_rid
 
+        if name == remembered and resp.status_code in (400, 404, 422):
+            # The tenant no longer accepts the shape we learned; negotiate from scratch
+            payload_variants.forget(BASE_URL, endpoint)
+
         # capture useful error info
-        try:
-            j = resp.json()
-        except Exception:
-            j = {"raw": resp.text}
+        j = foundry_client.error_details(resp)
         err_code = j.get("errorCode")
         err_name = j.get("errorName")
         err_id   = j.get("errorInstanceId")
-        log.error("[build] create variant %d failed [%s] code=%s name=%s id=%s body=%s",
-                  i, resp.status_code, err_code, err_name, err_id, j)
-        last_err = requests.HTTPError(
-            f"builds/create failed {resp.status_code}: {err_name or ''} ({err_code or ''}) id={err_id or ''}"
+        log.error("[build] create variant %s failed [%s] code=%s name=%s id=%s body=%s",
+                  name, resp.status_code, err_code, err_name, err_id, j)
+        last_err = FoundryHTTPError(
+            f"builds/create failed {resp.status_code}: {err_name or ''} ({err_code or ''}) id={err_id or ''}",
+            resp.status_code, j,
         )
 
     # If we got here, all variants failed
@@ -207,13 +168,8 @@ def probe_event_jobs_rest():
     REST probe: list jobs that build EVENT on BRANCH_NAME.
     Helps verify EVENT is a build target on this branch.
     """
-    url = f"{BASE_URL}/api/v2/datasets/{EVENT_DATASET_RID}/jobs"
-    params = {"branchName": BRANCH_NAME, "orderBy": "CREATED_DESC", "limit": 25}
     try:
-        r = http.get(url, headers={"Authorization": f"Bearer {FOUNDRY_TOKEN}"}, params=params, proxies=PROXIES)
-        r.raise_for_status()
-        data = r.json()
-        jobs = data if isinstance(data, list) else data.get("data") or data.get("results") or []
+        jobs = foundry.list_dataset_jobs(EVENT_DATASET_RID, BRANCH_NAME, limit=25)
         log.info("[probe] jobs (REST) for EVENT on '%s': count=%d", BRANCH_NAME, len(jobs))
         for j in jobs[:5]:
             rid = j.get("rid") or j.get("jobRid")
@@ -226,12 +182,7 @@ def probe_event_jobs_rest():
 
 
 def get_event_job_rids_rest(dataset_rid: str = EVENT_DATASET_RID, branch_name: str = BRANCH_NAME) -> list[str]:
-    url = f"{BASE_URL}/api/v2/datasets/{dataset_rid}/jobs"
-    params = {"branchName": branch_name, "orderBy": "CREATED_DESC", "limit": 50}
-    r = http.get(url, headers={"Authorization": f"Bearer {FOUNDRY_TOKEN}"}, params=params, proxies=PROXIES)
-    r.raise_for_status()
-    data = r.json()
-    items = data if isinstance(data, list) else data.get("data") or data.get("results") or []
+    items = foundry.list_dataset_jobs(dataset_rid, branch_name, limit=50)
     rids: list[str] = []
     for j in items:
         rid = j.get("rid") or j.get("jobRid")
@@ -240,6 +191,23 @@ def get_event_job_rids_rest(dataset_rid: str = EVENT_DATASET_RID, branch_name: s
     return rids
 
 
+# The jobs that build a dataset almost never change: serve discovery from memory
+# (TTL, then stale-while-revalidate) instead of listing jobs on every image
+job_rid_cache = StaleWhileRevalidateCache(lambda key: get_event_job_rids_rest(*key), name="job-rids")
+
+def cached_job_rids(dataset_rid: str = EVENT_DATASET_RID, branch_name: str = BRANCH_NAME) -> list[str]:
+    return list(job_rid_cache.get((dataset_rid, branch_name)))
+
+def warm_job_rids() -> None:
+    """
+    Start EVENT job discovery in the background (no-op with EVENT_JOB_RID set). The
+    image paths call this before uploading so discovery overlaps the upload; nothing
+    touches Foundry at import time.
+    """
+    if not EVENT_JOB_RID:
+        job_rid_cache.warm([(EVENT_DATASET_RID, BRANCH_NAME)])
+
+
 def create_build_for_jobs(job_rids: list[str],
                           branch_name: str = BRANCH_NAME,
                           force_build: bool = True,
@@ -249,7 +217,6 @@ def create_build_for_jobs(job_rids: list[str],
     Create a one-off build by targeting orchestration jobs directly.
     Your tenant requires 'fallbackBranches'.
     """
-    url = f"{BASE_URL}/api/v2/orchestration/builds/create"
     body = {
         "branchName": branch_name,
         "fallbackBranches": [branch_name],
@@ -259,17 +226,14 @@ def create_build_for_jobs(job_rids: list[str],
         "abortOnFailure": False,
         "target": {"type": "jobs", "jobRids": job_rids},
     }
-    log.info("[build] create(jobs) -> %s body=%s", url, body)
-    resp = http.post(url, headers=ORCH_HEADERS_JSON, json=body, proxies=PROXIES)
+    log.info("[build] create(jobs) body=%s", body)
+    resp = foundry.create_build(body)
 
-    if not (200 <= resp.status_code < 300):
-        try:
-            j = resp.json()
-        except Exception:
-            j = {"raw": resp.text}
-        err = f"[build] create(jobs) failed [{resp.status_code}] code={j.get('errorCode')} name={j.get('errorName')} id={j.get('errorInstanceId')} body={j}"
-        log.error(err)
-        raise requests.HTTPError(err)
+    try:
+        foundry_client.raise_for_status(resp, "[build] create(jobs)")
+    except FoundryHTTPError as e:
+        log.error(str(e))
+        raise
 
     data = resp.json()
     build_rid = data.get("rid")
@@ -279,68 +243,64 @@ def create_build_for_jobs(job_rids: list[str],
     return build_rid
 
 
-def wait_for_build(build_rid: str, poll_seconds: int = 5, timeout_seconds: int = 1800) -> None:
+def wait_for_build(build_rid: str, poll_seconds: int = 5, timeout_seconds: int = 1800,
+                   eta_key: str = "build") -> None:
     """
     Poll the build until it reaches a terminal state. Raises if FAILED or CANCELED.
+    Sleeps per the learned duration for `eta_key` (see polling.PollScheduler), with
+    poll_seconds as the shortest interval.
     """
-    url = f"{BASE_URL}/api/v2/orchestration/builds/{build_rid}"
-    start = time.time()
+    timer = poll_scheduler.start(eta_key, min_s=poll_seconds)
     while True:
-        r = http.get(url, headers={"Authorization": f"Bearer {FOUNDRY_TOKEN}"}, proxies=PROXIES)
-        r.raise_for_status()
-        status = r.json().get("status")
-        log.info("[build] %s status=%s", build_rid, status)
+        status = foundry.get_build(build_rid).get("status")
+        log.info("[build] %s status=%s eta=%s", build_rid, status, timer.eta())
         if status in ("SUCCEEDED", "FAILED", "CANCELED"):
             if status != "SUCCEEDED":
+                timer.abandon()
                 raise RuntimeError(f"Build {build_rid} ended {status}")
+            timer.finish()
             return
-        if time.time() - start > timeout_seconds:
+        remaining = timeout_seconds - timer.elapsed()
+        if remaining <= 0:
+            timer.abandon()
             raise TimeoutError(f"Build {build_rid} timed out after {timeout_seconds}s")
-        time.sleep(poll_seconds)
+        time.sleep(min(timer.next_delay(), remaining))
 
 
 # =========================
 # Utilities
 # =========================
-def run_scraper(script_path: str, working_dir: Optional[str] = None) -> pathlib.Path:
+def run_scraper(url: str, out_dir: Optional[str] = None) -> tuple[str, str]:
     """
-    Runs your scraper that writes 'scraped_results.txt'.
-    If working_dir is None, runs in script folder so output lands there.
+    Scrapes `url` in-process on the shared scraper pool (see scrape_workers).
+    Returns (file name, text); the name is unique per run. The text is also
+    written under out_dir / SCRAPE_OUTPUT_DIR when one is set.
     """
-    script = pathlib.Path(script_path).resolve()
-    if not script.exists():
-        raise FileNotFoundError(f"Scraper not found: {script}")
-    cwd = pathlib.Path(working_dir).resolve() if working_dir else script.parent
-
     log.info("Running scraper…")
-    res = subprocess.run(["python", script.name], cwd=str(cwd), capture_output=True, text=True)
-    if res.returncode != 0:
-        log.error(res.stdout)
-        log.error(res.stderr)
-        raise RuntimeError("Scraper failed.")
-    out = cwd / "scraped_results.txt"
-    
-    if not out.exists():
-        raise FileNotFoundError("scraped_results.txt was not created by scraper.")
+    text = scrape_workers.shared_scrapers().scrape(url)
+    name = scrape_workers.output_name(url)
+    if out_dir or scrape_workers.SCRAPE_OUTPUT_DIR:
+        scrape_workers.write_output(text, name, out_dir)
     log.info("Scraper complete.")
-    return out
+    return name, text
 
 from pathlib import Path
 
 def upload_file_one_call(dataset_rid: str, foundry_file_path: str, local_path) -> None:
+    """
+    Upload to a filesystem dataset. `local_path` may be a path, bytes, an open binary file or
+    a generator of bytes; the body is streamed, never read into memory whole.
+    """
     if not dataset_rid.startswith("ri.foundry.main.dataset."):
         raise ValueError(
             f"upload_file_one_call expects a filesystem dataset RID; got '{dataset_rid}'. "
             f"Use upload_media_item_one_call for media sets."
         )
-    url = f"{BASE_URL}/api/v1/datasets/{dataset_rid}/files:upload"
-    params = {"filePath": foundry_file_path}
-    data = Path(local_path).read_bytes()
     log.info(f"Uploading to {dataset_rid}:{foundry_file_path}")
-    resp = http.post(url, params=params, data=data, headers=HEADERS_OCTET, proxies=PROXIES)
+    resp = foundry.upload_file(dataset_rid, foundry_file_path, local_path)
     if resp.status_code != 200:
         raise RuntimeError(
-            f"Upload failed [{resp.status_code}] {resp.text}\nURL={url}\nParams={params}\nLocalPath={local_path}"
+            f"Upload failed [{resp.status_code}] {resp.text}\nURL={resp.request.url}\nLocalPath={uploads.source_name(local_path)}"
         )
     log.info("Upload complete [200].")
 
@@ -393,33 +353,18 @@ def _extract_media_item_rid(resp) -> str | None:
     return None
 
 
-def upload_media_item_one_call(media_set_rid: str, media_item_path: str, local_path) -> str:
-    """
-    Upload to a Media Set and return the created media item RID.
-    POST {BASE_URL}/api/v2/mediasets/{mediaSetRid}/items
-         ?mediaItemPath=...&preview=true[&branchName=...]
-    Body: raw bytes, Content-Type: application/octet-stream
-    """
-    lp = Path(local_path) if not isinstance(local_path, Path) else local_path
-    if not lp.exists():
+def _check_local_path(local_path):
+    lp = Path(local_path) if isinstance(local_path, str) else local_path
+    if isinstance(lp, Path) and not lp.exists():
         raise FileNotFoundError(f"Local file not found: {lp}")
+    return lp
 
-    url = f"{BASE_URL}/api/v2/mediasets/{media_set_rid}/items"
-    params = {
-        "mediaItemPath": media_item_path,
-        "preview": "true",
-        # If your media set doesn't use branches, comment this out:
-        "branchName": BRANCH_NAME,
-    }
-    data = lp.read_bytes()
-
-    log.info(f"Uploading media item to {media_set_rid}:{media_item_path}")
-    resp = http.post(url, params=params, data=data, headers=HEADERS_OCTET, proxies=PROXIES)
 
+def _media_item_rid_from(resp, local_path) -> str:
     if not (200 <= resp.status_code < 300):
         raise RuntimeError(
             f"Media upload failed [{resp.status_code}] {resp.text}\n"
-            f"URL={url}\nParams={params}\nLocalPath={lp}"
+            f"URL={resp.request.url}\nLocalPath={uploads.source_name(local_path)}"
         )
 
     rid = _extract_media_item_rid(resp)
@@ -432,14 +377,31 @@ def upload_media_item_one_call(media_set_rid: str, media_item_path: str, local_p
         log.info(f"Media upload complete [{resp.status_code}] — media_item_rid={rid}")
     return rid
 
-def run_schedule(schedule_rid: str) -> str:
-    url = f"{BASE_URL}/api/v2/orchestration/schedules/{schedule_rid}/run"
-    resp = http.post(url, headers={"Authorization": f"Bearer {FOUNDRY_TOKEN}"}, proxies=PROXIES)
-    resp.raise_for_status()
-    run = resp.json()
-    run_rid = run.get("rid")
-    log.info(f"[schedule] started run {run_rid} for schedule {schedule_rid}")
-    return run_rid
+
+def upload_media_item_one_call(media_set_rid: str, media_item_path: str, local_path) -> str:
+    """
+    Upload to a Media Set and return the created media item RID.
+    POST {BASE_URL}/api/v2/mediasets/{mediaSetRid}/items
+         ?mediaItemPath=...&preview=true[&branchName=...]
+    Body: raw bytes, Content-Type: application/octet-stream (streamed from `local_path`,
+    which may also be an open binary file or a generator of bytes)
+    """
+    lp = _check_local_path(local_path)
+    log.info(f"Uploading media item to {media_set_rid}:{media_item_path}")
+    # If your media set doesn't use branches, pass branch_name=None
+    resp = foundry.upload_media_item(media_set_rid, media_item_path, lp, branch_name=BRANCH_NAME)
+    return _media_item_rid_from(resp, lp)
+
+def upload_media_items(media_set_rid: str, items: list[tuple[str, Any]],
+                       max_workers: int = uploads.UPLOAD_CONCURRENCY) -> list[Optional[str]]:
+    """
+    Upload many (media_item_path, local_path) pairs in parallel over the shared pool,
+    at most max_workers in flight. Returns media item RIDs in the same order.
+    """
+    items = [(path, _check_local_path(lp)) for path, lp in items]
+    log.info(f"Uploading {len(items)} media item(s) to {media_set_rid}")
+    resps = foundry.upload_media_items(media_set_rid, items, branch_name=BRANCH_NAME, limit=max_workers)
+    return [_media_item_rid_from(resp, lp) for resp, (_, lp) in zip(resps, items)]
 
 def wait_for_media_item_rows(media_item_rid: str, output_dataset_rid: str,
                              timeout_s: int = 900, poll_s: int = 5,
@@ -449,7 +411,6 @@ def wait_for_media_item_rows(media_item_rid: str, output_dataset_rid: str,
     Also prints helpful diagnostics: total rows, columns, and first few non-empty matches if any.
     Optionally triggers a schedule once at the start.
     """
-    start = time.time()
     cand_cols = ("media_item_rid", "mediaItemRid", "MEDIA_ITEM_RID", "mediaitemrid")
 
     if not media_item_rid:
@@ -466,6 +427,7 @@ def wait_for_media_item_rows(media_item_rid: str, output_dataset_rid: str,
         except Exception as e:
             log.warning(f"[wait] Could not trigger schedule: {e}")
 
+    timer = poll_scheduler.start(f"media_rows:{output_dataset_rid}", min_s=poll_s)
     first_columns_logged = False
     while True:
         try:
@@ -488,17 +450,20 @@ def wait_for_media_item_rows(media_item_rid: str, output_dataset_rid: str,
                     log.info("[wait] sample match:\n" + matched.head(3).to_string(index=False))
                 except Exception:
                     pass
+                timer.finish()
                 return matched
 
         except Exception as e:
             log.warning(f"[wait] transient read error: {e}")
 
-        if time.time() - start > timeout_s:
+        remaining = timeout_s - timer.elapsed()
+        if remaining <= 0:
             log.error("[wait] Timed out waiting for rows with this media_item_rid. "
                       "Check that your schedule ran and that the EVENT table includes the 'media_item_rid' column.")
+            timer.abandon()
             return pd.DataFrame()
 
-        time.sleep(poll_s)
+        time.sleep(min(timer.next_delay(), remaining))
 
 
 def run_image_path(local_image_path: str, img_dataset_foundry_folder="incoming"):
@@ -509,6 +474,7 @@ def run_image_path(local_image_path: str, img_dataset_foundry_folder="incoming")
     filename = p.name
     dated_prefix = f"{img_dataset_foundry_folder}/{time.strftime('%Y-%m-%d')}"
     media_item_path = f"{dated_prefix}/{filename}"
+    warm_job_rids()
 
     # (1) Upload to media set → get media_item_rid
     media_item_rid = upload_media_item_one_call(
@@ -517,14 +483,62 @@ def run_image_path(local_image_path: str, img_dataset_foundry_folder="incoming")
         local_path=p,
     )
 
-    # (2) Kick a one-off build targeting the EVENT job(s), not the dataset
-        # (2) Kick a one-off build targeting the EVENT job(s) (via REST), not the dataset
-    job_rids = []
+    # (2)+(3) One EVENT build per batch of uploads (see build_coalescer), then match by media_item_rid
+    matched = image_builds.submit(media_item_rid).result()
+
+    return {
+        "image_filename": filename,
+        "media_item_rid": media_item_rid,
+        "output_rows_for_rid": matched,
+    }
+
+
+def run_image_paths(local_image_paths: list[str], img_dataset_foundry_folder="incoming",
+                    max_workers: int = uploads.UPLOAD_CONCURRENCY) -> list[dict]:
+    """
+    run_image_path for a burst of images: all uploads in parallel, then one EVENT build
+    and one EVENT read for the whole batch, rows matched back to each media_item_rid.
+    Returns one result dict per image, in the order given.
+    """
+    paths = [pathlib.Path(p).resolve() for p in local_image_paths]
+    missing = [str(p) for p in paths if not p.exists()]
+    if missing:
+        raise FileNotFoundError(f"Image(s) not found: {missing}")
+    if not paths:
+        return []
+
+    dated_prefix = f"{img_dataset_foundry_folder}/{time.strftime('%Y-%m-%d')}"
+    warm_job_rids()
+
+    # (1) Upload every image to the media set at once → media_item_rids in the same order
+    media_item_rids = upload_media_items(
+        IMG_INPUT_DATASET_RID,
+        [(f"{dated_prefix}/{p.name}", p) for p in paths],
+        max_workers=max_workers,
+    )
+
+    # (2)+(3) One build + one read for all of them
+    matched = _run_image_batch(list(dict.fromkeys(r for r in media_item_rids if r)))
+
+    return [
+        {
+            "image_filename": p.name,
+            "media_item_rid": rid,
+            "output_rows_for_rid": matched.get(rid) if rid else pd.DataFrame(),
+        }
+        for p, rid in zip(paths, media_item_rids)
+    ]
+
+
+def event_job_rids() -> list[str]:
+    """
+    Orchestration job(s) that build EVENT: EVENT_JOB_RID if set, else REST discovery.
+    """
     if EVENT_JOB_RID:
         job_rids = [EVENT_JOB_RID]
     else:
-        # fall back to REST discovery (will 404 on your tenant / if not target)
-        job_rids = get_event_job_rids_rest(EVENT_DATASET_RID, BRANCH_NAME)
+        # fall back to REST discovery (will 404 on your tenant / if not target), cached
+        job_rids = cached_job_rids(EVENT_DATASET_RID, BRANCH_NAME)
 
     if not job_rids:
         raise RuntimeError(
@@ -533,38 +547,49 @@ def run_image_path(local_image_path: str, img_dataset_foundry_folder="incoming")
             "  2) mark EVENT as a Build Target on the pipeline for branch "
             f"'{BRANCH_NAME}' (Build tab in Foundry UI), then retry."
         )
+    return job_rids
 
-    build_rid = create_build_for_jobs([job_rids[0]], branch_name=BRANCH_NAME)
-    wait_for_build(build_rid)
 
-
-    # (3) Read EVENT and match by media_item_rid
-    img_out = read_tabular(EVENT_DATASET_RID)
+def match_media_rows(img_out: pd.DataFrame, media_item_rid: Optional[str]) -> pd.DataFrame:
+    """
+    EVENT rows produced from one media item.
+    """
+    if not media_item_rid:
+        return img_out.iloc[0:0]
     if "media_item_rid" in img_out.columns:
-        matched = img_out[img_out["media_item_rid"].astype(str) == media_item_rid]
+        return img_out[img_out["media_item_rid"].astype(str) == media_item_rid]
     elif "mediaItemRid" in img_out.columns:
-        matched = img_out[img_out["mediaItemRid"].astype(str) == media_item_rid]
+        return img_out[img_out["mediaItemRid"].astype(str) == media_item_rid]
     elif "media_reference" in img_out.columns:
-        import re as _re
-        matched = img_out[img_out["media_reference"].astype(str).str.contains(_re.escape(media_item_rid), regex=True, na=False)]
-    else:
-        matched = img_out.iloc[0:0]
+        return img_out[img_out["media_reference"].astype(str).str.contains(re.escape(media_item_rid), regex=True, na=False)]
+    return img_out.iloc[0:0]
 
-    return {
-        "image_filename": filename,
-        "media_item_rid": media_item_rid,
-        "output_rows_for_rid": matched,
-    }
+
+def _run_image_batch(media_item_rids: list) -> dict:
+    """
+    One build targeting the EVENT job(s) (via REST), one EVENT read, rows fanned out
+    per media_item_rid. Used by the image BuildCoalescer and by run_image_paths.
+    """
+    job_rids = event_job_rids()
+    build_rid = create_build_for_jobs([job_rids[0]], branch_name=BRANCH_NAME)
+    wait_for_build(build_rid, eta_key=f"build:{job_rids[0]}")
+
+    img_out = read_tabular(EVENT_DATASET_RID)
+    return {rid: match_media_rows(img_out, rid) for rid in media_item_rids}
 
 
+# Coalescer threads start on the first submit(); shutdown() stops them
+image_builds = BuildCoalescer(_run_image_batch, name="event-build")
 
 
 def trigger_pipeline_and_wait(pipeline_rid: str, poll_seconds: int = 5, timeout_seconds: int = 3600) -> str:
     """
     Uses the Foundry SDK to create & monitor a pipeline run (kept from your working flow).
     If your tenant exposes a REST orchestration endpoint you prefer, you can swap it later.
+    Polling is paced by the learned run time for this pipeline (see polling.PollScheduler).
     """
     log.info("Triggering pipeline run…")
+    eta_key = f"pipeline:{pipeline_rid}"
     orch = getattr(client, "orchestration", None)
     if orch and hasattr(orch, "create_run"):
         run = orch.create_run(pipeline_rid=pipeline_rid, branch_name=BRANCH_NAME)
@@ -572,18 +597,22 @@ def trigger_pipeline_and_wait(pipeline_rid: str, poll_seconds: int = 5, timeout_
         if not run_rid:
             raise RuntimeError("create_run returned no run RID.")
 
-        start = time.time()
+        timer = poll_scheduler.start(eta_key, min_s=poll_seconds)
         while True:
             info = orch.get_run(run_rid)
             state = info["state"] if isinstance(info, dict) else getattr(info, "state", None)
             if state in ("SUCCEEDED", "FAILED", "CANCELED"):
                 if state != "SUCCEEDED":
+                    timer.abandon()
                     raise RuntimeError(f"Pipeline run ended with state: {state}")
+                timer.finish()
                 log.info(f"Pipeline SUCCEEDED: {run_rid}")
                 return run_rid
-            if time.time() - start > timeout_seconds:
+            remaining = timeout_seconds - timer.elapsed()
+            if remaining <= 0:
+                timer.abandon()
                 raise TimeoutError("Pipeline run timed out.")
-            time.sleep(poll_seconds)
+            time.sleep(min(timer.next_delay(), remaining))
 
     # Fallback surface
     pipelines = getattr(client, "pipelines", None)
@@ -591,20 +620,28 @@ def trigger_pipeline_and_wait(pipeline_rid: str, poll_seconds: int = 5, timeout_
         pipe = pipelines.Pipeline(pipeline_rid)
         run = pipe.run(branch_name=BRANCH_NAME)
         run_rid = run["rid"] if isinstance(run, dict) else getattr(run, "rid", None)
+        timer = poll_scheduler.start(eta_key, min_s=poll_seconds)
         if hasattr(pipe, "wait_for_run"):
-            pipe.wait_for_run(run_rid, timeout_seconds=timeout_seconds)
+            try:
+                pipe.wait_for_run(run_rid, timeout_seconds=timeout_seconds)
+            except Exception:
+                timer.abandon()
+                raise
         else:
-            start = time.time()
             while True:
                 info = pipe.get_run(run_rid)
                 state = info["state"] if isinstance(info, dict) else getattr(info, "state", None)
                 if state in ("SUCCEEDED", "FAILED", "CANCELED"):
                     if state != "SUCCEEDED":
+                        timer.abandon()
                         raise RuntimeError(f"Pipeline run ended with state: {state}")
                     break
-                if time.time() - start > timeout_seconds:
+                remaining = timeout_seconds - timer.elapsed()
+                if remaining <= 0:
+                    timer.abandon()
                     raise TimeoutError("Pipeline run timed out.")
-                time.sleep(poll_seconds)
+                time.sleep(min(timer.next_delay(), remaining))
+        timer.finish()
         log.info(f"Pipeline SUCCEEDED: {run_rid}")
         return run_rid
 
@@ -612,27 +649,21 @@ def trigger_pipeline_and_wait(pipeline_rid: str, poll_seconds: int = 5, timeout_
 
 def read_tabular(dataset_rid: str, columns=None, row_limit: Optional[int] = None) -> pd.DataFrame:
     """
-    Read a Foundry table to pandas via CSV bytes using the SDK (stable & simple).
+    Read a Foundry table to pandas via the Arrow export, decoding record batches as they stream in.
+    Full-table reads go through dataset_cache, so an unchanged table isn't downloaded twice.
     """
-    stream = client.datasets.Dataset.read_table(
-        dataset_rid,
-        branch_name=BRANCH_NAME,
-        format="CSV",
-        columns=columns,
-        row_limit=row_limit,
-    )
-    buf = bytearray()
-    if isinstance(stream, (bytes, bytearray)):
-        buf.extend(stream)
-    else:
-        for chunk in stream:
-            if isinstance(chunk, (bytes, bytearray)):
-                buf.extend(chunk)
-            elif isinstance(chunk, int):
-                buf.append(chunk)
-            else:
-                buf.extend(bytes(chunk))
-    return pd.read_csv(io.BytesIO(buf))
+    if row_limit is None:
+        return dataset_cache.get_dataframe(dataset_rid, columns=columns)
+    return foundry_tables.read_dataframe(foundry, dataset_rid, BRANCH_NAME, columns=columns, row_limit=row_limit)
+
+
+def read_tabular_arrow(dataset_rid: str, columns=None, row_limit: Optional[int] = None):
+    """
+    Same as read_tabular but returns the pyarrow Table (skip the pandas conversion).
+    """
+    if row_limit is None:
+        return dataset_cache.get_table(dataset_rid, columns=columns)
+    return foundry_tables.read_arrow(foundry, dataset_rid, BRANCH_NAME, columns=columns, row_limit=row_limit)
 
 def filter_rows_for_file(df: pd.DataFrame, full_foundry_uri: str) -> pd.DataFrame:
     """
@@ -642,13 +673,43 @@ def filter_rows_for_file(df: pd.DataFrame, full_foundry_uri: str) -> pd.DataFram
     if "_file" not in df.columns:
         return df.iloc[0:0]
 
-    def _norm(s: str) -> str:
-        return str(s).replace("\r", "").replace("\n", "").strip()
-
-    s = df["_file"].astype(str).map(_norm)
-    target = _norm(full_foundry_uri)
+    s = df["_file"].astype(str).map(_norm_file_uri)
+    target = _norm_file_uri(full_foundry_uri)
     return df[s == target]
 
+def _norm_file_uri(s: str) -> str:
+    return str(s).replace("\r", "").replace("\n", "").strip()
+
+def read_rows_for_file(dataset_rid: str, full_foundry_uri: str) -> pd.DataFrame:
+    """
+    Rows of one output table for one input file without pulling the whole table.
+    A substring match on `_file` is pushed down to Foundry, then filter_rows_for_file
+    applies the exact normalized match locally. The branch is resolved once and its
+    transaction is used for both the column check and the cached read.
+    """
+    try:
+        txn = foundry_tables.latest_transaction_rid(foundry, dataset_rid, BRANCH_NAME)
+    except Exception as e:
+        log.warning("[read] branch lookup failed for %s, reading uncached: %s", dataset_rid, e)
+        txn = None
+    if "_file" not in foundry_tables.table_columns(foundry, dataset_rid, BRANCH_NAME, txn):
+        return pd.DataFrame()
+    target = _norm_file_uri(full_foundry_uri)
+    df = dataset_cache.get_dataframe(dataset_rid, filters=[("_file", "contains", target)], txn=txn)
+    return filter_rows_for_file(df, full_foundry_uri)
+
+async def read_rows_for_file_async(dataset_rid: str, full_foundry_uri: str) -> pd.DataFrame:
+    """
+    read_rows_for_file awaited on the Foundry client's loop (foundry.aio): no worker
+    thread, no hop between loops. Must run on foundry.loop.
+    """
+    txn = await foundry_tables.latest_transaction_rid_async(foundry.aio, dataset_rid, BRANCH_NAME)
+    if "_file" not in await foundry_tables.table_columns_async(foundry.aio, dataset_rid, BRANCH_NAME, txn):
+        return pd.DataFrame()
+    target = _norm_file_uri(full_foundry_uri)
+    table = await dataset_cache.get_table_async(dataset_rid, filters=[("_file", "contains", target)], txn=txn)
+    return filter_rows_for_file(table.to_pandas(), full_foundry_uri)
+
 # =========================
 # TEXT PATH
 # =========================
@@ -657,49 +718,84 @@ def run_schedule(schedule_rid: str) -> str:
     Fire-and-forget trigger of a build schedule.
     Returns the schedule run RID. (A 'succeeded' run means the build was *started*.)
     """
-    url = f"https://{HOST}/api/v2/orchestration/schedules/{schedule_rid}/run"
-    resp = http.post(url, headers={"Authorization": f"Bearer {FOUNDRY_TOKEN}"}, proxies=PROXIES)
-    if resp.status_code not in (200, 201):
-        raise RuntimeError(f"Run schedule failed {resp.status_code}: {resp.text}")
-    run = resp.json()
-    return run.get("rid")
+    run_rid = foundry.run_schedule(schedule_rid).get("rid")
+    log.info(f"[schedule] started run {run_rid} for schedule {schedule_rid}")
+    return run_rid
 
 def list_schedule_runs(schedule_rid: str) -> list[dict]:
-    url = f"https://{HOST}/api/v2/orchestration/schedules/{schedule_rid}/runs"
-    resp = http.get(url, headers={"Authorization": f"Bearer {FOUNDRY_TOKEN}"}, proxies=PROXIES)
-    resp.raise_for_status()
-    return resp.json().get("data", [])
+    return foundry.list_schedule_runs(schedule_rid)
 
-def wait_for_rows(filename: str, outputs: list[str], timeout_s: int = 900, poll_s: int = 5) -> dict[str, pd.DataFrame]:
+async def wait_for_rows_async(filename: str, outputs: list[str], timeout_s: int = 900, poll_s: int = 5,
+                              deadlines: Optional[Dict[str, float]] = None) -> dict[str, pd.DataFrame]:
     """
-    Poll the listed dataset RIDs until at least one has rows for this filename, or timeout.
-    Returns a dict of dataset_rid -> matched DataFrame (may be empty if none matched before timeout).
+    Poll all listed dataset RIDs concurrently until every one has rows for this filename,
+    or its own deadline passes. Datasets that already matched stop being polled, and each
+    one's poll interval follows its learned refresh time (poll_s is the shortest interval).
+    Returns a dict of dataset_rid -> matched DataFrame (empty for any that timed out).
+    Runs on the Foundry client's loop (wait_for_rows and the text builds put it there).
     """
-    start = time.time()
-    last = {}
-    while True:
-        any_rows = False
-        for rid in outputs:
-            try:
-                df = read_tabular(rid)
-                matched = filter_rows_for_file(df, filename)
-                last[rid] = matched
-                if not matched.empty:
-                    any_rows = True
-            except Exception as e:
-                # Keep polling even if a dataset read fails transiently
-                last[rid] = pd.DataFrame()
-        if any_rows:
-            return last
-        if time.time() - start > timeout_s:
-            return last
-        time.sleep(poll_s)
-
-def run_text_path(scraper_py: str, txt_dataset_foundry_folder="incoming"):
-    logging.info("Running scraper…")
-    local_txt = run_scraper(scraper_py)
-    logging.info("Scraper complete.")
-    filename = local_txt.name
+    return await polling.poll_datasets(
+        lambda rid: read_rows_for_file_async(rid, filename),
+        outputs,
+        timeout_s=timeout_s,
+        poll_s=poll_s,
+        deadlines=deadlines,
+        scheduler=poll_scheduler,
+    )
+
+def wait_for_rows(filename: str, outputs: list[str], timeout_s: int = 900, poll_s: int = 5,
+                  deadlines: Optional[Dict[str, float]] = None) -> dict[str, pd.DataFrame]:
+    """
+    Blocking wrapper around wait_for_rows_async (use that one from inside an event loop).
+    """
+    return _run_blocking(
+        wait_for_rows_async(filename, outputs, timeout_s=timeout_s, poll_s=poll_s, deadlines=deadlines),
+        "wait_for_rows_async",
+    )
+
+def _run_blocking(coro, async_name: str):
+    """
+    Run a coroutine from blocking code on the shared Foundry client's loop (no new
+    loop per call). From inside an event loop this would deadlock or block it, so
+    point the caller at the async variant instead.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return foundry.run(coro)
+    coro.close()
+    raise RuntimeError(f"Called from a running event loop; await {async_name}(...) instead.")
+
+def _run_text_batch(foundry_paths: list) -> dict:
+    """
+    BuildCoalescer batch for the text path: one schedule run for every file uploaded
+    in the window, then returns right away with one poll per file (on the Foundry
+    client's loop), so each caller gets its rows as soon as its own file shows up.
+    """
+    if SCHEDULE_RID:
+        logging.info("Triggering schedule run for %d file(s)…", len(foundry_paths))
+        _run_rid = run_schedule(SCHEDULE_RID)  # fire-and-forget; we will poll the outputs
+
+    outputs = [QNA_DATASET_RID, SUMMARY_DATASET_RID, GENERAL_DATASET_RID]
+    return {
+        path: asyncio.run_coroutine_threadsafe(
+            wait_for_rows_async(path, outputs, timeout_s=900, poll_s=5),  # tweak if your pipeline is slower
+            foundry.loop,
+        )
+        for path in foundry_paths
+    }
+
+text_builds = BuildCoalescer(_run_text_batch, name="text-build")
+
+def shutdown() -> None:
+    """
+    Stop the build coalescers' threads (server.py's lifespan calls this when main is loaded).
+    """
+    text_builds.close()
+    image_builds.close()
+
+def run_text_path(url: str, txt_dataset_foundry_folder="incoming"):
+    filename, text = run_scraper(url)
 
     dated_prefix = f"{txt_dataset_foundry_folder}/{time.strftime('%Y-%m-%d')}"
     foundry_path = f"{dated_prefix}/{filename}"
@@ -707,21 +803,11 @@ def run_text_path(scraper_py: str, txt_dataset_foundry_folder="incoming"):
     print("PATH: " + foundry_path)
 
     # 1) upload the .txt to the filesystem dataset
-    upload_file_one_call(TXT_INPUT_DATASET_RID, foundry_path, local_txt)
+    upload_file_one_call(TXT_INPUT_DATASET_RID, foundry_path, text.encode("utf-8"))
 
-    # 2) optionally trigger the build schedule (if provided)
-    if SCHEDULE_RID:
-        logging.info("Triggering schedule run…")
-        _run_rid = run_schedule(SCHEDULE_RID)  # fire-and-forget; we will poll the outputs
-
-    # 3) poll your 3 output datasets for rows matching this file
-    results_map = wait_for_rows(
-        #switch filename to foundry_path
-        foundry_path,
-        [QNA_DATASET_RID, SUMMARY_DATASET_RID, GENERAL_DATASET_RID],
-        timeout_s=900,  # tweak if your pipeline is slower
-        poll_s=5,
-    )
+    # 2) + 3) trigger the build schedule (if provided) once for this and any other
+    # uploads in the same window, then poll your 3 output datasets for rows matching this file
+    results_map = text_builds.submit(foundry_path).result()
 
     return {
         "txt_filename": filename,
@@ -748,7 +834,7 @@ def rows_for_exact_foundry_uri(df, full_uri: str):
 if __name__ == "__main__":
     # --- TEXT PATH: run scraper and process outputs ---
     
-    results = run_text_path(scraper_py="./backend/src/scripts/palhacksscrape.py")
+    results = run_text_path(url=os.getenv("SCRAPE_URL", "https://txproduct.org/"))
     print("=== Text Path Matching Rows (Output 1: QNA) ===")
     print(results["output1_rows_for_file"].head())
     print("=== Text Path Matching Rows (Output 2: SUMMARY) ===")
@@ -0,0 +1,106 @@
+# org_classifier.py
+import re
+from collections import Counter
+from typing import Iterable, Optional
+
+from models import OrgType
+
+# Term -> weight per type. Specific terms count more than generic ones
+# ("fraternity" vs "alpha", "volunteer" vs "community"). A term matches at the start
+# of a word, so "volunteer" also counts "volunteers" / "volunteering", "tech" counts
+# "technology" and "engineer" counts "engineering" (see term_counts).
+LEXICON: dict[OrgType, dict[str, float]] = {
+    OrgType.FRATERNITY: {
+        "fraternity": 5, "fraternities": 5, "frat": 3, "interfraternity": 4, "ifc": 2,
+        "brotherhood": 3, "brother": 2, "rush": 1,
+    },
+    OrgType.SORORITY: {
+        "sorority": 5, "sororities": 5, "panhellenic": 4, "sisterhood": 3, "sister": 2,
+        "recruitment": 0.5,
+    },
+    OrgType.HONOR_SOCIETY: {
+        "honor": 2, "inducted": 2, "induction": 2, "gpa": 1,
+    },
+    OrgType.PROFESSIONAL: {
+        "professional": 2, "career": 2, "industry": 1.5, "business": 1,
+        "consulting": 2, "finance": 1.5, "financial": 1.5, "tech": 1, "engineer": 1,
+        "networking": 1.5, "internship": 1.5, "recruiting": 1,
+    },
+    OrgType.ACADEMIC: {
+        "academic": 2, "research": 1.5, "study": 1, "studies": 1, "scholar": 1.5,
+        "education": 1, "tutoring": 1.5,
+    },
+    OrgType.SERVICE: {
+        "service": 1, "volunteer": 2.5, "community": 1, "communities": 1,
+        "charity": 2.5, "charities": 2.5, "outreach": 2, "giving": 1, "philanthropy": 2, "nonprofit": 1.5,
+    },
+    OrgType.RECREATIONAL: {
+        "recreational": 2.5, "sport": 2, "fitness": 2, "gaming": 2, "hobby": 2, "hobbies": 2,
+        "outdoor": 2, "intramural": 2.5,
+    },
+    OrgType.RELIGIOUS: {
+        "religious": 3, "faith": 2.5, "christian": 3, "muslim": 3, "jewish": 3, "hindu": 3,
+        "buddhist": 3, "spiritual": 2, "worship": 2.5, "bible": 2.5, "ministry": 2.5, "ministries": 2.5,
+    },
+    OrgType.CULTURAL: {
+        "cultural": 2.5, "culture": 1.5, "heritage": 2, "ethnic": 2, "international": 1.5,
+        "diversity": 1.5, "multicultural": 3,
+    },
+}
+# Greek letters name fraternities and sororities alike, and show up everywhere else
+# (honor societies, math clubs, "alpha" releases): a weak hint that only counts toward
+# a type that also has one of its own words on the page (see score).
+GREEK_LETTERS = frozenset(("alpha", "beta", "gamma", "delta", "sigma", "phi", "psi", "kappa", "omega", "theta"))
+for _letter in GREEK_LETTERS:
+    LEXICON[OrgType.FRATERNITY].setdefault(_letter, 0.5)
+    LEXICON[OrgType.SORORITY].setdefault(_letter, 0.5)
+
+NAME_WEIGHT = 3.0  # a keyword in the org's name counts this many times a content hit
+MAX_HITS = 5       # repeats of one word beyond this add nothing (nav menus, footers)
+MIN_SCORE = 2.0    # below this, nothing stands out: OrgType.CLUB
+
+TYPES = list(LEXICON)
+# term -> [(type index, weight)], one lookup per match
+_TERM_WEIGHTS: dict[str, list[tuple[int, float]]] = {}
+for _i, _t in enumerate(TYPES):
+    for _word, _weight in LEXICON[_t].items():
+        _TERM_WEIGHTS.setdefault(_word, []).append((_i, _weight))
+
+# Every term in one alternation, longest first: at each word start the longest term
+# wins ("brotherhood" over "brother", "philanthropy" over "phi"), so nothing counts twice
+_TERMS = re.compile(r"\b(?:" + "|".join(sorted(map(re.escape, _TERM_WEIGHTS), key=len, reverse=True)) + ")")
+
+
+def term_counts(text: Optional[str]) -> Counter:
+    """Hits per lexicon term in `text`, matched at word starts (one scan)."""
+    return Counter(_TERMS.findall((text or "").lower()))
+
+
+def score(content: Optional[str], name: Optional[str]) -> list[float]:
+    """Score per type (in TYPES order): capped hits times weights, name hits boosted."""
+    hits = Counter({w: min(n, MAX_HITS) for w, n in term_counts(content).items()})
+    for word, n in term_counts(name).items():
+        hits[word] += NAME_WEIGHT * min(n, MAX_HITS)
+    row = [0.0] * len(TYPES)
+    letters = [0.0] * len(TYPES)
+    for word, n in hits.items():
+        for i, weight in _TERM_WEIGHTS[word]:
+            (letters if word in GREEK_LETTERS else row)[i] += n * weight
+    return [base + letters[i] if base else 0.0 for i, base in enumerate(row)]
+
+
+def classify_batch(contents: Iterable[Optional[str]], names: Iterable[Optional[str]]) -> list[OrgType]:
+    """
+    Org type for each (content, name) pair. The top-scoring type wins; below
+    MIN_SCORE, or when two types tie for the top, the org is a CLUB.
+    """
+    types = []
+    for content, name in zip(contents, names):
+        row = score(content, name)
+        best = max(row)
+        types.append(TYPES[row.index(best)] if best >= MIN_SCORE and row.count(best) == 1 else OrgType.CLUB)
+    return types
+
+
+def classify(content: Optional[str], name: Optional[str]) -> OrgType:
+    return classify_batch([content], [name])[0]
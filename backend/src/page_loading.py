@@ -0,0 +1,95 @@
+# page_loading.py
+import os
+import time
+import asyncio
+import logging
+from typing import Iterable, Optional
+from urllib.parse import urlparse
+
+log = logging.getLogger("page_loading")
+
+
+def _env_list(name: str, default: str) -> tuple[str, ...]:
+    return tuple(v.strip().lower() for v in os.getenv(name, default).split(",") if v.strip())
+
+
+# We only read body text and HTML: none of these change either.
+# (Stylesheets stay: inner_text() depends on CSS visibility.)
+BLOCKED_RESOURCE_TYPES = _env_list("SCRAPE_BLOCK_TYPES", "image,media,font")
+DENY_DOMAINS = _env_list(
+    "SCRAPE_DENY_DOMAINS",
+    "google-analytics.com,googletagmanager.com,doubleclick.net,googlesyndication.com,"
+    "facebook.net,connect.facebook.net,hotjar.com,segment.io,segment.com,mixpanel.com,"
+    "clarity.ms,fullstory.com,intercom.io,hs-analytics.net,hs-scripts.com,newrelic.com,nr-data.net",
+)
+
+LOAD_STRATEGIES = ("domcontentloaded", "load", "networkidle", "text-stable")
+LOAD_STRATEGY = os.getenv("SCRAPE_LOAD_STRATEGY", "text-stable")
+TEXT_STABLE_MS = int(os.getenv("SCRAPE_TEXT_STABLE_MS", "750"))
+TEXT_POLL_MS = 250
+
+
+def is_denied(url: str, deny_domains: Iterable[str] = DENY_DOMAINS) -> bool:
+    host = (urlparse(url).hostname or "").lower()
+    return any(host == d or host.endswith("." + d) for d in deny_domains)
+
+
+async def block_resources(target, resource_types: Iterable[str] = BLOCKED_RESOURCE_TYPES,
+                          deny_domains: Iterable[str] = DENY_DOMAINS) -> None:
+    """
+    Abort requests we'd never use on a Playwright page or context (a context covers
+    every tab opened in it): the given resource types, and anything on a denied domain.
+    """
+    resource_types = frozenset(resource_types)
+    deny_domains = tuple(deny_domains)
+
+    async def _route(route):
+        request = route.request
+        if request.resource_type in resource_types or is_denied(request.url, deny_domains):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    await target.route("**/*", _route)
+
+
+async def goto(page, url: str, strategy: str = LOAD_STRATEGY, timeout_s: float = 30,
+               stable_ms: int = TEXT_STABLE_MS):
+    """
+    Navigate and wait per `strategy`:
+    - "domcontentloaded" / "load" / "networkidle": Playwright's own wait_until
+    - "text-stable": DOM ready, then until body text stops changing for `stable_ms`
+      (JS-rendered content is in, without waiting for every late tracker request)
+    """
+    if strategy not in LOAD_STRATEGIES:
+        raise ValueError(f"Unknown load strategy '{strategy}'; expected one of {LOAD_STRATEGIES}")
+    if strategy != "text-stable":
+        return await page.goto(url, wait_until=strategy, timeout=timeout_s * 1000)
+
+    deadline = time.monotonic() + timeout_s
+    resp = await page.goto(url, wait_until="domcontentloaded", timeout=timeout_s * 1000)
+    await wait_for_stable_text(page, stable_ms, max(0.0, deadline - time.monotonic()))
+    return resp
+
+
+async def wait_for_stable_text(page, stable_ms: int = TEXT_STABLE_MS, timeout_s: float = 10) -> Optional[int]:
+    """
+    Poll the body text length until it holds still for `stable_ms` or `timeout_s` runs out.
+    Returns the final length (None if the body never appeared).
+    """
+    deadline = time.monotonic() + timeout_s
+    last, stable_since = None, time.monotonic()
+    while time.monotonic() < deadline:
+        try:
+            length = await page.evaluate("() => document.body ? document.body.innerText.length : null")
+        except Exception as e:
+            # navigation in progress (client-side redirect): keep waiting
+            log.debug("[load] text probe failed: %s", e)
+            length = None
+        now = time.monotonic()
+        if length != last:
+            last, stable_since = length, now
+        elif length is not None and (now - stable_since) * 1000 >= stable_ms:
+            return length
+        await asyncio.sleep(TEXT_POLL_MS / 1000)
+    return last
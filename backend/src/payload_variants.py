@@ -0,0 +1,80 @@
+# payload_variants.py
+import os
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Optional
+
+log = logging.getLogger("payload_variants")
+
+DEFAULT_VARIANTS_PATH = os.getenv(
+    "PAYLOAD_VARIANTS_PATH", str(Path.home() / ".cache" / "coffeechat" / "payload_variants.json")
+)
+
+
+class VariantCache:
+    """
+    Remembers which request shape a tenant accepted, per (base URL, endpoint).
+
+    Callers that have to try several payload variants (e.g. builds/create) ask for
+    order() first, so the remembered winner goes out alone on the first request.
+    A winner that starts failing is forgotten and the full negotiation runs again.
+    Survives restarts in a small JSON file.
+    """
+
+    def __init__(self, path: str = DEFAULT_VARIANTS_PATH):
+        self.path = Path(path)
+        self._winners: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def _key(base_url: str, endpoint: str) -> str:
+        return f"{base_url} {endpoint}"
+
+    def winner(self, base_url: str, endpoint: str) -> Optional[str]:
+        with self._lock:
+            return self._winners.get(self._key(base_url, endpoint))
+
+    def order(self, base_url: str, endpoint: str, names: list[str]) -> list[str]:
+        """Variant names to try, remembered winner first, the rest in their given order."""
+        won = self.winner(base_url, endpoint)
+        if won not in names:
+            return list(names)
+        return [won] + [n for n in names if n != won]
+
+    def remember(self, base_url: str, endpoint: str, name: str) -> None:
+        with self._lock:
+            key = self._key(base_url, endpoint)
+            if self._winners.get(key) == name:
+                return
+            self._winners[key] = name
+            snapshot = json.dumps(self._winners)
+        log.info("[variants] %s %s -> %s", base_url, endpoint, name)
+        self._save(snapshot)
+
+    def forget(self, base_url: str, endpoint: str) -> None:
+        with self._lock:
+            if self._winners.pop(self._key(base_url, endpoint), None) is None:
+                return
+            snapshot = json.dumps(self._winners)
+        log.warning("[variants] %s %s: remembered variant failed; renegotiating", base_url, endpoint)
+        self._save(snapshot)
+
+    def _load(self) -> None:
+        try:
+            self._winners = json.loads(self.path.read_text())
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            log.warning("[variants] ignoring unreadable %s: %s", self.path, e)
+
+    def _save(self, snapshot: str) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(snapshot)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            log.warning("[variants] could not save %s: %s", self.path, e)
@@ -0,0 +1,221 @@
+# polling.py
+import os
+import json
+import time
+import random
+import asyncio
+import logging
+import statistics
+import threading
+from pathlib import Path
+from typing import Awaitable, Callable, Hashable, Optional
+
+import pandas as pd
+
+log = logging.getLogger("polling")
+
+DEFAULT_HISTORY_PATH = os.getenv(
+    "POLL_HISTORY_PATH", str(Path.home() / ".cache" / "coffeechat" / "poll_history.json")
+)
+
+
+# =========================
+# Adaptive scheduling
+# =========================
+class PollTimer:
+    """
+    One wait in progress. Ask it how long to sleep before the next check, and call
+    finish() when the thing you were waiting for is done so the duration is learned.
+    """
+
+    def __init__(self, scheduler: "PollScheduler", key: str, min_s: float, max_s: float,
+                 token: Optional[Hashable] = None):
+        self.scheduler = scheduler
+        self.key = key
+        self.token = token
+        self.min_s = min_s
+        self.max_s = max_s
+        self.started_at = time.time()
+        self.attempt = 0
+
+    def elapsed(self) -> float:
+        return time.time() - self.started_at
+
+    def eta(self) -> Optional[float]:
+        """Predicted seconds until done, or None with no history yet."""
+        predicted = self.scheduler.predicted_duration(self.key)
+        if predicted is None:
+            return None
+        return max(0.0, predicted - self.elapsed())
+
+    def next_delay(self) -> float:
+        """
+        Before the predicted finish: sleep until just short of it (one request instead of dozens).
+        After it: exponential backoff from min_s up to max_s, with jitter so parallel waiters spread out.
+        """
+        predicted = self.scheduler.predicted_duration(self.key)
+        if predicted is not None:
+            wake_at = predicted * self.scheduler.lead
+            if self.elapsed() < wake_at:
+                return max(self.min_s, wake_at - self.elapsed())
+        delay = min(self.max_s, self.min_s * (2 ** self.attempt))
+        self.attempt += 1
+        return random.uniform(max(self.min_s, delay / 2), delay)
+
+    def finish(self) -> float:
+        duration = self.elapsed()
+        self.scheduler.record(self.key, duration)
+        self.scheduler._release(self)
+        return duration
+
+    def abandon(self) -> None:
+        """Stop tracking without learning from it (timed out, failed, canceled)."""
+        self.scheduler._release(self)
+
+
+class PollScheduler:
+    """
+    Learns how long pipelines, builds and dataset refreshes take (keyed by caller,
+    e.g. "build:<job rid>" or "rows:<dataset rid>") and turns that into poll delays
+    and ETAs. History survives restarts in a small JSON file, which every instance
+    re-reads before writing so processes sharing it don't erase each other's samples.
+    Within one process, use shared_scheduler().
+    """
+
+    def __init__(self, path: str = DEFAULT_HISTORY_PATH, history: int = 20,
+                 min_s: float = 2.0, max_s: float = 30.0, lead: float = 0.85):
+        self.path = Path(path)
+        self.history = history
+        self.min_s = min_s
+        self.max_s = max_s
+        self.lead = lead  # wake up at this fraction of the predicted duration
+        self._durations: dict[str, list[float]] = {}
+        # (key, token) -> in-flight wait; the token tells concurrent waits on one key apart
+        self._active: dict[tuple[str, Optional[Hashable]], PollTimer] = {}
+        self._lock = threading.Lock()
+        self._durations = self._read()
+
+    def start(self, key: str, min_s: Optional[float] = None, max_s: Optional[float] = None,
+              token: Optional[Hashable] = None) -> PollTimer:
+        """
+        Begin a wait on `key`. Pass a `token` (upload name, build RID, ...) when several
+        waits on the same key can overlap, and the same token to eta() to ask about one.
+        """
+        timer = PollTimer(self, key, min_s if min_s is not None else self.min_s, max_s or self.max_s, token)
+        with self._lock:
+            self._active[(key, token if token is not None else id(timer))] = timer
+        return timer
+
+    def predicted_duration(self, key: str) -> Optional[float]:
+        with self._lock:
+            durations = self._durations.get(key)
+            return statistics.median(durations) if durations else None
+
+    def eta(self, key: str, token: Optional[Hashable] = None) -> Optional[float]:
+        """
+        Seconds until the in-flight wait for (`key`, `token`) should finish, or the
+        typical duration if that wait isn't in flight. None if we've never seen `key` complete.
+        """
+        timer = self._active.get((key, token)) if token is not None else None
+        if timer is not None:
+            return timer.eta()
+        return self.predicted_duration(key)
+
+    def record(self, key: str, duration: float) -> None:
+        with self._lock:
+            # Samples other processes saved since we last looked win over our copy
+            self._durations = {**self._durations, **self._read()}
+            durations = self._durations.setdefault(key, [])
+            durations.append(round(duration, 2))
+            del durations[:-self.history]
+            self._save(json.dumps(self._durations))
+        log.info("[poll] %s took %.1fs (predicted next: %.1fs)", key, duration, self.predicted_duration(key))
+
+    def _release(self, timer: PollTimer) -> None:
+        with self._lock:
+            for slot, active in list(self._active.items()):
+                if active is timer:
+                    del self._active[slot]
+
+    def _read(self) -> dict[str, list[float]]:
+        try:
+            return json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            log.warning("[poll] ignoring unreadable history %s: %s", self.path, e)
+            return {}
+
+    def _save(self, snapshot: str) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(snapshot)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            log.warning("[poll] could not save history %s: %s", self.path, e)
+
+
+_shared: dict[str, PollScheduler] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_scheduler(path: str = DEFAULT_HISTORY_PATH) -> PollScheduler:
+    """The process-wide scheduler for a history file (main.py and testing.py share it)."""
+    with _shared_lock:
+        if path not in _shared:
+            _shared[path] = PollScheduler(path)
+        return _shared[path]
+
+
+# =========================
+# Output polling
+# =========================
+async def poll_datasets(fetch: Callable[[str], Awaitable[pd.DataFrame]],
+                        dataset_rids: list[str],
+                        timeout_s: float = 900,
+                        poll_s: float = 5,
+                        deadlines: Optional[dict[str, float]] = None,
+                        scheduler: Optional[PollScheduler] = None,
+                        key_prefix: str = "rows") -> dict[str, pd.DataFrame]:
+    """
+    Poll several output datasets at once until each one has rows.
+
+    `fetch(rid)` is an async read (e.g. main.read_rows_for_file_async), awaited for all
+    datasets at once, so one poll cycle costs the slowest read, not the sum. Wrap a
+    blocking read in asyncio.to_thread yourself. A dataset that has
+    rows is done and isn't read again; the others keep going until they match or hit
+    their own deadline (`deadlines[rid]` seconds, default `timeout_s`).
+    With a scheduler, each dataset sleeps per its learned "<key_prefix>:<rid>" ETA
+    instead of every `poll_s` seconds.
+    Returns dataset_rid -> last DataFrame seen (empty if it never matched).
+    """
+    loop = asyncio.get_running_loop()
+    deadlines = deadlines or {}
+
+    async def _poll_one(rid: str) -> tuple[str, pd.DataFrame]:
+        deadline = loop.time() + deadlines.get(rid, timeout_s)
+        timer = scheduler.start(f"{key_prefix}:{rid}", min_s=poll_s) if scheduler else None
+        last = pd.DataFrame()
+        while True:
+            try:
+                last = await fetch(rid)
+            except Exception as e:
+                # Keep polling even if a dataset read fails transiently
+                log.warning("[poll] %s read failed: %s", rid, e)
+            if not last.empty:
+                log.info("[poll] %s has %d rows", rid, len(last))
+                if timer:
+                    timer.finish()
+                return rid, last
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                log.warning("[poll] %s: no rows before its deadline", rid)
+                if timer:
+                    timer.abandon()
+                return rid, last
+            delay = timer.next_delay() if timer else poll_s
+            await asyncio.sleep(min(delay, remaining))
+
+    results = await asyncio.gather(*(_poll_one(rid) for rid in dict.fromkeys(dataset_rids)))
+    return dict(results)
@@ -0,0 +1,90 @@
+# response_cache.py
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Hashable, Optional
+
+DEFAULT_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_ENTRIES", "512"))
+DEFAULT_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MB", "64")) * 1024 * 1024
+DEFAULT_TTL_S = float(os.getenv("RESPONSE_CACHE_TTL_S", "300"))
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    media_type: str
+    headers: dict = field(default_factory=dict)
+    etag: str = ""
+    expires_at: float = 0.0
+
+    def __post_init__(self):
+        if not self.etag:
+            self.etag = make_etag(self.body)
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (weak comparison, '*' matches anything)."""
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or any(t.removeprefix("W/") == etag for t in tags)
+
+
+class ResponseCache:
+    """
+    LRU + TTL cache of serialized endpoint responses.
+
+    Callers put the source data's version (e.g. the dataset's transaction RID) in
+    the key, so a new transaction is a new entry and old ones just age out.
+    Bounded by entry count and total body bytes.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_bytes: int = DEFAULT_MAX_BYTES,
+                 ttl_s: float = DEFAULT_TTL_S):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: Hashable, entry: CachedResponse, ttl_s: Optional[float] = None) -> CachedResponse:
+        entry.expires_at = time.monotonic() + (self.ttl_s if ttl_s is None else ttl_s)
+        if len(entry.body) > self.max_bytes:
+            return entry
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = entry
+            self._bytes += len(entry.body)
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                self._pop(next(iter(self._entries)))
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _pop(self, key: Hashable) -> None:
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= len(old.body)
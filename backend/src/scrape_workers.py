@@ -0,0 +1,83 @@
+# scrape_workers.py
+import os
+import re
+import uuid
+import asyncio
+import logging
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional, Union
+from urllib.parse import urlparse
+
+import browser_pool
+from scripts.palhacksscrape import process_async
+
+log = logging.getLogger("scrape_workers")
+
+SCRAPE_WORKERS = int(os.getenv("SCRAPE_WORKERS", "4"))
+# Optional file sink for scrape output; unset = results stay in memory
+SCRAPE_OUTPUT_DIR = os.getenv("SCRAPE_OUTPUT_DIR") or None
+
+_SLUG = re.compile(r"[^a-z0-9]+")
+
+
+class ScraperPool:
+    """
+    Runs scrapes as tasks on the shared scrape loop (no interpreter start per
+    scrape; Chromium only once a page needs rendering, see browser_pool), at most
+    `workers` at once, and hands the text back in memory. Concurrent scrapes never
+    share an output file.
+    """
+
+    def __init__(self, workers: int = SCRAPE_WORKERS):
+        self.workers = workers
+        self._sem: Optional[asyncio.Semaphore] = None  # created on the scrape loop
+
+    async def _scrape(self, url: str, **kwargs) -> str:
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.workers)
+        async with self._sem:
+            log.info("[scrape] %s", url)
+            return await process_async(url, **kwargs)
+
+    def scrape(self, url: str, **kwargs) -> str:
+        """Blocking: scraped text of `url` (landing page + subpages, newline separated)."""
+        return browser_pool.run(self._scrape(url, **kwargs))
+
+    async def scrape_async(self, url: str, **kwargs) -> str:
+        """Same as scrape() for callers on another event loop."""
+        return await browser_pool.run_async(self._scrape(url, **kwargs))
+
+
+def output_name(url: str, prefix: str = "scraped") -> str:
+    """Unique .txt name for one scrape, e.g. scraped_txproduct-org_3f2a9c1b.txt"""
+    host = (urlparse(url).hostname or "page").lower().removeprefix("www.")
+    return f"{prefix}_{_SLUG.sub('-', host).strip('-')}_{uuid.uuid4().hex[:8]}.txt"
+
+
+def write_output(text: str, name: str, out_dir: Union[str, os.PathLike, None] = None) -> Path:
+    """File sink: write `text` to out_dir/name atomically (readers never see a partial file)."""
+    out_dir = Path(out_dir or SCRAPE_OUTPUT_DIR or ".")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=out_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, out_dir / name)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return out_dir / name
+
+
+_pool: Optional[ScraperPool] = None
+_pool_lock = threading.Lock()
+
+
+def shared_scrapers() -> ScraperPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ScraperPool()
+        return _pool
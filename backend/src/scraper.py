@@ -1,82 +1,102 @@
 import os
-import requests
+import asyncio
+import httpx
 import re
 import logging
 from typing import Dict, List, Optional
 from models import ScrapedOrgData, OrgType
+from tiered_fetch import TieredFetcher, FetchResult
+from crawl_frontier import CrawlFrontier
+from fetch_cache import FetchCache, schema_hash
+from field_extraction import extract_fields
+import org_classifier
+from html_scan import PageOutline, scan_html
 
 logger = logging.getLogger(__name__)
 
+FIRECRAWL_URL = os.getenv('FIRECRAWL_URL', 'https://api.firecrawl.dev/v0/scrape')
+FIRECRAWL_CONNECT_TIMEOUT_S = float(os.getenv('FIRECRAWL_CONNECT_TIMEOUT_S', '10'))
+FIRECRAWL_READ_TIMEOUT_S = float(os.getenv('FIRECRAWL_READ_TIMEOUT_S', '60'))
+FIRECRAWL_MAX_CONNECTIONS = int(os.getenv('FIRECRAWL_MAX_CONNECTIONS', '10'))
+# Whole scrape_organization call, every fetch tier included
+SCRAPE_TOTAL_TIMEOUT_S = float(os.getenv('SCRAPE_TOTAL_TIMEOUT_S', '120'))
+
+FIRECRAWL_PAGE_OPTIONS = {
+    'onlyMainContent': True,
+    'includeHtml': True
+}
+EXTRACTION_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'organization_name': {
+            'type': 'string',
+            'description': 'The name of the organization'
+        },
+        'description': {
+            'type': 'string',
+            'description': 'Description or mission of the organization'
+        },
+        'contact_email': {
+            'type': 'string',
+            'description': 'Contact email for the organization'
+        },
+        'application_requirements': {
+            'type': 'string',
+            'description': 'Requirements to join or apply to the organization'
+        },
+        'application_deadline': {
+            'type': 'string',
+            'description': 'Application deadline if mentioned'
+        }
+    }
+}
+
 class OrganizationScraper:
     def __init__(self):
         self.firecrawl_api_key = os.getenv('FIRECRAWL_API_KEY')
         if not self.firecrawl_api_key:
             raise ValueError("FIRECRAWL_API_KEY environment variable is required")
+        # One pooled client for every Firecrawl call (keep-alive, bounded connections)
+        self.http = httpx.AsyncClient(
+            timeout=httpx.Timeout(FIRECRAWL_READ_TIMEOUT_S, connect=FIRECRAWL_CONNECT_TIMEOUT_S),
+            limits=httpx.Limits(max_connections=FIRECRAWL_MAX_CONNECTIONS,
+                                max_keepalive_connections=FIRECRAWL_MAX_CONNECTIONS),
+            headers={'Authorization': f'Bearer {self.firecrawl_api_key}'}
+        )
+        # Repeat scrapes of a URL are served from disk (revalidated with the origin once stale);
+        # keyed by the schema too, so changing it never serves old extractions
+        self.fetcher = TieredFetcher(
+            firecrawl=self._firecrawl_fetch,
+            cache=FetchCache(),
+            cache_namespace=schema_hash([FIRECRAWL_PAGE_OPTIONS, EXTRACTION_SCHEMA])
+        )
+
+    async def aclose(self):
+        """Close the HTTP pools (Firecrawl and the tiered fetcher)"""
+        await self.http.aclose()
+        await self.fetcher.aclose()
 
     async def scrape_organization(self, url: str) -> ScrapedOrgData:
         """
-        Scrape organization data from a given URL using Firecrawl
+        Scrape organization data from a given URL: plain HTTP when the page is static,
+        a headless browser or Firecrawl only when it isn't (see tiered_fetch)
         """
         try:
-            # Use Firecrawl to scrape the website
-            response = requests.post(
-                'https://api.firecrawl.dev/v0/scrape',
-                headers={
-                    'Authorization': f'Bearer {self.firecrawl_api_key}',
-                    'Content-Type': 'application/json'
-                },
-                json={
-                    'url': url,
-                    'pageOptions': {
-                        'onlyMainContent': True,
-                        'includeHtml': True
-                    },
-                    'extractorOptions': {
-                        'extractionSchema': {
-                            'type': 'object',
-                            'properties': {
-                                'organization_name': {
-                                    'type': 'string',
-                                    'description': 'The name of the organization'
-                                },
-                                'description': {
-                                    'type': 'string',
-                                    'description': 'Description or mission of the organization'
-                                },
-                                'contact_email': {
-                                    'type': 'string',
-                                    'description': 'Contact email for the organization'
-                                },
-                                'application_requirements': {
-                                    'type': 'string',
-                                    'description': 'Requirements to join or apply to the organization'
-                                },
-                                'application_deadline': {
-                                    'type': 'string',
-                                    'description': 'Application deadline if mentioned'
-                                }
-                            }
-                        }
-                    }
-                }
-            )
-
-            if response.status_code != 200:
-                raise Exception(f"Firecrawl API error: {response.status_code} - {response.text}")
-
-            data = response.json()
+            result = await asyncio.wait_for(self.fetcher.fetch(url), SCRAPE_TOTAL_TIMEOUT_S)
 
             # Extract content
-            content = data.get('data', {}).get('content', '')
-            html = data.get('data', {}).get('html', '')
-            extracted_data = data.get('data', {}).get('extract', {})
-
-            # Use extracted data if available, otherwise parse content
-            org_name = extracted_data.get('organization_name') or self._extract_name_from_content(content, html)
-            description = extracted_data.get('description') or self._extract_description(content)
-            contact_email = extracted_data.get('contact_email') or self._extract_email(content)
-            requirements = extracted_data.get('application_requirements') or self._extract_requirements(content)
-            deadline = extracted_data.get('application_deadline') or self._extract_deadline(content)
+            content = result.text
+            html = result.html
+            extracted_data = result.extra.get('extract') or {}
+
+            # Use extracted data if available, otherwise parse content (all fields in one scan)
+            fields = extract_fields(content)
+            outline = result.outline or scan_html(html, result.final_url, collect_text=False)
+            org_name = extracted_data.get('organization_name') or self._extract_name_from_content(content, html, outline)
+            description = extracted_data.get('description') or fields.description or self._meta_description(outline)
+            contact_email = extracted_data.get('contact_email') or fields.email
+            requirements = extracted_data.get('application_requirements') or fields.requirements
+            deadline = extracted_data.get('application_deadline') or fields.deadline
 
             # Determine organization type
             org_type = self._determine_org_type(content, org_name)
@@ -90,22 +110,55 @@ class OrganizationScraper:
                 application_deadline=deadline
             )
 
+        except asyncio.TimeoutError:
+            logger.error(f"Failed to scrape {url}: timed out after {SCRAPE_TOTAL_TIMEOUT_S}s")
+            raise Exception(f"Scraping failed: timed out after {SCRAPE_TOTAL_TIMEOUT_S}s")
         except Exception as e:
             logger.error(f"Failed to scrape {url}: {e}")
             raise Exception(f"Scraping failed: {str(e)}")
 
-    def _extract_name_from_content(self, content: str, html: str) -> Optional[str]:
-        """Extract organization name from content and HTML"""
-        # Try to get from title tag first
-        title_match = re.search(r'<title>([^<]+)</title>', html, re.IGNORECASE)
-        if title_match:
-            title = title_match.group(1).strip()
-            # Clean up common suffixes
-            title = re.sub(r'\s*[-|–]\s*(Home|Welcome|Official Site).*$', '', title, flags=re.IGNORECASE)
-            if len(title) > 3:
-                return title
+    async def _firecrawl_fetch(self, url: str) -> FetchResult:
+        """Last fetch tier: Firecrawl renders the page and fills in the extraction schema"""
+        response = await self.http.post(
+            FIRECRAWL_URL,
+            json={
+                'url': url,
+                'pageOptions': FIRECRAWL_PAGE_OPTIONS,
+                'extractorOptions': {
+                    'extractionSchema': EXTRACTION_SCHEMA
+                }
+            }
+        )
+
+        if response.status_code != 200:
+            raise Exception(f"Firecrawl API error: {response.status_code} - {response.text}")
+
+        data = response.json().get('data', {})
+        return FetchResult(
+            url=url,
+            html=data.get('html', ''),
+            text=data.get('content', ''),
+            tier="firecrawl",
+            extra={'extract': data.get('extract', {})}
+        )
 
-        # Try to extract from headers in content
+    def _extract_name_from_content(self, content: str, html: str, outline: Optional[PageOutline] = None) -> Optional[str]:
+        """Extract organization name from content and HTML"""
+        outline = outline or scan_html(html, collect_text=False)
+        # Try to get from title tag first, then the main heading
+        for title in (outline.title, outline.heading(1)):
+            if title:
+                # Clean up common suffixes
+                title = re.sub(r'\s*[-|–]\s*(Home|Welcome|Official Site).*$', '', title, flags=re.IGNORECASE)
+                if len(title) > 3:
+                    return title
+
+        # Then the first short heading (the http/browser tiers return whitespace-collapsed text)
+        for _, heading in outline.headings[:10]:
+            if len(heading) > 3 and len(heading) < 100:
+                return heading
+
+        # Try to extract from headers in content (Firecrawl markdown keeps its lines)
         lines = content.split('\n')
         for line in lines[:10]:  # Check first 10 lines
             line = line.strip()
@@ -118,149 +171,61 @@ class OrganizationScraper:
 
         return None
 
-    def _extract_internal_links(self, html: str, base_url: str) -> List[str]:
-        """Extract internal links from HTML"""
-        pattern = re.compile(
-            r'<a\b[^>]*\bhref\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+))',
-            re.IGNORECASE
-        )
-
-        crawled_urls = set()
-        for m in pattern.finditer(html):
-            if m.groups() and m.groups()[0]:
-                url = m.groups()[0]
-                if url.startswith("/"):
-                    processed_url = base_url.rstrip("/") + url
-                    crawled_urls.add(processed_url)
+    def _meta_description(self, outline: PageOutline) -> Optional[str]:
+        """Meta description, held to the same length bar as extract_fields"""
+        description = ' '.join(outline.meta.get('description', '').split())
+        if len(description) > 20:  # Only return if substantial
+            return description
+        return None
 
-        return list(crawled_urls)
+    def _extract_internal_links(self, html: str, base_url: str) -> List[str]:
+        """Extract internal links from HTML (canonical, deduplicated, in page order)"""
+        frontier = CrawlFrontier(base_url)
+        frontier.mark_visited(base_url)
+        frontier.add_links(html, base_url, depth=1)
+        return frontier.pending()
 
     def _extract_org_data(self, content: str, url: str) -> ScrapedOrgData:
         """Extract organization data from scraped content using pattern matching"""
 
         # Extract organization name (try to get from title or headers)
-        name_patterns = [
-            r'<title>([^<]+)</title>',
-            r'<h1[^>]*>([^<]+)</h1>',
-            r'<h2[^>]*>([^<]+)</h2>'
-        ]
-
-        name = "Unknown Organization"
-        for pattern in name_patterns:
-            match = re.search(pattern, content, re.IGNORECASE)
-            if match:
-                name = match.group(1).strip()
-                break
+        outline = scan_html(content, url, collect_text=False)
+        name = outline.title or outline.heading(1) or outline.heading(2) or "Unknown Organization"
 
         # Clean up common suffixes from titles
         name = re.sub(r'\s*[-|–]\s*(Home|Welcome|Official Site).*$', '', name, flags=re.IGNORECASE)
 
-        # Extract description (look for about/description sections)
-        description = self._extract_description(content)
-
-        # Extract contact email
-        email = self._extract_email(content)
+        # Extract description, contact email, requirements and deadline in one scan
+        fields = extract_fields(content)
 
         # Determine organization type based on content
         org_type = self._determine_org_type(content, name)
 
-        # Extract application requirements
-        requirements = self._extract_requirements(content)
-
-        # Extract application deadline
-        deadline = self._extract_deadline(content)
-
         return ScrapedOrgData(
             name=name,
-            description=description,
+            description=fields.description,
             type=org_type,
-            contact_email=email,
-            application_requirements=requirements,
-            application_deadline=deadline
+            contact_email=fields.email,
+            application_requirements=fields.requirements,
+            application_deadline=fields.deadline
         )
 
     def _extract_description(self, content: str) -> Optional[str]:
         """Extract organization description"""
-        # Look for common description patterns
-        patterns = [
-            r'(?:about|description|mission|purpose)[^.]*?([^.]{50,200}\.)',
-            r'<meta[^>]*name=["\']description["\'][^>]*content=["\']([^"\']+)["\']',
-            r'(?:we are|we\'re|our mission|our purpose)[^.]*?([^.]{30,150}\.)'
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, content, re.IGNORECASE | re.DOTALL)
-            if match:
-                description = match.group(1).strip()
-                # Clean up HTML tags and extra whitespace
-                description = re.sub(r'<[^>]+>', '', description)
-                description = re.sub(r'\s+', ' ', description)
-                if len(description) > 20:  # Only return if substantial
-                    return description
-
-        return None
+        return extract_fields(content).description
 
     def _extract_email(self, content: str) -> Optional[str]:
         """Extract contact email"""
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        matches = re.findall(email_pattern, content)
-
-        # Filter out common non-contact emails
-        filtered_emails = [
-            email for email in matches
-            if not any(skip in email.lower() for skip in ['noreply', 'no-reply', 'privacy', 'legal'])
-        ]
-
-        return filtered_emails[0] if filtered_emails else None
+        return extract_fields(content).email
 
     def _determine_org_type(self, content: str, name: str) -> OrgType:
-        """Determine organization type based on content and name"""
-        content_lower = content.lower()
-        name_lower = name.lower()
-
-        # Define keywords for each type
-        type_keywords = {
-            OrgType.FRATERNITY: ['fraternity', 'frat', 'brotherhood', 'alpha', 'beta', 'gamma', 'delta', 'sigma', 'phi', 'psi'],
-            OrgType.SORORITY: ['sorority', 'sisterhood', 'alpha', 'beta', 'gamma', 'delta', 'sigma', 'phi', 'psi'],
-            OrgType.PROFESSIONAL: ['professional', 'career', 'industry', 'business', 'consulting', 'finance', 'tech', 'engineering'],
-            OrgType.ACADEMIC: ['academic', 'honor', 'research', 'study', 'scholar', 'education'],
-            OrgType.SERVICE: ['service', 'volunteer', 'community', 'charity', 'outreach', 'giving'],
-            OrgType.RECREATIONAL: ['recreational', 'sports', 'fitness', 'gaming', 'hobby', 'outdoor'],
-            OrgType.RELIGIOUS: ['religious', 'faith', 'christian', 'muslim', 'jewish', 'hindu', 'buddhist', 'spiritual'],
-            OrgType.CULTURAL: ['cultural', 'heritage', 'ethnic', 'international', 'diversity', 'multicultural']
-        }
-
-        # Check name and content for type indicators
-        for org_type, keywords in type_keywords.items():
-            if any(keyword in name_lower or keyword in content_lower for keyword in keywords):
-                return org_type
-
-        return OrgType.CLUB  # Default to club
+        """Determine organization type based on content and name (weighted keyword scores)"""
+        return org_classifier.classify(content, name)
 
     def _extract_requirements(self, content: str) -> Optional[str]:
         """Extract application requirements"""
-        patterns = [
-            r'(?:requirements|qualifications|eligibility)[^.]*?([^.]{20,200}\.)',
-            r'(?:to apply|application)[^.]*?(?:must|need|require)[^.]*?([^.]{20,150}\.)'
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, content, re.IGNORECASE | re.DOTALL)
-            if match:
-                requirements = match.group(1).strip()
-                requirements = re.sub(r'<[^>]+>', '', requirements)
-                requirements = re.sub(r'\s+', ' ', requirements)
-                return requirements
-
-        return None
+        return extract_fields(content).requirements
 
     def _extract_deadline(self, content: str) -> Optional[str]:
         """Extract application deadline"""
-        # Look for date patterns near deadline keywords
-        deadline_pattern = r'(?:deadline|due|apply by)[^.]*?(\d{1,2}[/-]\d{1,2}[/-]\d{2,4}|\w+ \d{1,2},? \d{4})'
-        match = re.search(deadline_pattern, content, re.IGNORECASE)
-
-        if match:
-            return match.group(1).strip()
-
-        return None
\ No newline at end of file
+        return extract_fields(content).deadline
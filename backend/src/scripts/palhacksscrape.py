@@ -1,77 +1,139 @@
-from playwright.sync_api import sync_playwright
 from html.parser import HTMLParser
-import re
-
-def process(URL):
+import asyncio
+import os
+import sys
+
+# Add src directory to path (browser_pool lives there; this file also runs as a script)
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import browser_pool
+import page_loading
+from crawl_frontier import CrawlFrontier, HostPoliteness, RobotsCache
+from fetch_cache import FetchCache
+from tiered_fetch import TieredFetcher
+
+MAX_SUBPAGES = int(os.getenv("CRAWL_MAX_SUBPAGES", "4"))  # landing + 4 pages to avoid crazy wait times
+MAX_DEPTH = int(os.getenv("CRAWL_MAX_DEPTH", "1"))  # links followed from the landing page only
+CRAWL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", "4"))  # subpages loading at once
+PAGE_TIMEOUT_S = float(os.getenv("CRAWL_PAGE_TIMEOUT_S", "20"))  # per subpage
+CRAWL_BUDGET_S = float(os.getenv("CRAWL_BUDGET_S", "45"))  # all subpages together
+
+# Plain HTTP first, Chromium only for sites that need it (remembered per domain).
+# Created on first use: it must live on the scrape loop (browser_pool.shared_loop), where process_async runs.
+_fetcher = None
+# Shared by every crawl in the process, so bulk crawls respect per-host limits together
+_politeness = None
+_robots = RobotsCache()
+
+def _get_fetcher():
+    global _fetcher
+    if _fetcher is None:
+        _fetcher = TieredFetcher(tiers=("http", "browser"), cache=FetchCache(), cache_namespace="page")
+    return _fetcher
+
+def _new_frontier(URL):
+    global _politeness
+    if _politeness is None:
+        _politeness = HostPoliteness()
+    return CrawlFrontier(URL, max_depth=MAX_DEPTH, max_pages=1 + MAX_SUBPAGES,
+                         http=_get_fetcher().http, robots=_robots, politeness=_politeness)
+
+
+async def _scrape_subpage(context, link_to_scrape, timeout_s, strategy):
+    page = await context.new_page()
+    try:
+        await page_loading.goto(page, link_to_scrape, strategy=strategy, timeout_s=timeout_s) #waits for js to finish loading
+        text = await page.inner_text("body", timeout=timeout_s*1000)
+        html = await page.content()
+        return text.replace("\n", " "), html, page.url
+    finally:
+        await page.close()
+
+
+async def _fetch_subpage(link_to_scrape, timeout_s):
+    result = await _get_fetcher().fetch(link_to_scrape)
+    return result.text.replace("\n", " "), result.html, result.final_url
+
+
+async def crawl_subpages(context, frontier, concurrency=CRAWL_CONCURRENCY,
+                         page_timeout_s=PAGE_TIMEOUT_S, budget_s=CRAWL_BUDGET_S,
+                         strategy=page_loading.LOAD_STRATEGY):
+    """
+    Crawl the links queued in `frontier` (see crawl_frontier: dedup, depth / page
+    budget, robots.txt, per-host limits), at most `concurrency` at a time: as tabs
+    of the given browser context, or through the tiered fetcher (plain HTTP) when
+    context is None. Each page gets `page_timeout_s`; whatever hasn't finished when
+    `budget_s` runs out is dropped. Returns the page texts in discovery order.
+    """
+    if context is None:
+        fetch = _fetch_subpage
+    else:
+        async def fetch(link, timeout_s):
+            return await _scrape_subpage(context, link, timeout_s, strategy)
+
+    pages = await frontier.crawl(fetch, concurrency=concurrency,
+                                 page_timeout_s=page_timeout_s, budget_s=budget_s)
+    return [text for _, text in pages]
+
+
+async def process_async(URL, strategy=page_loading.LOAD_STRATEGY, block=True):
+    """
+    strategy: how long to wait on each page (see page_loading.LOAD_STRATEGIES).
+    block: skip images / media / fonts and analytics domains (see page_loading.block_resources).
+    Static sites are fetched over plain HTTP; Chromium is only used when the landing
+    page needs rendering (see tiered_fetch).
+    Returns the landing page and subpage texts, one per line.
+    """
     #URL = "https://txproduct.org/"
 
     results = []
-
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-        page.goto(URL,wait_until="networkidle") #waits for js to finish loading
-        html = page.content()
-        text = page.inner_text("body")
-        clean_text = text.replace("\n", " ")
-        results.append(clean_text)
-        browser.close()
-
-    pattern = re.compile(
-        r'<a\b[^>]*\bhref\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+))',
-        re.IGNORECASE
-    )
-
-    crawled_urls = set()
-
-    for m in pattern.finditer(html):
-        #print(m.groups())
-
-        if (m.groups() and m.groups()[0]):
-            processed_url = None
-            url = m.groups()[0]
-            if (url[0] == "/"):
-                processed_url = url[1:]
-            if (processed_url):
-                #print(processed_url)
-                crawled_urls.add(processed_url)
-            #print(m.groups()[0])
-        #print(m.start(), next(g for g in m.groups() if g))
-
-    #print(crawled_urls)
-    crawled_urls = list(crawled_urls)
-    expanded_urls = [URL]
-    for url in crawled_urls:
-        expanded_urls.append(URL+url)
-    print(expanded_urls)
-
-    #first value in the expanded urls is the one we visited in default.
-    #scrape all other sublinks for info as well
-
-
-
-
-
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-        #max of 5 links to scrape to avoid crazy wait times
-        for i in range(1, min(5,len(expanded_urls))):
-            link_to_scrape = expanded_urls[i]
-            try:
-                page.goto(link_to_scrape,wait_until="networkidle") #waits for js to finish loading
-                html = page.content()
-                text = page.inner_text("body")
-                clean_text = text.replace("\n", " ")
-                results.append(clean_text)
-            except Exception as e:
-                print(f"Failed {link_to_scrape}: {e}")
-        browser.close()
-
-    with open("./scraped_results.txt", "w", encoding="utf-8") as f:
-        f.write("\n".join(results))
-
-    print("Results exported to scraped_results.txt")
+    frontier = _new_frontier(URL)
+
+    landing = None
+    if _get_fetcher().memory.winner(TieredFetcher.domain(URL), "fetch-tier") != "browser":
+        try:
+            landing = await _get_fetcher().fetch(URL, tiers=("http",))
+        except Exception as e:
+            print(f"Plain HTTP not enough for {URL} ({e}); rendering")
+
+    if landing is not None:
+        results.append(landing.text.replace("\n", " "))
+        frontier.mark_visited(URL, landing.final_url)
+        frontier.add_links(landing.html, landing.final_url, depth=1, outline=landing.outline)
+        #scrape all other sublinks for info as well, several at once
+        results.extend(await crawl_subpages(None, frontier))
+    else:
+        # One pooled, already-running browser for the landing page and the subpages
+        async with browser_pool.page() as page:
+            if block:
+                await page_loading.block_resources(page.context)  # applies to the subpage tabs too
+            await page_loading.goto(page, URL, strategy=strategy) #waits for js to finish loading
+            html = await page.content()
+            text = await page.inner_text("body")
+            clean_text = text.replace("\n", " ")
+            results.append(clean_text)
+            _get_fetcher().memory.remember(TieredFetcher.domain(URL), "fetch-tier", "browser")
+            frontier.mark_visited(URL, page.url)
+            frontier.add_links(html, page.url, depth=1)
+
+            #scrape all other sublinks for info as well, several tabs at once
+            results.extend(await crawl_subpages(page.context, frontier, strategy=strategy))
+
+    return "\n".join(results)
+
+
+def process(URL, out=None):
+    """
+    Blocking entry point: runs the scrape on the shared scrape loop (see browser_pool),
+    so repeated calls in one process don't launch Chromium again.
+    Returns the text; also writes it to `out` if given.
+    """
+    text = browser_pool.run(process_async(URL))
+    if out:
+        with open(out, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"Results exported to {out}")
+    return text
 
 if __name__ == "__main__":
     import argparse
@@ -79,4 +141,5 @@ if __name__ == "__main__":
     parser.add_argument("--url", required=True)
     parser.add_argument("--out", default="scraped_results.txt")
     args = parser.parse_args()
-    process(args.url)  # writes args.out as you already do (or pass args.out into process if you like)
\ No newline at end of file
+    process(args.url, out=args.out)
+    browser_pool.shutdown()
@@ -1,19 +1,21 @@
 # server.py
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
-from dotenv import load_dotenv
 from typing import Optional
 import os
+import sys
+import asyncio
 import logging
-import requests
-from requests.adapters import HTTPAdapter
-# imports (fix Retry)
-from urllib3.util.retry import Retry  # <-- instead of: from urllib3 import Retry
-from urllib.parse import urlparse
-import foundry_sdk
 from contextlib import asynccontextmanager
 # third-party module in your repo; ensure it's importable
 import testing  # make sure PYTHONPATH includes this package/module
+import foundry_client
+from jobs import JobQueue, QueueFull
+import dataset_responses
+import browser_pool
+import scrape_workers
+from response_cache import CachedResponse, ResponseCache, etag_matches
 import pandas as pd
 import numpy as np
 import json
@@ -32,23 +34,20 @@ PIPELINE_RID: str
 FOUNDRY_HOSTNAME: str
 FOUNDRY_TOKEN: str
 BASE_URL: str
-client: foundry_sdk.FoundryClient
-http: requests.Session
+foundry: foundry_client.FoundryClient
+job_queue: JobQueue
 
-def _base_url(host: str) -> str:
-    if not host:
-        raise RuntimeError("FOUNDRY_HOSTNAME is empty")
-    if "://" in host:
-        p = urlparse(host)
-        return f"{p.scheme or 'https'}://{p.netloc or p.path}".rstrip("/")
-    return f"https://{host}".rstrip("/")
+# Serialized /get_dataset responses, keyed by request + the dataset's transaction
+response_cache = ResponseCache()
+EMPTY_RESPONSE_TTL_S = 15  # empty results carry an X-ETA-Seconds header; keep it roughly current
+STREAM_CACHE_MAX_BYTES = 8 * 1024 * 1024  # bigger streamed results are sent uncached
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     global BRANCH_NAME, TXT_INPUT_DATASET_RID, IMG_INPUT_DATASET_RID
     global QNA_DATASET_RID, SUMMARY_DATASET_RID, GENERAL_DATASET_RID, EVENT_DATASET_RID
     global EVENT_JOB_RID, PIPELINE_RID, FOUNDRY_HOSTNAME, FOUNDRY_TOKEN, BASE_URL
-    global client, http
+    global foundry, job_queue
 
     # IDs / constants
     BRANCH_NAME = "master"
@@ -61,16 +60,12 @@ async def lifespan(app: FastAPI):
     PIPELINE_RID        = "ri.eddie.main.pipeline.022569bf-ebb4-4e92-bb92-9f5f9bc526cf"
 
     # env
-    load_dotenv()
-    FOUNDRY_HOSTNAME = os.getenv("FOUNDRY_HOSTNAME", "")
-    FOUNDRY_TOKEN    = os.getenv("FOUNDRY_TOKEN", "")
+    config = foundry_client.load_config()
+    FOUNDRY_HOSTNAME = config["hostname"]
+    FOUNDRY_TOKEN    = config["token"]
+    BASE_URL         = config["base_url"]
     EVENT_JOB_RID    = os.getenv("EVENT_JOB_RID")
 
-    if not FOUNDRY_HOSTNAME or not FOUNDRY_TOKEN:
-        raise RuntimeError("Set FOUNDRY_HOSTNAME and FOUNDRY_TOKEN in env/.env")
-
-    BASE_URL = _base_url(FOUNDRY_HOSTNAME)
-
     # logging
     logging.basicConfig(
         level=logging.INFO,
@@ -79,26 +74,24 @@ async def lifespan(app: FastAPI):
     )
     log.info("Server starting; branch=%s", BRANCH_NAME)
 
-    # robust HTTP session
-    retry = Retry(connect=1, backoff_factor=0.5)
-    adapter = HTTPAdapter(max_retries=retry)
-    http = requests.Session()
-    http.mount("https://", adapter)
+    # One pooled Foundry client on the server's own loop, shared with testing.*;
+    # endpoint work runs in threads and submits its requests back onto this loop
+    foundry = foundry_client.connect(config, loop=asyncio.get_running_loop())
+    testing.setup(foundry)
 
-    # foundry client
-    client = foundry_sdk.FoundryClient(
-        auth=foundry_sdk.UserTokenAuth(FOUNDRY_TOKEN),
-        hostname=FOUNDRY_HOSTNAME,
-    )
+    # Scrape + upload jobs run here, a few at a time, off the request threadpool
+    job_queue = JobQueue(name="push-file")
 
     # IMPORTANT: hand control back to Starlette/Uvicorn
-    testing.setup()
-
     try:
         yield
     finally:
+        job_queue.shutdown()
+        await asyncio.to_thread(browser_pool.shutdown)
+        if "main" in sys.modules:  # CLI helpers imported into this process: stop their build coalescers
+            await asyncio.to_thread(sys.modules["main"].shutdown)
         try:
-            http.close()
+            await foundry.aio.aclose()
         except Exception:
             pass
 
@@ -115,26 +108,68 @@ class PushFileIn(BaseModel):
     file_name: str
     url: Optional[str] = None  # required if kind == "text"
 
-@app.post("/push_file")
-def push_file(payload: PushFileIn):  # <-- sync endpoint
+def _push_text(file_name: str, url: str) -> dict:
+    testing.push_file(TXT_INPUT_DATASET_RID, file_name, url)
+    return {"message": "text file uploaded", "file_name": file_name,
+            "eta_seconds": testing.upload_eta(file_name, "text_rows")}
+
+def _push_image(file_name: str) -> dict:
+    testing.upload_image_to_media_set(IMG_INPUT_DATASET_RID, file_name)
+    return {"message": "image uploaded", "file_name": file_name,
+            "eta_seconds": testing.upload_eta(file_name, "image_rows")}
+
+@app.post("/push_file", status_code=202)
+async def push_file(payload: PushFileIn):
+    """
+    Queue the scrape/upload and return a job ID right away; poll /jobs/{job_id}.
+    """
     if payload.kind == "text":
         if not payload.url:
             raise HTTPException(status_code=400, detail="url is required for kind='text'")
-        # blocks until scraper finished and file uploaded
-        testing.push_file(TXT_INPUT_DATASET_RID, payload.file_name, payload.url)
-        return {"message": "text file uploaded", "file_name": payload.file_name}
-
+        fn, params = _push_text, {"file_name": payload.file_name, "url": payload.url}
     elif payload.kind == "image":
-        testing.upload_image_to_media_set(IMG_INPUT_DATASET_RID, payload.file_name)
-        return {"message": "image uploaded", "file_name": payload.file_name}
-
+        fn, params = _push_image, {"file_name": payload.file_name}
     else:
         raise HTTPException(status_code=400, detail="kind must be 'text' or 'image'")
 
+    try:
+        job = job_queue.submit(payload.kind, fn, **params)
+    except QueueFull as e:
+        raise HTTPException(status_code=503, detail=f"Too many uploads in progress ({e}); retry shortly")
+    return {"message": "queued", "job_id": job.id, "status": job.status,
+            "status_url": f"/jobs/{job.id}", "result_url": f"/jobs/{job.id}/result"}
+
+def _get_job(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'")
+    return job
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    job = _get_job(job_id)
+    body = job.to_dict()
+    if not job.done:
+        kind = "text_rows" if job.kind == "text" else "image_rows"
+        body["eta_seconds"] = testing.upload_eta(job.params["file_name"], kind)
+    return body
+
+@app.get("/jobs/{job_id}/result")
+async def job_result(job_id: str):
+    job = _get_job(job_id)
+    if not job.done:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}; poll /jobs/{job_id}")
+    if job.error is not None:
+        raise HTTPException(status_code=500, detail=job.error)
+    return job.result
+
 @app.post("/generate_txt")
-def generate_txt(URL):
-    testing.run_scraper(URL)
-    return {"message":"File generated"}
+async def generate_txt(URL):
+    # unique file per request: concurrent calls no longer overwrite each other
+    name = scrape_workers.output_name(URL)
+    text = await scrape_workers.shared_scrapers().scrape_async(URL)
+    path = await asyncio.to_thread(scrape_workers.write_output, text, name)
+    return {"message":"File generated", "file_name": name, "path": str(path), "chars": len(text)}
 
 class GetDatasetIn(BaseModel):
     dataset: str  # "qna" | "general" | "summary" | "events"
@@ -142,27 +177,101 @@ class GetDatasetIn(BaseModel):
     org_name: str
 
 
-def df_records_json_safe(df: pd.DataFrame):
+def df_records_json_bytes(df: pd.DataFrame) -> bytes:
+    """Rows as a JSON array, left as text (no parse + re-serialize); inf/NaN -> null."""
     df = df.replace([np.inf, -np.inf], np.nan)
-    return json.loads(df.to_json(orient="records"))  # NaN -> null
+    return df.to_json(orient="records").encode()  # NaN -> null
+
+
+async def dataset_version(dataset_rid: str) -> Optional[str]:
+    """Latest transaction RID on BRANCH_NAME, or None if it can't be looked up."""
+    try:
+        branch = await foundry.aio.get_branch(dataset_rid, BRANCH_NAME)
+    except Exception as e:
+        log.warning("[get_dataset] version lookup failed for %s, not caching: %s", dataset_rid, e)
+        return None
+    return branch.get("transactionRid")
+
+
+def cached_response(entry: CachedResponse, request: Request) -> Response:
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type=entry.media_type, headers={**entry.headers, **headers})
 
 
 @app.post("/get_dataset")
-def get_dataset(payload: GetDatasetIn):
+async def get_dataset(payload: GetDatasetIn, request: Request):
+    """
+    Rows for one file / org. JSON by default; send Accept: application/x-ndjson or
+    application/vnd.apache.arrow.stream to get the rows streamed batch by batch.
+    Responses are cached per dataset transaction and carry an ETag; repeat polls
+    with If-None-Match get a 304 until the dataset changes.
+    """
     ds = payload.dataset.lower()
     if ds == "qna":
-        df = testing.get_output_table(QNA_DATASET_RID, payload.file_name, payload.org_name)
+        rid = QNA_DATASET_RID
     elif ds == "general":
-        df = testing.get_output_table(GENERAL_DATASET_RID, payload.file_name, payload.org_name)
+        rid = GENERAL_DATASET_RID
     elif ds == "summary":
-        df = testing.get_output_table(SUMMARY_DATASET_RID, payload.file_name, payload.org_name)
+        rid = SUMMARY_DATASET_RID
     elif ds == "events":
-        df = testing.get_output_table(EVENT_DATASET_RID, payload.file_name, payload.org_name)
+        rid = EVENT_DATASET_RID
     else:
         raise HTTPException(status_code=400, detail="dataset must be one of qna|general|summary|events")
-    rows = df_records_json_safe(df)
+    kind = "image_rows" if ds == "events" else "text_rows"
+    media_type = dataset_responses.negotiate(request.headers.get("accept"))
+
+    version = await dataset_version(rid)
+    key = (rid, payload.file_name, payload.org_name, media_type, version)
+    if version:
+        entry = response_cache.get(key)
+        if entry is not None:
+            return cached_response(entry, request)
+
+    table = await asyncio.to_thread(testing.get_output_arrow, rid, payload.file_name, payload.org_name, version)
+    empty = table.num_rows == 0
+    headers = {"X-Row-Count": str(table.num_rows)}
+    if empty:
+        # Pipeline likely hasn't caught up yet; tell the client when to come back
+        eta = testing.upload_eta(payload.file_name, kind)
+        if eta is not None:
+            headers["X-ETA-Seconds"] = f"{eta:.0f}"
+    ttl_s = EMPTY_RESPONSE_TTL_S if empty else None
+
+    if media_type != dataset_responses.MEDIA_JSON:
+        encode = (dataset_responses.iter_ndjson if media_type == dataset_responses.MEDIA_NDJSON
+                  else dataset_responses.iter_arrow_ipc)
+        chunks = encode(table)
+        if version:
+            chunks = _tee_to_cache(chunks, key, media_type, headers, ttl_s)
+        return StreamingResponse(chunks, media_type=media_type, headers=headers)
+
     # valid orientations: 'records', 'index', 'split', 'list', 'dict', 'tight', 'series'
-    return {"message": "Dataset located", "rows": rows}
+    rows = await asyncio.to_thread(lambda: df_records_json_bytes(table.to_pandas()))
+    body = b'{"message": "Dataset located", "rows": ' + rows + b"}"
+    entry = CachedResponse(body, media_type, headers)
+    if version:
+        response_cache.put(key, entry, ttl_s=ttl_s)
+    return cached_response(entry, request)
+
+
+def _tee_to_cache(chunks, key, media_type: str, headers: dict, ttl_s: Optional[float]):
+    """
+    Pass streamed chunks through, keeping a copy for the response cache until the
+    body passes STREAM_CACHE_MAX_BYTES; only a complete, small body is cached.
+    """
+    kept, size = [], 0
+    for chunk in chunks:
+        if kept is not None:
+            size += len(chunk)
+            if size > STREAM_CACHE_MAX_BYTES:
+                kept = None
+            else:
+                kept.append(chunk)
+        yield chunk
+    if kept is not None:
+        response_cache.put(key, CachedResponse(b"".join(kept), media_type, headers), ttl_s=ttl_s)
 
 if __name__ == "__main__":
     import uvicorn
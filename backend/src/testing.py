@@ -4,28 +4,33 @@ import io
 import time
 from pathlib import Path
 import logging
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 import numpy as np
 from typing import Optional, Dict, Any
-from urllib.parse import urlparse
 import json
 
-from dotenv import load_dotenv
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 import foundry_sdk
 import subprocess
 import sys
 import asyncio
 import inspect
 
-from scripts.palhacksscrape import process  # import function
+import scrape_workers
+import foundry_client
+import foundry_tables
+from dataset_cache import DatasetCache
+import polling
 # =========================
 # Config / Environment
 # =========================
 
-def setup():
+def setup(foundry_shared: Optional[foundry_client.FoundryClient] = None):
+    """
+    Pass the server's shared FoundryClient to reuse its connection pool;
+    without one, a client with its own loop thread is started.
+    """
     global BRANCH_NAME
     global TXT_INPUT_DATASET_RID
     global IMG_INPUT_DATASET_RID
@@ -39,12 +44,10 @@ def setup():
     global FOUNDRY_TOKEN
     global HTTPS_PROXY
     global client
+    global foundry
+    global dataset_cache
+    global poll_scheduler
     global log
-    global HEADERS_OCTET
-    global http
-    global PROXIES
-    global ORCH_HEADERS_JSON
-    global host
     
     global BASE_URL
     global IMAGE_FILE_NAME
@@ -70,14 +73,11 @@ def setup():
     PIPELINE_RID = "ri.eddie.main.pipeline.022569bf-ebb4-4e92-bb92-9f5f9bc526cf"
 
     # .env (FOUNDRY_HOSTNAME, FOUNDRY_TOKEN, optional HTTPS_PROXY)
-    load_dotenv()
-    FOUNDRY_HOSTNAME = os.getenv("FOUNDRY_HOSTNAME")  # e.g. "waypoint-envoy.rubix-system.svc.cluster.local:8443"
-    FOUNDRY_TOKEN    = os.getenv("FOUNDRY_TOKEN")
-    HTTPS_PROXY      = os.getenv("HTTPS_PROXY", None)  # optional
-    
-    if not FOUNDRY_HOSTNAME or not FOUNDRY_TOKEN:
-        raise RuntimeError("Please set FOUNDRY_HOSTNAME and FOUNDRY_TOKEN in your environment or .env file.")
-    BASE_URL = _base_url(FOUNDRY_HOSTNAME)
+    config = foundry_client.load_config()
+    FOUNDRY_HOSTNAME = config["hostname"]  # e.g. "waypoint-envoy.rubix-system.svc.cluster.local:8443"
+    FOUNDRY_TOKEN    = config["token"]
+    HTTPS_PROXY      = config["proxy"]  # optional
+    BASE_URL         = config["base_url"]
 
     
 
@@ -93,34 +93,18 @@ def setup():
     log = logging.getLogger("main")
 
     # =========================
-    # HTTP session (docs pattern)
+    # Foundry clients
     # =========================
-    retry = Retry(connect=1, backoff_factor=0.5)
-    adapter = HTTPAdapter(max_retries=retry)
-    http = requests.Session()
-    http.mount("https://", adapter)
-
-    HEADERS_OCTET = {
-        "Authorization": f"Bearer {FOUNDRY_TOKEN}",
-        "Content-type": "application/octet-stream",  # IMPORTANT
-    }
-    PROXIES = {"https": HTTPS_PROXY} if HTTPS_PROXY else None
+    # Uploads and reads share one pooled connection set (see foundry_client)
+    foundry = foundry_shared or foundry_client.connect(config)
 
-    # =========================
-    # Foundry SDK client (for pipeline + reads)
-    # =========================
+    # Foundry SDK client (for pipeline runs)
     client = foundry_sdk.FoundryClient(
         auth=foundry_sdk.UserTokenAuth(FOUNDRY_TOKEN),
         hostname=FOUNDRY_HOSTNAME,
     )
-
-    # ===== One-off Build (no schedules) =====
-    ORCH_HEADERS_JSON = {
-        "Authorization": f"Bearer {FOUNDRY_TOKEN}",
-        "Content-Type": "application/json",
-    }
-
-    host = _normalize_hostname(FOUNDRY_HOSTNAME)
+    dataset_cache = DatasetCache(foundry, BRANCH_NAME)
+    poll_scheduler = polling.shared_scheduler()
 
 
 
@@ -129,64 +113,41 @@ def setup():
 #TESTING
 
 # --- Upload a file into the filesystem-backed dataset ---
-def _normalize_hostname(h: str) -> str:
-    h = h.strip()
-    if h.startswith("https://"):
-        h = h[len("https://"):]
-    if h.endswith("/"):
-        h = h[:-1]
-    return h
 
 
 
 
 
-def run_scraper(URL: str, out_name: str):
-    script = Path(__file__).parent / "scripts" / "palhacksscrape.py"
-    cmd = [sys.executable, str(script), "--url", URL, "--out", out_name]
-    res = subprocess.run(cmd, capture_output=True, text=True)
-    if res.returncode != 0:
-        raise RuntimeError(f"Scraper failed ({res.returncode}): {res.stderr.strip() or res.stdout.strip()}")
-    
-    
-    
+def run_scraper(URL: str, out_name: Optional[str] = None, out_dir: Optional[str] = None) -> str:
+    """
+    Scrape in-process on the shared scraper pool and return the text.
+    With out_name or out_dir (or SCRAPE_OUTPUT_DIR set) the text is also written
+    to a file; out_dir alone gets a unique name, so concurrent scrapes don't collide.
+    """
+    try:
+        text = scrape_workers.shared_scrapers().scrape(URL)
+    except Exception as e:
+        raise RuntimeError(f"Scraper failed: {e}") from e
+    if out_name or out_dir or scrape_workers.SCRAPE_OUTPUT_DIR:
+        path = scrape_workers.write_output(text, out_name or scrape_workers.output_name(URL), out_dir)
+        print(f"Results exported to {path}")
+    return text
 
 
 def push_file(dataset_rid, name, URL):
     
     dataset_rel_path = name  # path within dataset (no ./)
 
-    run_scraper(URL, name)
-    _wait_for_file(f"./{dataset_rel_path}")
-
-    url = f"https://{host}/api/v1/datasets/{dataset_rid}/files:upload"
-    params = {"filePath": dataset_rel_path}
-
-    with open(f"./{dataset_rel_path}", "rb") as f:
-        data = f.read()
+    text = run_scraper(URL)
 
-    resp = http.post(  # use the session with retries you configured
-        url,
-        params=params,
-        data=data,
-        headers=HEADERS_OCTET,
-        proxies=PROXIES,      # <- only if HTTPS_PROXY is set
-        timeout=60
-    )
+    # straight from memory, over the shared pool with its retry policy
+    resp = foundry.upload_file(dataset_rid, dataset_rel_path, text.encode("utf-8"))
     print(resp.status_code, resp.text)
-    resp.raise_for_status()
+    foundry_client.raise_for_status(resp, "upload")
+    _track_upload(dataset_rel_path, "text_rows")
 
 import time
 
-def _wait_for_file(path: str, timeout: float = 60.0):
-    p = Path(path)
-    deadline = time.time() + timeout
-    while time.time() < deadline:
-        if p.exists() and p.stat().st_size > 0:
-            return
-        time.sleep(0.2)
-    raise TimeoutError(f"File not created in time: {p}")
-
 # WE SENT THE TXT FILE SUCCESSFULLY
 # NOW CANT FIGURE OUT WHEN THE PIPELINE IS FINISHED BUILDING
 # SO INSTEAD JUST SKIP IT AND CHECK THE RESULT LATER
@@ -203,65 +164,73 @@ def try_json(resp):
         f"Preview: {resp.text[:200]}"
     )
 
-def _read_tabular_sdk(dataset_rid: str, columns=None) -> pd.DataFrame:
+def _read_tabular_sdk(dataset_rid: str, columns=None, filters=None) -> pd.DataFrame:
     """
-    Same approach as main.py: stream CSV bytes via SDK, then parse with pandas.
+    Same approach as main.py: stream Arrow record batches, then convert to pandas.
+    Goes through dataset_cache so repeat reads of an unchanged table skip the download.
+    `filters` are pushed down to Foundry SQL where the tenant supports it (see foundry_tables).
     """
-    stream = client.datasets.Dataset.read_table(
-        dataset_rid,
-        branch_name=BRANCH_NAME,
-        format="CSV",
-        columns=columns,
-    )
-    buf = bytearray()
-    if isinstance(stream, (bytes, bytearray)):
-        buf.extend(stream)
+    return dataset_cache.get_dataframe(dataset_rid, columns=columns, filters=filters)
+
+
+def get_output_arrow(output_table_rid: str, file_name: str, org_name: str,
+                     txn=foundry_tables.RESOLVE_TXN) -> pa.Table:
+    """
+    get_output_table as Arrow: same rows, no pandas copy. The server streams this
+    batch by batch; pass `txn` when the branch was already resolved.
+    """
+    columns = foundry_tables.table_columns(foundry, output_table_rid, BRANCH_NAME, txn)
+    print(columns)
+    # Only this org's / file's rows come over the wire; the exact match below still applies
+
+    if ("org_name" in columns):
+        table = dataset_cache.get_table(output_table_rid, filters=[("org_name", "prefix", org_name)], txn=txn)
+        # First line of org_name only, as in the sheet
+        col = "org_name"
+        short = pc.replace_substring_regex(pc.cast(table[col], pa.string()), r"(?s)\n.*", "")
+        value = org_name
     else:
-        for chunk in stream:
-            if isinstance(chunk, (bytes, bytearray)):
-                buf.extend(chunk)
-            elif isinstance(chunk, int):
-                buf.append(chunk)
-            else:
-                buf.extend(bytes(chunk))
-    return pd.read_csv(io.BytesIO(buf))
+        # Shortens the file path so that it just shows the actual file name
+        table = dataset_cache.get_table(output_table_rid, filters=[("path", "suffix", file_name)], txn=txn)
+        col = "path"
+        short = pc.replace_substring_regex(pc.cast(table[col], pa.string()), r".*/", "")
+        value = file_name
+    table = table.set_column(table.schema.get_field_index(col), col, short)
+    filtered = table.filter(pc.fill_null(pc.equal(short, value), False))
+    print(filtered.slice(0, 5).to_pandas())
+    if filtered.num_rows:
+        _finish_upload(file_name)
+    return filtered
 
 
 def get_output_table(output_table_rid: str, file_name: str, org_name: str) -> pd.DataFrame:
-    df = _read_tabular_sdk(output_table_rid)
-    print(df.columns)
-    # Shortens the file path so that it just shows the actual file name
-
-    #print(org_name)
-    if ("org_name" in df.columns):
-        
-        
-        df["org_name"] = df["org_name"].astype(str).str.split("\n").str[0]
-        #print(df.head())
-        filtered_df = df[df["org_name"] == org_name]
-    else:
-        df["path"] = df["path"].astype(str).str.split("/").str[-1]
-        filtered_df = df[df["path"] == file_name]
-    print(filtered_df.head())
-    return filtered_df
+    return get_output_arrow(output_table_rid, file_name, org_name).to_pandas()
 
 
+# Upload -> rows-visible durations. Learned from the first get_output_table call that sees
+# rows, so it is an upper bound when clients poll slowly.
+_pending_uploads = {}
 
+def _track_upload(file_name: str, kind: str):
+    _pending_uploads[file_name] = poll_scheduler.start(kind, token=file_name)
 
+def _finish_upload(file_name: str):
+    timer = _pending_uploads.pop(file_name, None)
+    if timer is not None:
+        timer.finish()
 
-# IMAGES
+def upload_eta(file_name: str, kind: str = "text_rows") -> Optional[float]:
+    """
+    Predicted seconds until rows for this upload show up in the outputs (None if unknown).
+    """
+    return poll_scheduler.eta(kind, token=file_name)
 
-def _base_url(host: str) -> str:
-    if not host:
-        raise RuntimeError("FOUNDRY_HOSTNAME is empty")
-    if "://" in host:
-        p = urlparse(host)
-        return f"{p.scheme or 'https'}://{p.netloc or p.path}".rstrip("/")
-    return f"https://{host}".rstrip("/")
 
 
 
 
+# IMAGES
+
 def upload_image_to_media_set(media_set_rid: str, local_image_name: str, folder: str = "incoming") -> str:
     """
     Upload a local image file into the given Media Set.
@@ -275,18 +244,12 @@ def upload_image_to_media_set(media_set_rid: str, local_image_name: str, folder:
     
     media_item_path = f"{lp.name}"
 
-    url = f"{BASE_URL}/api/v2/mediasets/{media_set_rid}/items"
-    params = {
-        "mediaItemPath": media_item_path,
-        "preview": "true",
-        "branchName": BRANCH_NAME,
-    }
-
-    with lp.open("rb") as f:
-        resp = requests.post(url, params=params, data=f.read(), headers=HEADERS_OCTET, timeout=120)
+    # Streamed from disk over the shared pool (keep-alive, retries)
+    resp = foundry.upload_media_item(media_set_rid, media_item_path, lp, branch_name=BRANCH_NAME)
 
-    resp.raise_for_status()
+    foundry_client.raise_for_status(resp, "media upload")
     print(f"Upload OK — path={media_item_path}")
+    _track_upload(media_item_path, "image_rows")
 
     return media_item_path
 
@@ -0,0 +1,248 @@
+# tiered_fetch.py
+import os
+import re
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+import fetch_cache
+from fetch_cache import CacheEntry, FetchCache
+from html_scan import PageOutline, scan_html
+from payload_variants import VariantCache
+
+log = logging.getLogger("tiered_fetch")
+
+# Cheapest first
+TIERS = ("http", "browser", "firecrawl")
+
+DEFAULT_TIERS_PATH = os.getenv(
+    "FETCH_TIERS_PATH", str(Path.home() / ".cache" / "coffeechat" / "fetch_tiers.json")
+)
+HTTP_TIMEOUT_S = float(os.getenv("FETCH_HTTP_TIMEOUT_S", "15"))
+BROWSER_TIMEOUT_S = float(os.getenv("FETCH_BROWSER_TIMEOUT_S", "30"))
+MIN_TEXT_CHARS = int(os.getenv("FETCH_MIN_TEXT_CHARS", "200"))
+USER_AGENT = os.getenv(
+    "FETCH_USER_AGENT",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/124.0 Safari/537.36",
+)
+
+
+@dataclass
+class FetchResult:
+    url: str
+    html: str
+    text: str
+    tier: str
+    status: int = 200
+    final_url: str = ""
+    extra: dict = field(default_factory=dict)  # tier-specific payload (e.g. Firecrawl's "extract")
+    validators: dict = field(default_factory=dict)  # origin ETag / Last-Modified (see fetch_cache)
+    cached: bool = False
+    # title / headings / meta / links from the same pass that produced `text`
+    # (plain-HTTP results only; see html_scan)
+    outline: Optional[PageOutline] = field(default=None, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.final_url = self.final_url or self.url
+
+
+class EscalateError(Exception):
+    """This tier fetched the page but can't produce usable content."""
+
+
+# =========================
+# Heuristics
+# =========================
+_JS_REQUIRED = re.compile(
+    r"<noscript\b[^>]*>[^<]{0,300}?(?:enable|requires?|turn on)\s+javascript", re.IGNORECASE
+)
+_SPA_SHELLS = re.compile(
+    r'<div[^>]+id=["\'](?:root|app|__next|___gatsby|svelte)["\'][^>]*>\s*</div>'
+    r'|\bng-version=|<app-root\b|data-server-rendered=["\']false',
+    re.IGNORECASE,
+)
+
+
+def html_to_text(html: str) -> str:
+    """Visible-ish text of a document: scripts/styles dropped, tags stripped, whitespace collapsed."""
+    return scan_html(html).text
+
+
+def escalation_reason(html: str, text: str, min_text_chars: int = MIN_TEXT_CHARS) -> Optional[str]:
+    """
+    Why a plain-HTTP fetch isn't good enough (None if it is): almost no text,
+    a "please enable JavaScript" notice, or an empty SPA mount point.
+    """
+    if len(text) < min_text_chars:
+        return f"only {len(text)} chars of text"
+    if _JS_REQUIRED.search(html):
+        return "page asks for JavaScript"
+    if _SPA_SHELLS.search(html) and len(text) < min_text_chars * 5:
+        return "client-rendered app shell"
+    return None
+
+
+# =========================
+# Fetcher
+# =========================
+class TieredFetcher:
+    """
+    Fetch a page the cheapest way that yields real content.
+
+    Tiers, cheapest first: "http" (pooled GET, no JS), "browser" (pooled headless
+    Chromium, see browser_pool) and "firecrawl" (paid API; only if a `firecrawl`
+    coroutine is given). A tier whose result looks unrendered (escalation_reason) or
+    that fails hands over to the next one. The tier that worked is remembered per
+    domain on disk, so the next fetch from that site starts there.
+
+    With a `cache` (see fetch_cache), results are stored under `cache_namespace`:
+    fresh hits skip the network, stale ones are revalidated with a conditional GET
+    and only refetched when the origin says the page changed.
+
+    Use one instance per event loop (its HTTP pool is bound to the loop that uses it).
+    """
+
+    def __init__(self, firecrawl: Optional[Callable[[str], Awaitable[FetchResult]]] = None,
+                 tiers: tuple = TIERS,
+                 memory: Optional[VariantCache] = None,
+                 http_client: Optional[httpx.AsyncClient] = None,
+                 min_text_chars: int = MIN_TEXT_CHARS,
+                 cache: Optional[FetchCache] = None,
+                 cache_namespace: str = ""):
+        self.firecrawl = firecrawl
+        self.cache = cache
+        self.cache_namespace = cache_namespace
+        self.tiers = tuple(t for t in tiers if t != "firecrawl" or firecrawl is not None)
+        self.memory = memory or VariantCache(DEFAULT_TIERS_PATH)
+        self.min_text_chars = min_text_chars
+        self.http = http_client or httpx.AsyncClient(
+            follow_redirects=True,
+            timeout=httpx.Timeout(HTTP_TIMEOUT_S, connect=5.0),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            headers={"User-Agent": USER_AGENT, "Accept": "text/html,application/xhtml+xml"},
+        )
+
+    async def aclose(self) -> None:
+        await self.http.aclose()
+
+    @staticmethod
+    def domain(url: str) -> str:
+        return (urlparse(url).hostname or "").lower().removeprefix("www.")
+
+    async def fetch(self, url: str, tiers: Optional[tuple] = None) -> FetchResult:
+        """
+        `tiers` narrows the ladder for this call (e.g. ("http", "browser") for callers
+        that can't use Firecrawl's output). Raises the last error if every tier fails.
+        """
+        ladder = [t for t in self.tiers if tiers is None or t in tiers]
+        entry = None
+        if self.cache is not None:
+            entry = await asyncio.to_thread(self.cache.get, url, self.cache_namespace)
+            if entry is not None and entry.tier not in ladder:
+                entry = None
+            if entry is not None:
+                result = await self._from_cache(url, entry)
+                if result is not None:
+                    return result
+
+        remembered = self.memory.winner(self.domain(url), "fetch-tier")
+        if remembered in ladder:
+            ladder = ladder[ladder.index(remembered):]
+
+        last_err: Optional[Exception] = None
+        for tier in ladder:
+            try:
+                result = await getattr(self, f"_fetch_{tier}")(url)
+            except Exception as e:
+                log.info("[fetch] %s via %s failed, escalating: %s", url, tier, e)
+                last_err = e
+                continue
+            log.info("[fetch] %s via %s (%d chars)", url, tier, len(result.text))
+            self.memory.remember(self.domain(url), "fetch-tier", tier)
+            await self._store(result)
+            return result
+        raise last_err or RuntimeError(f"No fetch tier available for {url}")
+
+    # ---- cache ----
+    async def _from_cache(self, url: str, entry: CacheEntry) -> Optional[FetchResult]:
+        """A cached result if it is fresh or the origin confirms it unchanged; else None."""
+        if self.cache.fresh(entry):
+            log.info("[fetch] %s from cache (%s, %.0fs old)", url, entry.tier, entry.age_s())
+            return self._cached_result(entry)
+        if not entry.validators:
+            return None
+        try:
+            async with self.http.stream("GET", url, headers=fetch_cache.conditional_headers(entry.validators)) as resp:
+                if resp.status_code == 304:
+                    log.info("[fetch] %s revalidated (304), reusing %s result", url, entry.tier)
+                    await asyncio.to_thread(self.cache.refresh, entry)
+                    return self._cached_result(entry)
+                if entry.tier == "http" and resp.status_code == 200:
+                    await resp.aread()
+                    result = self._http_result(url, resp)  # changed: this response is the new copy
+                    await self._store(result)
+                    return result
+        except Exception as e:
+            log.info("[fetch] revalidating %s failed, refetching: %s", url, e)
+        return None
+
+    @staticmethod
+    def _cached_result(entry: CacheEntry) -> FetchResult:
+        return FetchResult(entry.url, entry.html, entry.text, entry.tier, entry.status,
+                           entry.final_url, dict(entry.extra), dict(entry.validators), cached=True)
+
+    async def _store(self, result: FetchResult) -> None:
+        if self.cache is None:
+            return
+        # No extra request for validators: the browser tier keeps its document response's,
+        # Firecrawl results have none and simply expire after the cache TTL.
+        entry = CacheEntry(result.url, self.cache_namespace, result.tier, result.html, result.text,
+                           result.status, result.final_url, result.extra, result.validators)
+        await asyncio.to_thread(self.cache.put, entry)
+
+    # ---- tiers ----
+    async def _fetch_http(self, url: str) -> FetchResult:
+        return self._http_result(url, await self.http.get(url))
+
+    def _http_result(self, url: str, resp: httpx.Response) -> FetchResult:
+        resp.raise_for_status()
+        if "html" not in resp.headers.get("content-type", "text/html"):
+            raise EscalateError(f"not HTML: {resp.headers.get('content-type')}")
+        html = resp.text
+        outline = scan_html(html, str(resp.url))
+        reason = escalation_reason(html, outline.text, self.min_text_chars)
+        if reason:
+            raise EscalateError(reason)
+        return FetchResult(url, html, outline.text, "http", resp.status_code, str(resp.url),
+                           validators=fetch_cache.validators(resp.headers), outline=outline)
+
+    async def _fetch_browser(self, url: str) -> FetchResult:
+        try:
+            import browser_pool  # Playwright is optional for API-only deployments
+            import page_loading
+        except ImportError as e:
+            raise EscalateError(f"browser tier unavailable: {e}")
+
+        async def _render() -> FetchResult:
+            async with browser_pool.page() as page:
+                await page_loading.block_resources(page.context)
+                resp = await page_loading.goto(page, url, timeout_s=BROWSER_TIMEOUT_S)
+                html = await page.content()
+                text = await page.inner_text("body")
+                return FetchResult(url, html, text, "browser",
+                                   resp.status if resp is not None else 200, page.url,
+                                   validators=fetch_cache.validators(resp.headers if resp is not None else None))
+
+        result = await browser_pool.run_async(_render())
+        if len(result.text.strip()) < self.min_text_chars and "firecrawl" in self.tiers:
+            raise EscalateError(f"only {len(result.text.strip())} chars after rendering")
+        return result
+
+    async def _fetch_firecrawl(self, url: str) -> FetchResult:
+        return await self.firecrawl(url)
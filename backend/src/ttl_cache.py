@@ -0,0 +1,87 @@
+# ttl_cache.py
+import os
+import time
+import logging
+import threading
+from typing import Any, Callable, Hashable, Iterable, Optional
+
+log = logging.getLogger("ttl_cache")
+
+DEFAULT_TTL_S = float(os.getenv("DISCOVERY_TTL_S", "600"))
+DEFAULT_STALE_S = float(os.getenv("DISCOVERY_STALE_S", "86400"))
+
+
+class StaleWhileRevalidateCache:
+    """
+    Small keyed cache for slow-changing lookups (e.g. which jobs build a dataset).
+
+    - younger than `ttl_s`: served from memory
+    - older, but younger than `ttl_s + stale_s`: served from memory while one
+      background thread refreshes it (callers never wait on the refresh)
+    - missing or older than that: loaded inline
+
+    `load(key)` does the real lookup. Results for which `keep(value)` is false
+    (default: empty ones) are returned but not cached, so a fix on the remote
+    side shows up on the next call. A failed background refresh keeps the stale value.
+    """
+
+    def __init__(self, load: Callable[[Hashable], Any],
+                 ttl_s: float = DEFAULT_TTL_S,
+                 stale_s: float = DEFAULT_STALE_S,
+                 keep: Callable[[Any], bool] = bool,
+                 name: str = "cache"):
+        self.load = load
+        self.ttl_s = ttl_s
+        self.stale_s = stale_s
+        self.keep = keep
+        self.name = name
+        self._entries: dict[Hashable, tuple[float, Any]] = {}
+        self._refreshing: set[Hashable] = set()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry[0]
+            if age < self.ttl_s:
+                return entry[1]
+            if age < self.ttl_s + self.stale_s:
+                self.refresh_async(key)
+                return entry[1]
+        return self._load(key)
+
+    def warm(self, keys: Iterable[Hashable]) -> None:
+        """Start loading `keys` in the background (e.g. at startup)."""
+        for key in keys:
+            self.refresh_async(key)
+
+    def refresh_async(self, key: Hashable) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        threading.Thread(target=self._refresh, args=(key,), name=f"{self.name}-refresh", daemon=True).start()
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def _load(self, key: Hashable) -> Any:
+        value = self.load(key)
+        if self.keep(value):
+            with self._lock:
+                self._entries[key] = (time.monotonic(), value)
+        return value
+
+    def _refresh(self, key: Hashable) -> None:
+        try:
+            self._load(key)
+        except Exception as e:
+            log.warning("[%s] background refresh of %s failed; keeping stale value: %s", self.name, key, e)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
@@ -0,0 +1,135 @@
+# uploads.py
+import io
+import os
+import asyncio
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Iterator, Optional, Union
+
+CHUNK_SIZE = 1024 * 1024
+UPLOAD_CONCURRENCY = int(os.getenv("UPLOAD_CONCURRENCY", "4"))
+
+# A path, an open binary file, raw bytes, or an (async) iterable of byte chunks (e.g. a generator)
+UploadSource = Union[str, os.PathLike, bytes, bytearray, Any, Iterable[bytes]]
+
+
+def source_name(source: UploadSource) -> str:
+    if isinstance(source, (str, os.PathLike)):
+        return str(source)
+    return getattr(source, "name", type(source).__name__)
+
+
+def is_replayable(source: UploadSource) -> bool:
+    """Can the body be sent again from the start if a transfer breaks?"""
+    if isinstance(source, (str, os.PathLike, bytes, bytearray)):
+        return True
+    seekable = getattr(source, "seekable", None)
+    return bool(seekable and seekable())
+
+
+def content_length(source: UploadSource) -> Optional[int]:
+    """
+    Body size in bytes when it is known up front: bytes, paths, and seekable files
+    (from their current position to the end). None for generators and pipes.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        return len(source)
+    if isinstance(source, (str, os.PathLike)):
+        return os.stat(source).st_size
+    if hasattr(source, "read") and is_replayable(source):
+        start = source.tell()
+        try:
+            return max(0, os.fstat(source.fileno()).st_size - start)
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            end = source.seek(0, os.SEEK_END)
+            source.seek(start)
+            return max(0, end - start)
+    return None
+
+
+def upload_headers(source: UploadSource) -> dict[str, str]:
+    """
+    Headers for an octet-stream upload of `source`. Sized sources get a Content-Length
+    (proxies and the upload endpoints want it); only unsized ones go out chunked.
+    """
+    headers = {"Content-Type": "application/octet-stream"}
+    size = content_length(source)
+    if size is not None:
+        headers["Content-Length"] = str(size)
+    return headers
+
+
+def _reslice(chunks: Iterable[bytes], chunk_size: int) -> Iterator[bytes]:
+    """Re-slice a chunk stream so no single piece handed to the socket exceeds chunk_size."""
+    for chunk in chunks:
+        view = memoryview(chunk)
+        for i in range(0, len(view), chunk_size):
+            yield view[i:i + chunk_size].tobytes()
+
+
+async def _aiter_file(f, chunk_size: int) -> AsyncIterator[bytes]:
+    while True:
+        chunk = await asyncio.to_thread(f.read, chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+async def _aiter_path(path: Path, chunk_size: int) -> AsyncIterator[bytes]:
+    f = await asyncio.to_thread(path.open, "rb")
+    try:
+        async for chunk in _aiter_file(f, chunk_size):
+            yield chunk
+    finally:
+        f.close()
+
+
+async def _aiter_sync(chunks: Iterable[bytes], chunk_size: int) -> AsyncIterator[bytes]:
+    it = _reslice(chunks, chunk_size)
+    sentinel = object()
+    while True:
+        # next() may block (file-backed generators); keep it off the event loop
+        chunk = await asyncio.to_thread(next, it, sentinel)
+        if chunk is sentinel:
+            return
+        yield chunk
+
+
+def body_factory(source: UploadSource, chunk_size: int = CHUNK_SIZE) -> Callable[[], Any]:
+    """
+    Returns a function that builds a fresh request body for `source` on each call,
+    so a retry can resend it. Bodies stream with bounded memory:
+    - paths are read from disk chunk by chunk
+    - file objects are streamed from the position they were at when passed in
+    - other iterables go out with chunked transfer encoding (one attempt only)
+    Send upload_headers(source) with it so sized bodies carry a Content-Length.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        return lambda: bytes(source) if isinstance(source, bytearray) else source
+    if isinstance(source, (str, os.PathLike)):
+        path = Path(source)
+        return lambda: _aiter_path(path, chunk_size)
+    if hasattr(source, "read"):
+        start = source.tell() if is_replayable(source) else None
+
+        def _file_body():
+            if start is not None:
+                source.seek(start)
+            return _aiter_file(source, chunk_size)
+        return _file_body
+    if hasattr(source, "__aiter__"):
+        return lambda: source
+    return lambda: _aiter_sync(source, chunk_size)
+
+
+async def gather_limited(coros: Iterable[Awaitable], limit: int = UPLOAD_CONCURRENCY) -> list:
+    """
+    Await many coroutines with at most `limit` in flight. Results come back in order;
+    the first failure is re-raised.
+    """
+    sem = asyncio.Semaphore(limit)
+
+    async def _run(coro):
+        async with sem:
+            return await coro
+
+    return await asyncio.gather(*(_run(c) for c in coros))
@@ -0,0 +1,6 @@
+# conftest.py
+import os
+import sys
+
+# Modules live flat in backend/src (see server.py); import them the same way here
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
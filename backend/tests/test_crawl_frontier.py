@@ -0,0 +1,109 @@
+# test_crawl_frontier.py
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from crawl_frontier import CrawlFrontier, HostPoliteness, RobotsCache, canonicalize, extract_links
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("HTTP://Example.ORG:80/a?b=2&a=1#top", "http://example.org/a?a=1&b=2"),
+    ("https://example.org:443", "https://example.org/"),
+    ("https://example.org:8443/x", "https://example.org:8443/x"),
+    ("https://example.org/?utm_source=x&gclid=1&id=7", "https://example.org/?id=7"),
+    ("https://example.org/?q=", "https://example.org/?q="),
+    ("mailto:hi@example.org", None),
+    ("javascript:void(0)", None),
+    ("#section", None),
+    ("ftp://example.org/file", None),
+    ("http://[bad", None),
+    ("", None),
+])
+def test_canonicalize(url, expected):
+    assert canonicalize(url) == expected
+
+
+def test_canonicalize_resolves_relative_links():
+    assert canonicalize("../team?b=1&a=2", "https://example.org/about/us") == "https://example.org/team?a=2&b=1"
+
+
+def test_extract_links_dedups_in_document_order():
+    html = ('<a href="/b">b</a><a href="https://example.org/a#x">a</a>'
+            '<a href="/b?utm_medium=email">b again</a><a href="mailto:x@y.z">mail</a>')
+    assert extract_links(html, "https://example.org/") == ["https://example.org/b", "https://example.org/a"]
+
+
+def test_frontier_dedup_site_depth_and_budget():
+    frontier = CrawlFrontier("https://www.example.org/", max_depth=1, max_pages=3)
+    frontier.mark_visited("https://www.example.org/", "https://example.org/")
+    assert frontier.add("https://example.org/about", 1)
+    assert not frontier.add("https://EXAMPLE.org/about#team", 1)  # same page
+    assert not frontier.add("https://example.org/", 1)  # the landing page
+    assert not frontier.add("https://other.org/", 1)
+    assert not frontier.add("https://example.org/deep", 2)
+    assert not frontier.add("https://example.org/flyer.pdf", 1)
+    assert frontier.add("https://example.org/team", 1)
+    assert frontier.add("https://example.org/events", 1)
+    assert frontier.pending() == ["https://example.org/about", "https://example.org/team",
+                                  "https://example.org/events"]
+    assert frontier.next()[1] == "https://example.org/about"
+    assert frontier.next()[1] == "https://example.org/team"
+    assert frontier.next() is None  # landing page + 2 = max_pages
+
+
+class FakeHttp:
+    def __init__(self, robots: dict):
+        self.robots = robots  # origin -> (status, body)
+        self.gets = []
+
+    async def get(self, url):
+        self.gets.append(url)
+        origin = url.removesuffix("/robots.txt")
+        status, body = self.robots.get(origin, (404, ""))
+        if status is None:
+            raise ConnectionError("refused")
+        return SimpleNamespace(status_code=status, text=body)
+
+
+def test_robots_rules_are_fetched_once_per_origin():
+    http = FakeHttp({"https://example.org": (200, "User-agent: *\nDisallow: /private\nCrawl-delay: 2\n")})
+    robots = RobotsCache(agent="TestBot")
+
+    async def check():
+        return (await robots.allowed("https://example.org/private/x", http),
+                await robots.allowed("https://example.org/public", http),
+                await robots.crawl_delay("https://example.org/public", http))
+
+    assert asyncio.run(check()) == (False, True, 2.0)
+    assert http.gets == ["https://example.org/robots.txt"]
+
+
+@pytest.mark.parametrize("status, allowed", [(404, True), (403, False), (None, True)])
+def test_robots_missing_forbidden_or_unreachable(status, allowed):
+    http = FakeHttp({"https://example.org": (status, "")})
+    assert asyncio.run(RobotsCache().allowed("https://example.org/x", http)) is allowed
+
+
+def test_crawl_follows_links_skips_disallowed_and_keeps_discovery_order():
+    site = {
+        "https://example.org/": '<a href="/slow">s</a><a href="/private">p</a><a href="/fast">f</a>',
+        "https://example.org/slow": "",
+        "https://example.org/fast": "",
+    }
+    http = FakeHttp({"https://example.org": (200, "User-agent: *\nDisallow: /private\n")})
+
+    async def fetch(url, timeout_s):
+        await asyncio.sleep(0.05 if url.endswith("/slow") else 0)
+        return f"text of {url}", site[url], url
+
+    async def crawl():
+        frontier = CrawlFrontier("https://example.org/", max_depth=1, max_pages=3, http=http,
+                                 politeness=HostPoliteness(concurrency=4, delay_s=0))
+        frontier.add("https://example.org/", 0)
+        return await frontier.crawl(fetch, concurrency=4, budget_s=5)
+
+    pages = asyncio.run(crawl())
+    # /private doesn't use up the page budget, so /fast still fits
+    assert [url for url, _ in pages] == ["https://example.org/", "https://example.org/slow",
+                                        "https://example.org/fast"]
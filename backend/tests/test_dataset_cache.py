@@ -0,0 +1,105 @@
+# test_dataset_cache.py
+from contextlib import contextmanager
+
+import pyarrow as pa
+import pytest
+
+import foundry_tables
+from dataset_cache import DatasetCache
+
+
+class FakeClient:
+    """Branch lookups plus streamed table reads, counting downloads."""
+
+    def __init__(self, table: pa.Table, txn: str = "txn-1"):
+        self.table = table
+        self.txn = txn
+        self.downloads = 0
+
+    def get_branch(self, dataset_rid, branch_name):
+        return {"transactionRid": self.txn}
+
+    @contextmanager
+    def stream_table(self, dataset_rid, branch_name, columns=None, row_limit=None):
+        self.downloads += 1
+        table = self.table.select(columns) if columns else self.table
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        yield [sink.getvalue().to_pybytes()]
+
+
+@pytest.fixture(autouse=True)
+def _fresh_pushdown_state():
+    foundry_tables._no_pushdown.clear()
+    yield
+    foundry_tables._no_pushdown.clear()
+
+
+@pytest.fixture
+def client():
+    return FakeClient(pa.table({"org_name": ["Acme", "Other"], "n": [1, 2]}))
+
+
+def test_same_transaction_is_downloaded_once(client, tmp_path):
+    cache = DatasetCache(client, "master", cache_dir=tmp_path)
+    first = cache.get_table("rid")
+    assert cache.get_table("rid").equals(first)
+    assert client.downloads == 1
+
+
+def test_new_transaction_downloads_and_drops_the_old_entry(client, tmp_path):
+    cache = DatasetCache(client, "master", cache_dir=tmp_path)
+    cache.get_table("rid")
+    client.txn = "txn-2"
+    client.table = pa.table({"org_name": ["New"], "n": [3]})
+    assert cache.get_table("rid")["n"].to_pylist() == [3]
+    assert client.downloads == 2
+    assert [k[2] for k in cache._mem] == ["txn-2"]
+    assert len(list(tmp_path.glob("*.arrow"))) == 1
+
+
+def test_columns_and_filters_are_part_of_the_key(client, tmp_path):
+    cache = DatasetCache(client, "master", cache_dir=tmp_path)
+    cache.get_table("rid")
+    only_n = cache.get_table("rid", columns=["n"])
+    acme = cache.get_table("rid", filters=[("org_name", "eq", "Acme")])
+    assert only_n.column_names == ["n"]
+    assert acme["n"].to_pylist() == [1]
+    assert client.downloads == 3
+    cache.get_table("rid", filters=[("org_name", "eq", "Acme")])
+    assert client.downloads == 3
+
+
+def test_disk_entry_survives_a_restart(client, tmp_path):
+    DatasetCache(client, "master", cache_dir=tmp_path).get_table("rid")
+    table = DatasetCache(client, "master", cache_dir=tmp_path).get_table("rid")
+    assert table["n"].to_pylist() == [1, 2]
+    assert client.downloads == 1
+
+
+def test_known_transaction_skips_the_branch_lookup(client, tmp_path):
+    cache = DatasetCache(client, "master", cache_dir=tmp_path)
+    cache.get_table("rid", txn="txn-1")
+    client.get_branch = None  # would fail if called
+    cache.get_table("rid", txn="txn-1")
+    assert client.downloads == 1
+
+
+def test_failed_branch_lookup_reads_uncached(client, tmp_path):
+    def broken(dataset_rid, branch_name):
+        raise RuntimeError("metadata service down")
+
+    client.get_branch = broken
+    cache = DatasetCache(client, "master", cache_dir=tmp_path)
+    cache.get_table("rid")
+    cache.get_table("rid")
+    assert client.downloads == 2
+    assert not cache._mem
+
+
+def test_get_dataframe_returns_a_fresh_frame(client, tmp_path):
+    cache = DatasetCache(client, "master", cache_dir=tmp_path)
+    df = cache.get_dataframe("rid")
+    df["org_name"] = "changed"
+    assert cache.get_dataframe("rid")["org_name"].tolist() == ["Acme", "Other"]
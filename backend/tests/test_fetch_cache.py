@@ -0,0 +1,104 @@
+# test_fetch_cache.py
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from fetch_cache import CacheEntry, FetchCache, conditional_headers, schema_hash, validators
+from payload_variants import VariantCache
+from tiered_fetch import TieredFetcher
+
+PAGE = "<html><body><p>" + "Weekly meetings and workshops. " * 20 + "</p></body></html>"
+
+
+def test_validators_and_conditional_headers():
+    found = validators(httpx.Headers({"ETag": '"v1"', "Last-Modified": "Wed, 01 Jan 2025 00:00:00 GMT"}))
+    assert found == {"etag": '"v1"', "last-modified": "Wed, 01 Jan 2025 00:00:00 GMT"}
+    assert conditional_headers(found) == {"If-None-Match": '"v1"',
+                                          "If-Modified-Since": "Wed, 01 Jan 2025 00:00:00 GMT"}
+    assert validators(None) == {} and conditional_headers({}) == {}
+
+
+def test_schema_hash_ignores_key_order():
+    assert schema_hash({"a": 1, "b": [2]}) == schema_hash({"b": [2], "a": 1})
+    assert schema_hash({"a": 1}) != schema_hash({"a": 2})
+
+
+def test_entries_are_keyed_by_canonical_url_and_namespace(tmp_path):
+    cache = FetchCache(tmp_path)
+    cache.put(CacheEntry("https://Club.org/?utm_source=x#top", "page", "http", "<p>", "text"))
+    assert cache.get("https://club.org/", "page").text == "text"
+    assert cache.get("https://club.org/", "firecrawl") is None
+
+
+def test_stale_entries_are_kept_for_revalidation(tmp_path):
+    cache = FetchCache(tmp_path, ttl_s=60)
+    cache.put(CacheEntry("https://club.org/", "", "http", "", "", fetched_at=time.time() - 120))
+    entry = cache.get("https://club.org/")
+    assert entry is not None and not cache.fresh(entry)
+    assert cache.fresh(cache.refresh(entry))
+
+
+def test_directory_is_bounded(tmp_path):
+    cache = FetchCache(tmp_path, max_bytes=1500)
+    for i in range(5):
+        cache.put(CacheEntry(f"https://club.org/{i}", "", "http", "x" * 400, ""))
+    assert sum(p.stat().st_size for p in tmp_path.glob("*.json")) <= 1500
+    assert cache.get("https://club.org/4") is not None
+
+
+class Origin:
+    """Serves one page with an ETag; answers 304 while If-None-Match matches."""
+
+    def __init__(self, body: str, etag: str = '"v1"'):
+        self.body, self.etag = body, etag
+        self.seen = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.seen.append(request.headers.get("if-none-match"))
+        if request.headers.get("if-none-match") == self.etag:
+            return httpx.Response(304, headers={"etag": self.etag})
+        return httpx.Response(200, text=self.body, headers={"content-type": "text/html", "etag": self.etag})
+
+
+def _fetch(tmp_path, origin: Origin, cache: FetchCache):
+    async def go():
+        fetcher = TieredFetcher(memory=VariantCache(tmp_path / "tiers.json"), cache=cache,
+                                http_client=httpx.AsyncClient(transport=httpx.MockTransport(origin)))
+        try:
+            return await fetcher.fetch("https://club.org/", tiers=("http",))
+        finally:
+            await fetcher.aclose()
+    return asyncio.run(go())
+
+
+@pytest.fixture
+def stale_cache(tmp_path):
+    return FetchCache(tmp_path / "pages", ttl_s=0)
+
+
+def test_fresh_hit_skips_the_network(tmp_path):
+    origin = Origin(PAGE)
+    cache = FetchCache(tmp_path / "pages", ttl_s=3600)
+    assert not _fetch(tmp_path, origin, cache).cached
+    assert _fetch(tmp_path, origin, cache).cached
+    assert origin.seen == [None]
+
+
+def test_stale_hit_is_revalidated_with_its_etag(tmp_path, stale_cache):
+    origin = Origin(PAGE)
+    first = _fetch(tmp_path, origin, stale_cache)
+    again = _fetch(tmp_path, origin, stale_cache)
+    assert origin.seen == [None, '"v1"']
+    assert again.cached and again.text == first.text
+
+
+def test_changed_page_replaces_the_cached_copy(tmp_path, stale_cache):
+    origin = Origin(PAGE)
+    _fetch(tmp_path, origin, stale_cache)
+    origin.body, origin.etag = PAGE.replace("Weekly", "Monthly"), '"v2"'
+    result = _fetch(tmp_path, origin, stale_cache)
+    assert not result.cached and "Monthly" in result.text
+    assert origin.seen == [None, '"v1"']  # the conditional GET's 200 is used as-is
+    assert stale_cache.get("https://club.org/").validators == {"etag": '"v2"'}
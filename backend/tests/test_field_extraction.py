@@ -0,0 +1,55 @@
+# test_field_extraction.py
+import importlib.util
+import random
+from pathlib import Path
+
+import pytest
+
+from field_extraction import MAX_EMAIL_PART, extract_fields
+
+# The legacy per-field regexes live in the benchmark script; compare against those
+_BENCH = Path(__file__).resolve().parents[2] / "scripts" / "bench-extract-fields.py"
+_spec = importlib.util.spec_from_file_location("bench_extract_fields", _BENCH)
+bench = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(bench)
+
+_CAPPED = [case for case in bench.EDGE_CASES if "@" in case and len(case.split("@")[0].split()[-1]) > MAX_EMAIL_PART]
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_matches_legacy_on_synthetic_pages(seed):
+    page = bench.synthetic_page(random.Random(seed), seed)
+    assert bench.single_pass(page) == bench.legacy(page)
+
+
+@pytest.mark.parametrize("case", [c for c in bench.EDGE_CASES if c not in _CAPPED])
+def test_matches_legacy_on_edge_cases(case):
+    assert bench.single_pass(case) == bench.legacy(case)
+
+
+@pytest.mark.parametrize("case", _CAPPED)
+def test_overlong_local_part_is_not_an_address(case):
+    assert bench.legacy(case)[1] != bench.single_pass(case)[1]
+    assert bench.single_pass(case)[1] == "officers@club.org"
+
+
+def test_fields():
+    content = ("About us: the robotics club builds autonomous rovers for regional competitions every spring. "
+               "Requirements: members must attend two build nights per month during the season. "
+               "Questions go to noreply@club.org or captain@club.org. The deadline is 9/15/2025.")
+    fields = extract_fields(content)
+    # same span the old pattern took: everything after "about" up to the period
+    assert fields.description == "us: the robotics club builds autonomous rovers for regional competitions every spring."
+    assert fields.requirements == ": members must attend two build nights per month during the season."
+    assert fields.email == "captain@club.org"
+    assert fields.deadline == "9/15/2025"
+    assert bench.single_pass(content) == bench.legacy(content)
+
+
+def test_short_description_is_dropped():
+    assert extract_fields("<meta name=\"description\" content=\"A club\">").description is None
+
+
+def test_empty_page():
+    fields = extract_fields("")
+    assert (fields.description, fields.email, fields.requirements, fields.deadline) == (None, None, None, None)
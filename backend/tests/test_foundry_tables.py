@@ -0,0 +1,103 @@
+# test_foundry_tables.py
+from contextlib import contextmanager
+
+import pyarrow as pa
+import pytest
+
+import foundry_tables
+
+
+def _ipc(table: pa.Table) -> bytes:
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+class FakeClient:
+    """read_table surface only (no SQL), like a tenant without Foundry SQL."""
+
+    def __init__(self, table: pa.Table):
+        self.table = table
+        self.reads = []
+
+    @contextmanager
+    def stream_table(self, dataset_rid, branch_name, columns=None, row_limit=None):
+        self.reads.append(columns)
+        table = self.table.select(columns) if columns else self.table
+        if row_limit is not None:
+            table = table.slice(0, row_limit)
+        body = _ipc(table)
+        yield [body[:10], body[10:]]
+
+
+@pytest.fixture(autouse=True)
+def _fresh_caches():
+    foundry_tables._no_pushdown.clear()
+    foundry_tables._columns_cache.clear()
+    yield
+    foundry_tables._no_pushdown.clear()
+    foundry_tables._columns_cache.clear()
+
+
+def test_build_sql_selects_on_branch():
+    sql = foundry_tables.build_sql("ri.foundry.main.dataset.1", ["a", "b"], [], branch_name="master")
+    assert sql == "SELECT `a`, `b` FROM `master`.`ri.foundry.main.dataset.1`"
+
+
+def test_build_sql_without_branch_or_columns():
+    assert foundry_tables.build_sql("rid", None, []) == "SELECT * FROM `rid`"
+
+
+def test_build_sql_filters():
+    sql = foundry_tables.build_sql("rid", None, [("org_name", "prefix", "Acme"), ("path", "suffix", ".txt"),
+                                                  ("k", "eq", 1), ("t", "contains", "x")])
+    assert sql == ("SELECT * FROM `rid` WHERE startswith(CAST(`org_name` AS STRING), 'Acme')"
+                   " AND endswith(CAST(`path` AS STRING), '.txt')"
+                   " AND CAST(`k` AS STRING) = '1'"
+                   " AND contains(CAST(`t` AS STRING), 'x')")
+
+
+def test_build_sql_quotes_identifiers_and_strings():
+    sql = foundry_tables.build_sql("rid", ["we`ird"], [("name", "eq", "O'Brien \\ co")], branch_name="fe`at")
+    assert sql == ("SELECT `we``ird` FROM `fe``at`.`rid`"
+                   " WHERE CAST(`name` AS STRING) = 'O\\'Brien \\\\ co'")
+
+
+def test_build_sql_rejects_unknown_op():
+    with pytest.raises(ValueError):
+        foundry_tables.build_sql("rid", None, [("a", "like", "x")])
+
+
+def test_filter_arrow_matches_pushed_predicates():
+    table = pa.table({"org_name": ["Acme\nInc", "Acme", "Other", None], "n": [1, 2, 3, 4]})
+    assert foundry_tables.filter_arrow(table, [("org_name", "prefix", "Acme")])["n"].to_pylist() == [1, 2]
+    assert foundry_tables.filter_arrow(table, [("n", "eq", "3")])["n"].to_pylist() == [3]
+    assert foundry_tables.filter_arrow(table, None) is table
+
+
+def test_read_filtered_arrow_falls_back_locally_and_remembers():
+    client = FakeClient(pa.table({"path": ["a/x.txt", "b/y.txt"], "text": ["one", "two"]}))
+    out = foundry_tables.read_filtered_arrow(client, "rid", "master", columns=["text"],
+                                             filters=[("path", "suffix", "y.txt")])
+    assert out.to_pydict() == {"text": ["two"]}
+    assert client.reads == [["text", "path"]]  # filter column read too, then dropped
+    assert not foundry_tables._try_pushdown("rid", [("path", "suffix", "y.txt")])
+    assert foundry_tables._try_pushdown("other-rid", [("path", "suffix", "y.txt")])
+
+
+def test_transient_sql_failure_is_not_remembered():
+    err = RuntimeError("gateway timeout")
+    err.status_code = 504
+    foundry_tables._pushdown_failed("rid", err)
+    assert foundry_tables._try_pushdown("rid", [("a", "eq", "b")])
+
+
+def test_table_columns_cached_per_transaction():
+    client = FakeClient(pa.table({"a": [1], "b": [2]}))
+    assert foundry_tables.table_columns(client, "rid", "master", "txn-1") == ["a", "b"]
+    assert foundry_tables.table_columns(client, "rid", "master", "txn-1") == ["a", "b"]
+    assert len(client.reads) == 1
+    client.table = pa.table({"a": [1], "c": [3]})
+    assert foundry_tables.table_columns(client, "rid", "master", "txn-2") == ["a", "c"]
+    assert list(foundry_tables._columns_cache) == [("rid", "master", "txn-2")]
@@ -0,0 +1,61 @@
+# test_org_classifier.py
+import pytest
+
+import org_classifier
+from models import OrgType
+from org_classifier import classify, classify_batch, term_counts
+
+
+def test_terms_match_at_word_starts():
+    counts = term_counts("Engineers building technology; our volunteers volunteering. Confraternal brush.")
+    assert counts == {"engineer": 1, "tech": 1, "volunteer": 2}
+
+
+def test_longest_term_wins_at_each_word():
+    assert term_counts("brotherhood philanthropy interfraternity") == {
+        "brotherhood": 1, "philanthropy": 1, "interfraternity": 1}
+
+
+@pytest.mark.parametrize("content, name, expected", [
+    ("Careers in tech: networking nights with industry engineers", "Women in Computing", OrgType.PROFESSIONAL),
+    ("Our members are inducted each spring; minimum GPA 3.5", "Phi Beta Kappa", OrgType.HONOR_SOCIETY),
+    ("Sisterhood, sisters and Panhellenic recruitment", "Alpha Phi", OrgType.SORORITY),
+    ("Brotherhood since 1904. Rush week starts soon", "Sigma Chi", OrgType.FRATERNITY),
+    ("Weekly volunteering and outreach with local charities", "Longhorn Helpers", OrgType.SERVICE),
+    ("Bible study and worship on Thursdays", "Campus Ministries", OrgType.RELIGIOUS),
+    ("We play board games on Fridays", "Board Game Night", OrgType.CLUB),
+    ("", None, OrgType.CLUB),
+])
+def test_classify(content, name, expected):
+    assert classify(content, name) == expected
+
+
+def test_greek_letters_alone_are_a_club():
+    assert classify("Alpha Beta Gamma Delta Sigma Phi Psi", "Alpha Beta Gamma") == OrgType.CLUB
+
+
+def test_greek_letters_only_boost_a_type_with_its_own_words():
+    row = org_classifier.score("brotherhood", "Alpha Sigma")
+    frat = org_classifier.TYPES.index(OrgType.FRATERNITY)
+    sorority = org_classifier.TYPES.index(OrgType.SORORITY)
+    assert row[frat] > 3 and row[sorority] == 0
+
+
+def test_tie_is_a_club():
+    # same weight for one professional and one academic term
+    assert classify("academic career", None) == OrgType.CLUB
+
+
+def test_name_counts_more_than_content():
+    assert classify("community service and fitness", "Outdoor Adventure Club") == OrgType.RECREATIONAL
+
+
+def test_repeated_words_are_capped():
+    # 50 x "gaming" counts as 5 x 2 = 10; the service words add up to 10.5
+    assert classify("gaming " * 50 + "charity volunteer outreach philanthropy nonprofit", None) == OrgType.SERVICE
+
+
+def test_batch_matches_single_calls():
+    contents = ["Brotherhood and rush", "charity drive", None]
+    names = ["Kappa Sigma", "Helping Hands", "Chess Club"]
+    assert classify_batch(contents, names) == [classify(c, n) for c, n in zip(contents, names)]
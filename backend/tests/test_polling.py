@@ -0,0 +1,105 @@
+# test_polling.py
+import asyncio
+
+import pandas as pd
+import pytest
+
+import polling
+from polling import PollScheduler
+
+
+class Clock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(polling.time, "time", clock)
+    return clock
+
+
+def test_eta_is_unknown_without_history(tmp_path, clock):
+    scheduler = PollScheduler(tmp_path / "history.json")
+    scheduler.start("rows:a", token="f.txt")
+    assert scheduler.eta("rows:a", token="f.txt") is None
+
+
+def test_eta_counts_down_from_the_median(tmp_path, clock):
+    scheduler = PollScheduler(tmp_path / "history.json")
+    for duration in (10, 30, 20):
+        scheduler.record("rows:a", duration)
+    assert scheduler.predicted_duration("rows:a") == 20
+
+    scheduler.start("rows:a", token="f.txt")
+    clock.now += 5
+    assert scheduler.eta("rows:a", token="f.txt") == pytest.approx(15)
+    clock.now += 60
+    assert scheduler.eta("rows:a", token="f.txt") == 0.0
+    # no wait in flight for this token: the typical duration
+    assert scheduler.eta("rows:a", token="other.txt") == 20
+
+
+def test_overlapping_waits_keep_their_own_eta(tmp_path, clock):
+    scheduler = PollScheduler(tmp_path / "history.json")
+    scheduler.record("rows:a", 20)
+    first = scheduler.start("rows:a", token="one.txt")
+    clock.now += 8
+    scheduler.start("rows:a", token="two.txt")
+    assert scheduler.eta("rows:a", token="one.txt") == pytest.approx(12)
+    assert scheduler.eta("rows:a", token="two.txt") == pytest.approx(20)
+    first.abandon()
+    assert scheduler.eta("rows:a", token="one.txt") == 20
+
+
+def test_finish_records_the_duration(tmp_path, clock):
+    scheduler = PollScheduler(tmp_path / "history.json", history=2)
+    for _ in range(3):
+        timer = scheduler.start("build:x")
+        clock.now += 4
+        assert timer.finish() == pytest.approx(4)
+    assert scheduler._durations["build:x"] == [4, 4]
+    assert not scheduler._active
+
+
+def test_next_delay_sleeps_until_just_before_the_predicted_finish(tmp_path, clock):
+    scheduler = PollScheduler(tmp_path / "history.json", min_s=1, max_s=8, lead=0.5)
+    scheduler.record("build:x", 100)
+    timer = scheduler.start("build:x")
+    assert timer.next_delay() == pytest.approx(50)
+    clock.now += 60
+    assert timer.next_delay() == 1  # past the lead point: backoff from min_s
+    assert 1 <= timer.next_delay() <= 2
+
+
+def test_instances_sharing_a_file_keep_each_others_samples(tmp_path, clock):
+    path = tmp_path / "history.json"
+    one, two = PollScheduler(path), PollScheduler(path)
+    one.record("rows:a", 10)
+    two.record("rows:b", 20)
+    assert PollScheduler(path)._durations == {"rows:a": [10], "rows:b": [20]}
+
+
+def test_poll_datasets_waits_for_each_dataset(tmp_path):
+    calls = {"a": 0, "b": 0}
+
+    async def fetch(rid):
+        calls[rid] += 1
+        return pd.DataFrame({"x": [1]}) if calls[rid] >= 2 else pd.DataFrame()
+
+    out = asyncio.run(polling.poll_datasets(fetch, ["a", "b", "a"], timeout_s=5, poll_s=0.01))
+    assert sorted(out) == ["a", "b"]
+    assert all(len(df) == 1 for df in out.values())
+    assert calls == {"a": 2, "b": 2}
+
+
+def test_poll_datasets_gives_up_at_the_deadline():
+    async def fetch(rid):
+        raise RuntimeError("read failed")
+
+    out = asyncio.run(polling.poll_datasets(fetch, ["a"], timeout_s=0.05, poll_s=0.01))
+    assert out["a"].empty
@@ -0,0 +1,82 @@
+# test_response_cache.py
+import pytest
+from starlette.requests import Request
+
+import response_cache
+from response_cache import CachedResponse, ResponseCache, etag_matches, make_etag
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache.time, "monotonic", clock)
+    return clock
+
+
+def test_etag_is_derived_from_the_body():
+    assert CachedResponse(b"rows", "application/json").etag == make_etag(b"rows")
+    assert make_etag(b"rows") != make_etag(b"rows!")
+    assert make_etag(b"rows").startswith('"') and make_etag(b"rows").endswith('"')
+
+
+@pytest.mark.parametrize("header, matches", [
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"x", "abc"', True),
+    ("*", True),
+    ('"x"', False),
+    ("", False),
+    (None, False),
+])
+def test_etag_matches(header, matches):
+    assert etag_matches(header, '"abc"') is matches
+
+
+def test_entries_expire_after_their_ttl(clock):
+    cache = ResponseCache(ttl_s=10)
+    cache.put("a", CachedResponse(b"1", "application/json"))
+    cache.put("empty", CachedResponse(b"[]", "application/json"), ttl_s=2)
+    clock.now += 5
+    assert cache.get("a") is not None
+    assert cache.get("empty") is None
+    clock.now += 6
+    assert cache.get("a") is None
+
+
+def test_bounded_by_entries_and_bytes(clock):
+    cache = ResponseCache(max_entries=2, max_bytes=10)
+    cache.put("a", CachedResponse(b"1234", "x"))
+    cache.put("b", CachedResponse(b"1234", "x"))
+    cache.get("a")  # a is now the most recent
+    cache.put("c", CachedResponse(b"1234", "x"))
+    assert cache.get("b") is None and cache.get("a") is not None
+    cache.put("d", CachedResponse(b"123456789", "x"))
+    assert cache.get("a") is None and cache.get("c") is None
+    cache.put("huge", CachedResponse(b"x" * 11, "x"))
+    assert cache.get("huge") is None and cache.get("d") is not None
+
+
+def _request(if_none_match=None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "POST", "path": "/get_dataset", "headers": headers})
+
+
+def test_cached_response_answers_304_for_a_matching_etag():
+    server = pytest.importorskip("server")
+    entry = CachedResponse(b'{"rows": []}', "application/json", {"X-Row-Count": "0"})
+
+    full = server.cached_response(entry, _request())
+    assert full.status_code == 200 and full.body == entry.body
+    assert full.headers["etag"] == entry.etag and full.headers["x-row-count"] == "0"
+
+    not_modified = server.cached_response(entry, _request(entry.etag))
+    assert not_modified.status_code == 304 and not_modified.body == b""
+    assert not_modified.headers["etag"] == entry.etag
@@ -0,0 +1,94 @@
+# test_tiered_fetch.py
+import asyncio
+
+import httpx
+import pytest
+
+from payload_variants import VariantCache
+from tiered_fetch import EscalateError, FetchResult, TieredFetcher, escalation_reason
+
+ARTICLE = "<html><head><title>Robotics Club</title></head><body><p>" + "We build robots. " * 30 + "</p></body></html>"
+SPA = '<html><body><div id="root"></div><script src="/app.js"></script></body></html>'
+
+
+def _fetcher(tmp_path, pages: dict, firecrawl=None, browser=None) -> TieredFetcher:
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(str(request.url))
+        body = pages.get(str(request.url))
+        if body is None:
+            return httpx.Response(404)
+        return httpx.Response(200, text=body, headers={"content-type": "text/html"})
+
+    fetcher = TieredFetcher(firecrawl=firecrawl, memory=VariantCache(tmp_path / "tiers.json"),
+                            http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    fetcher.requests = requests
+    if browser is not None:
+        fetcher._fetch_browser = browser
+    return fetcher
+
+
+def _run(fetcher: TieredFetcher, url: str, **kwargs):
+    async def go():
+        try:
+            return await fetcher.fetch(url, **kwargs)
+        finally:
+            await fetcher.aclose()
+    return asyncio.run(go())
+
+
+@pytest.mark.parametrize("html, text, reason", [
+    (ARTICLE, "x" * 300, None),
+    ("<p>hi</p>", "hi", "only 2 chars of text"),
+    ("<noscript>Please enable JavaScript to continue</noscript>", "x" * 300, "page asks for JavaScript"),
+    (SPA, "x" * 300, "client-rendered app shell"),
+    (SPA, "x" * 2000, None),  # server-rendered into the mount point
+])
+def test_escalation_reason(html, text, reason):
+    assert escalation_reason(html, text, min_text_chars=200) == reason
+
+
+def test_static_page_stays_on_plain_http(tmp_path):
+    async def browser(url):
+        raise AssertionError("browser tier should not run")
+
+    result = _run(_fetcher(tmp_path, {"https://club.org/": ARTICLE}, browser=browser), "https://club.org/")
+    assert result.tier == "http"
+    assert result.outline.title == "Robotics Club"
+    assert "We build robots." in result.text
+
+
+def test_app_shell_escalates_to_the_browser_and_is_remembered(tmp_path):
+    async def browser(url):
+        return FetchResult(url, ARTICLE, "rendered " * 50, "browser")
+
+    fetcher = _fetcher(tmp_path, {"https://spa.org/": SPA}, browser=browser)
+    assert _run(fetcher, "https://spa.org/").tier == "browser"
+    assert fetcher.requests == ["https://spa.org/"]
+
+    # same domain next time: straight to the browser, no wasted GET
+    fetcher = _fetcher(tmp_path, {"https://spa.org/": SPA}, browser=browser)
+    assert _run(fetcher, "https://www.spa.org/events").tier == "browser"
+    assert fetcher.requests == []
+
+
+def test_firecrawl_is_the_last_resort(tmp_path):
+    async def browser(url):
+        raise EscalateError("only 0 chars after rendering")
+
+    async def firecrawl(url):
+        return FetchResult(url, "", "from firecrawl", "firecrawl", extra={"extract": {"organization_name": "X"}})
+
+    result = _run(_fetcher(tmp_path, {}, firecrawl=firecrawl, browser=browser), "https://gone.org/")
+    assert result.tier == "firecrawl"
+    assert result.extra["extract"] == {"organization_name": "X"}
+
+
+def test_narrowed_ladder_raises_the_last_error(tmp_path):
+    async def firecrawl(url):
+        raise AssertionError("firecrawl is outside the ladder")
+
+    fetcher = _fetcher(tmp_path, {"https://spa.org/": SPA}, firecrawl=firecrawl)
+    with pytest.raises(EscalateError, match="chars of text"):
+        _run(fetcher, "https://spa.org/", tiers=("http",))
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Benchmark: the scraper's original per-field regexes vs field_extraction.extract_fields.
+
+Runs both over a corpus (a directory of scraped .txt/.html pages, or a synthetic one
+with realistic org pages plus long period-free blocks such as nav menus and inline
+scripts) and reports extraction time per MB. Also counts pages where the two disagree.
+
+    python scripts/bench-extract-fields.py --pages 200
+    python scripts/bench-extract-fields.py --corpus ./scraped --repeat 5
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend', 'src'))
+
+from field_extraction import extract_fields
+
+
+# ---- copy of the old OrganizationScraper._extract_* bodies ----
+def legacy_description(content):
+    patterns = [
+        r'(?:about|description|mission|purpose)[^.]*?([^.]{50,200}\.)',
+        r'<meta[^>]*name=["\']description["\'][^>]*content=["\']([^"\']+)["\']',
+        r'(?:we are|we\'re|our mission|our purpose)[^.]*?([^.]{30,150}\.)'
+    ]
+    for pattern in patterns:
+        match = re.search(pattern, content, re.IGNORECASE | re.DOTALL)
+        if match:
+            description = match.group(1).strip()
+            description = re.sub(r'<[^>]+>', '', description)
+            description = re.sub(r'\s+', ' ', description)
+            if len(description) > 20:
+                return description
+    return None
+
+
+def legacy_email(content):
+    matches = re.findall(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', content)
+    filtered = [e for e in matches if not any(s in e.lower() for s in ['noreply', 'no-reply', 'privacy', 'legal'])]
+    return filtered[0] if filtered else None
+
+
+def legacy_requirements(content):
+    patterns = [
+        r'(?:requirements|qualifications|eligibility)[^.]*?([^.]{20,200}\.)',
+        r'(?:to apply|application)[^.]*?(?:must|need|require)[^.]*?([^.]{20,150}\.)'
+    ]
+    for pattern in patterns:
+        match = re.search(pattern, content, re.IGNORECASE | re.DOTALL)
+        if match:
+            requirements = match.group(1).strip()
+            requirements = re.sub(r'<[^>]+>', '', requirements)
+            return re.sub(r'\s+', ' ', requirements)
+    return None
+
+
+def legacy_deadline(content):
+    match = re.search(r'(?:deadline|due|apply by)[^.]*?(\d{1,2}[/-]\d{1,2}[/-]\d{2,4}|\w+ \d{1,2},? \d{4})',
+                      content, re.IGNORECASE)
+    return match.group(1).strip() if match else None
+
+
+def legacy(content):
+    return (legacy_description(content), legacy_email(content),
+            legacy_requirements(content), legacy_deadline(content))
+
+
+def single_pass(content):
+    f = extract_fields(content)
+    return f.description, f.email, f.requirements, f.deadline
+
+
+# ---- corpus ----
+SENTENCES = [
+    "Our mission is to connect students with industry mentors through weekly workshops and case competitions.",
+    "We are a student-run organization dedicated to building products that serve the Austin community.",
+    "Members meet every Tuesday in the engineering building for talks, socials and project work.",
+    "Requirements: applicants must be full-time students with at least one semester remaining on campus.",
+    "To apply, candidates must submit a resume and a short essay describing their interest in the club.",
+    "The application deadline is September 15, 2025 for the fall cohort.",
+    "Questions? Reach the officers at contact@{org}.org or find us at the involvement fair.",
+    "Sponsorship inquiries go to partners@{org}.org; press contact: noreply@{org}.org.",
+    "Old footer: noreply@{org}.coma@b.co, officers@{org}.org",
+]
+# Inputs where a per-"@" scan can disagree with re.findall's left-to-right one
+EDGE_CASES = [
+    "noreply@x.coma@b.co and then due@x.com",
+    "a@b.co@c.org d@e.com",
+    "legal@x.io.@y.com",
+    "x_\n@y.com",
+    "-.+@x.com foo.@bar.com",
+    # expected to differ: local parts over MAX_EMAIL_PART chars are no longer taken as addresses
+    "session_" + "a1b2c3d4" * 9 + "@cdn.example.com and officers@club.org",
+]
+NAV = "Home | About | Events | Team | Sponsors | Apply | Contact | Blog | Gallery | FAQ | Resources | "
+
+
+def synthetic_page(rng: random.Random, i: int) -> str:
+    org = f"org{i}"
+    parts = []
+    for _ in range(rng.randint(20, 60)):
+        parts.append(rng.choice(SENTENCES).format(org=org))
+        if rng.random() < 0.15:
+            # period-free runs: menus, footers, inline JSON / scripts
+            parts.append(NAV * rng.randint(20, 200))
+    if rng.random() < 0.3:
+        parts.insert(0, f'<meta name="description" content="{org} is a student organization at UT Austin">')
+    return " ".join(parts)
+
+
+def load_corpus(args) -> list[str]:
+    if args.corpus:
+        return [p.read_text(encoding="utf-8", errors="replace")
+                for p in sorted(Path(args.corpus).rglob("*")) if p.suffix in (".txt", ".html", ".md")]
+    rng = random.Random(args.seed)
+    return [synthetic_page(rng, i) for i in range(args.pages)]
+
+
+def bench(fn, pages, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for page in pages:
+            fn(page)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", help="directory of scraped pages (.txt/.html/.md)")
+    parser.add_argument("--pages", type=int, default=200, help="synthetic pages when no --corpus")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pages = load_corpus(args)
+    mb = sum(len(p.encode()) for p in pages) / 1e6
+    print(f"pages={len(pages)}  size={mb:.1f}MB")
+
+    for case in EDGE_CASES:
+        if legacy(case) != single_pass(case):
+            print(f"edge case differs: {case!r}: {legacy(case)} vs {single_pass(case)}")
+    diffs = sum(legacy(p) != single_pass(p) for p in pages)
+    for name, fn in (("legacy", legacy), ("single-pass", single_pass)):
+        elapsed = bench(fn, pages, args.repeat)
+        print(f"{name:>11}: best={elapsed:.3f}s  {elapsed * 1000 / mb:.1f} ms/MB")
+    print(f"pages where results differ: {diffs}/{len(pages)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark: legacy CSV bytearray path vs the Arrow streaming reader in foundry_tables.
+
+Builds a synthetic QNA-shaped table, serializes it both ways, replays the bytes
+as a chunked HTTP body and measures time-to-DataFrame and peak RSS. Each run
+happens in a fresh child process so the RSS numbers don't bleed into each other.
+
+    python scripts/bench-read-tabular.py --rows 200000 --chunk-kb 64
+"""
+import argparse
+import io
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend', 'src'))
+
+
+def make_table(rows: int):
+    import pyarrow as pa
+    files = [f"incoming/2025-01-{d:02d}/scraped_results_{d}.txt" for d in range(1, 29)]
+    orgs = ["Texas Blockchain", "TPEO", "Freetail Hackers", "Longhorn Racing", "Orange Jackets"]
+    return pa.table({
+        "_file": [files[i % len(files)] for i in range(rows)],
+        "org_name": [orgs[i % len(orgs)] for i in range(rows)],
+        "question": [f"What does the organization do? ({i})" for i in range(rows)],
+        "answer": ["The organization hosts weekly meetings, socials and workshops for members. " * 3] * rows,
+        "score": [i * 0.5 for i in range(rows)],
+    })
+
+
+def write_fixtures(rows: int, out_dir: str):
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    table = make_table(rows)
+    csv_path = os.path.join(out_dir, "table.csv")
+    arrow_path = os.path.join(out_dir, "table.arrows")
+    pacsv.write_csv(table, csv_path)
+    with pa.OSFile(arrow_path, "wb") as sink, pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table, max_chunksize=8192)
+    return csv_path, arrow_path
+
+
+def iter_chunks(path: str, chunk_size: int):
+    # Stand-in for the HTTP response body: fixed-size chunks read from disk
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def legacy_csv(chunks):
+    import pandas as pd
+    # Copy of the old read_tabular body
+    buf = bytearray()
+    for chunk in chunks:
+        if isinstance(chunk, (bytes, bytearray)):
+            buf.extend(chunk)
+        elif isinstance(chunk, int):
+            buf.append(chunk)
+        else:
+            buf.extend(bytes(chunk))
+    return pd.read_csv(io.BytesIO(buf))
+
+
+def arrow_stream(chunks):
+    from foundry_tables import open_arrow_stream
+    return open_arrow_stream(chunks).read_all().to_pandas()
+
+
+def run_child(mode: str, path: str, chunk_size: int):
+    fn = legacy_csv if mode == "csv" else arrow_stream
+    start = time.perf_counter()
+    df = fn(iter_chunks(path, chunk_size))
+    elapsed = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KB on Linux
+    print(f"{elapsed:.4f} {peak_kb} {len(df)}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--chunk-kb", type=int, default=64)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--child", choices=["csv", "arrow"], help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    chunk_size = args.chunk_kb * 1024
+
+    if args.child:
+        run_child(args.child, args.path, chunk_size)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path, arrow_path = write_fixtures(args.rows, tmp)
+        print(f"rows={args.rows}  csv={os.path.getsize(csv_path) / 1e6:.1f}MB  "
+              f"arrow={os.path.getsize(arrow_path) / 1e6:.1f}MB  chunk={args.chunk_kb}KB")
+
+        # Baseline RSS of a child that only imports pandas/pyarrow
+        base = subprocess.run(
+            [sys.executable, "-c",
+             "import resource, pandas, pyarrow; print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)"],
+            capture_output=True, text=True, check=True,
+        )
+        base_kb = int(base.stdout.strip())
+
+        for mode, path in (("csv", csv_path), ("arrow", arrow_path)):
+            times, peaks = [], []
+            for _ in range(args.repeat):
+                res = subprocess.run(
+                    [sys.executable, __file__, "--child", mode, "--path", path, "--chunk-kb", str(args.chunk_kb)],
+                    capture_output=True, text=True, check=True,
+                )
+                elapsed, peak_kb, _n = res.stdout.split()
+                times.append(float(elapsed))
+                peaks.append(int(peak_kb))
+            print(f"{mode:>5}: time-to-DataFrame best={min(times):.3f}s  "
+                  f"peak RSS={max(peaks) / 1024:.0f}MB (+{(max(peaks) - base_kb) / 1024:.0f}MB over imports)")
+
+
+if __name__ == "__main__":
+    main()